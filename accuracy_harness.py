@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Precisión vs. costo con clips anotados (ground truth)
+Procesa clips cortos con entradas/salidas reales anotadas (con su segundo)
+barriendo frame skipping, confianza y ancho de inferencia. Para cada
+configuración reporta el error de conteo junto con llamadas al detector y
+frames/s, y elige la más barata que cumple el objetivo de precisión.
+
+Anotaciones (JSON; rutas de video relativas al archivo):
+    {
+      "tolerancia_segundos": 1.0,
+      "clips": [
+        {"video": "clips/puerta_01.mp4",
+         "eventos": [{"t": 2.4, "tipo": "entrada"}, {"t": 7.9, "tipo": "salida"}]}
+      ]
+    }
+En modo directional los tipos son "positive" / "negative".
+
+Uso:
+    python accuracy_harness.py anotaciones.json
+    python accuracy_harness.py anotaciones.json --skips 0,1,2,3 --skips-sin-deteccion 3,5,10
+    python accuracy_harness.py anotaciones.json --confianzas 0.4,0.5 --anchos 416,640 --max-error 0.05 --salida barrido.json
+"""
+
+import argparse
+import io
+import itertools
+import json
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import cv2
+
+import config
+from flexible_person_counter import FlexiblePersonCounter
+
+
+def load_annotations(path):
+    """Clips anotados con sus eventos ordenados por tiempo"""
+    path = Path(path)
+    with open(path, 'r') as f:
+        data = json.load(f)
+    clips = []
+    for clip in data["clips"]:
+        video = Path(clip["video"])
+        if not video.is_absolute():
+            video = path.parent / video
+        events = sorted((float(event["t"]), event["tipo"]) for event in clip.get("eventos", []))
+        clips.append({"video": video, "eventos": events})
+    return clips, data.get("tolerancia_segundos")
+
+
+def match_events(true_times, predicted_times, tolerance):
+    """
+    Empareja cruces predichos con reales del mismo tipo a menos de 'tolerance'
+    segundos (ambas listas ordenadas; en 1D el emparejamiento voraz es óptimo)
+    Returns: cantidad de pares
+    """
+    matched = 0
+    i = j = 0
+    while i < len(true_times) and j < len(predicted_times):
+        delta = predicted_times[j] - true_times[i]
+        if abs(delta) <= tolerance:
+            matched += 1
+            i += 1
+            j += 1
+        elif delta < 0:
+            j += 1
+        else:
+            i += 1
+    return matched
+
+
+def build_counter(setting):
+    """
+    Contador con la línea de config.py y los parámetros de inferencia/skip del caso
+    La línea de config.py está en píxeles del frame a TARGET_WIDTH: con otro
+    ancho se escalan posición, segmento, margen y desplazamiento mínimo para
+    que quede en el mismo lugar físico (si no, el barrido de anchos mediría
+    otra línea)
+    """
+    scale = setting["ancho"] / config.TARGET_WIDTH
+
+    def scaled_point(point):
+        return None if point is None else [round(value * scale) for value in point]
+
+    orientation = config.LINE_ORIENTATION.lower()
+    position = getattr(config, 'DETECTION_LINE_X' if orientation == "vertical" else 'DETECTION_LINE_Y', None)
+    counter = FlexiblePersonCounter(
+        model_path=getattr(config, 'YOLO_MODEL_PATH', "yolo11n.pt"),
+        target_width=setting["ancho"],
+        rotation_angle=config.ROTATION_ANGLE,
+        line_orientation=orientation,
+        detection_line_position=None if position is None else round(position * scale),
+        detection_line_ratio=getattr(config, 'DETECTION_LINE_RATIO', None),
+        line_margin=max(1, round(config.LINE_MARGIN * scale)),
+        entrance_direction=config.ENTRANCE_DIRECTION,
+        counting_mode=config.COUNTING_MODE,
+        line_start=scaled_point(getattr(config, 'DETECTION_LINE_START', None)),
+        line_end=scaled_point(getattr(config, 'DETECTION_LINE_END', None))
+    )
+    counter.confidence_threshold = setting["confianza"]
+    # El desplazamiento mínimo para validar un cruce también está en píxeles
+    counter.direction_threshold = max(1, round(counter.direction_threshold * scale))
+    counter.configure_frame_skipping(
+        enable=True,
+        default_skip=setting["skip"],
+        no_detection_skip=setting["skip_sin_deteccion"],
+        no_detection_threshold=setting["umbral_sin_deteccion"],
+        show_info=False
+    )
+    return counter
+
+
+def run_clip(setting, video_path):
+    """
+    Procesa un clip en modo headless con un contador nuevo (modelo y tracker
+    sin estado de otros clips)
+    Returns: (cruces [(segundo, tipo)], frames, llamadas al detector, segundos de reloj)
+    """
+    with redirect_stdout(io.StringIO()):
+        counter = build_counter(setting)
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            raise RuntimeError(f"No se pudo abrir {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+
+        crossings = []
+        frame_index = 0
+        start = time.perf_counter()
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            counter.process_frame(frame)
+            for _track_id, direction, kind, _position in counter.last_crossings:
+                crossings.append((frame_index / fps, kind or direction))
+            frame_index += 1
+        wall = time.perf_counter() - start
+        cap.release()
+
+    detector_calls = counter.stage_timer.summary().get("deteccion_tracking", {}).get("n", 0)
+    return crossings, frame_index, detector_calls, wall
+
+
+def evaluate_setting(setting, clips, tolerance):
+    """Error de conteo y costo de una configuración sobre todos los clips"""
+    kinds = set()
+    true_total = predicted_total = count_error = matched_total = 0
+    frames = detector_calls = 0
+    wall = 0.0
+    per_clip = []
+
+    for clip in clips:
+        crossings, clip_frames, clip_calls, clip_wall = run_clip(setting, clip["video"])
+        frames += clip_frames
+        detector_calls += clip_calls
+        wall += clip_wall
+
+        clip_kinds = {kind for _, kind in clip["eventos"]} | {kind for _, kind in crossings}
+        kinds |= clip_kinds
+        clip_error = 0
+        clip_counts = {}
+        for kind in sorted(clip_kinds):
+            true_times = [t for t, k in clip["eventos"] if k == kind]
+            predicted_times = [t for t, k in crossings if k == kind]
+            matched_total += match_events(true_times, predicted_times, tolerance)
+            # Error de conteo por tipo: lo que vería el reporte (sin importar el segundo)
+            clip_error += abs(len(predicted_times) - len(true_times))
+            clip_counts[kind] = {"real": len(true_times), "contado": len(predicted_times)}
+            true_total += len(true_times)
+            predicted_total += len(predicted_times)
+        count_error += clip_error
+        per_clip.append({"video": clip["video"].name, "error": clip_error, "conteos": clip_counts})
+
+    return {
+        **setting,
+        "eventos_reales": true_total,
+        "eventos_contados": predicted_total,
+        "error_conteo": count_error,
+        "error_relativo": round(count_error / true_total, 4) if true_total else float(count_error > 0),
+        # Con la tolerancia temporal: errores que se compensan en el total no cuentan como aciertos
+        "precision": round(matched_total / predicted_total, 4) if predicted_total else 1.0,
+        "recall": round(matched_total / true_total, 4) if true_total else 1.0,
+        "frames": frames,
+        "llamadas_detector": detector_calls,
+        "fraccion_detectada": round(detector_calls / frames, 4) if frames else 0,
+        "fps": round(frames / wall, 2) if wall > 0 else 0,
+        "clips": per_clip,
+    }
+
+
+def parse_list(value, cast):
+    return [cast(part) for part in value.split(",") if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precisión vs. costo con clips anotados")
+    parser.add_argument("anotaciones", help="JSON con los clips y sus entradas/salidas reales")
+    parser.add_argument("--skips", default=str(getattr(config, 'DEFAULT_FRAME_SKIP', 1)),
+                        help="Valores de DEFAULT_FRAME_SKIP (a,b,c)")
+    parser.add_argument("--skips-sin-deteccion", default=str(getattr(config, 'NO_DETECTION_FRAME_SKIP', 5)),
+                        help="Valores de NO_DETECTION_FRAME_SKIP")
+    parser.add_argument("--umbrales-sin-deteccion", default=str(getattr(config, 'NO_DETECTION_THRESHOLD', 10)),
+                        help="Valores de NO_DETECTION_THRESHOLD")
+    parser.add_argument("--confianzas", default="0.5", help="Confianzas mínimas del detector")
+    parser.add_argument("--anchos", default=str(config.TARGET_WIDTH), help="Anchos de inferencia (TARGET_WIDTH)")
+    parser.add_argument("--tolerancia", type=float,
+                        help="Segundos para emparejar un cruce con el real (por defecto el del archivo o 1.0)")
+    parser.add_argument("--max-error", type=float, default=0.05,
+                        help="Objetivo: error de conteo relativo máximo (0.05 = 5%%)")
+    parser.add_argument("--salida", help="Archivo JSON con todas las configuraciones")
+    args = parser.parse_args()
+
+    clips, file_tolerance = load_annotations(args.anotaciones)
+    tolerance = args.tolerancia if args.tolerancia is not None else (file_tolerance or 1.0)
+    missing = [str(clip["video"]) for clip in clips if not clip["video"].exists()]
+    if missing:
+        print(f"❌ Videos no encontrados: {', '.join(missing)}")
+        return 1
+
+    settings = [
+        {"skip": skip, "skip_sin_deteccion": no_detection_skip, "umbral_sin_deteccion": threshold,
+         "confianza": confidence, "ancho": width}
+        for skip, no_detection_skip, threshold, confidence, width in itertools.product(
+            parse_list(args.skips, int), parse_list(args.skips_sin_deteccion, int),
+            parse_list(args.umbrales_sin_deteccion, int), parse_list(args.confianzas, float),
+            parse_list(args.anchos, int))
+    ]
+    print(f"🎯 {len(settings)} configuraciones x {len(clips)} clips "
+          f"({sum(len(clip['eventos']) for clip in clips)} eventos reales, tolerancia {tolerance}s)")
+
+    results = []
+    for index, setting in enumerate(settings, 1):
+        result = evaluate_setting(setting, clips, tolerance)
+        results.append(result)
+        print(f"   [{index}/{len(settings)}] skip {setting['skip']}/{setting['skip_sin_deteccion']} "
+              f"umbral {setting['umbral_sin_deteccion']} conf {setting['confianza']} ancho {setting['ancho']}: "
+              f"error {result['error_conteo']} ({result['error_relativo']:.1%}) | "
+              f"detector x{result['llamadas_detector']} | {result['fps']} fps")
+
+    # Más barata = menos llamadas al detector; a igualdad, más frames/s
+    results.sort(key=lambda r: (r["llamadas_detector"], -r["fps"]))
+    passing = [r for r in results if r["error_relativo"] <= args.max_error]
+
+    print(f"\n📊 {'skip':>9} {'umbral':>6} {'conf':>5} {'ancho':>5} {'error':>7} {'prec':>6} "
+          f"{'recall':>6} {'detector':>8} {'fps':>8}")
+    for r in results:
+        mark = "✅" if r in passing else "  "
+        print(f"{mark} {r['skip']:>4}/{r['skip_sin_deteccion']:<4} {r['umbral_sin_deteccion']:>6} "
+              f"{r['confianza']:>5} {r['ancho']:>5} {r['error_relativo']:>7.1%} {r['precision']:>6.2f} "
+              f"{r['recall']:>6.2f} {r['llamadas_detector']:>8} {r['fps']:>8.1f}")
+
+    best = passing[0] if passing else None
+    if best:
+        print(f"\n🏆 Más barata con error ≤ {args.max_error:.1%}: DEFAULT_FRAME_SKIP = {best['skip']}, "
+              f"NO_DETECTION_FRAME_SKIP = {best['skip_sin_deteccion']}, "
+              f"NO_DETECTION_THRESHOLD = {best['umbral_sin_deteccion']}, "
+              f"confianza {best['confianza']}, TARGET_WIDTH = {best['ancho']}")
+    else:
+        print(f"\n⚠️ Ninguna configuración cumple error ≤ {args.max_error:.1%}")
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump({"tolerancia_segundos": tolerance, "max_error": args.max_error,
+                       "mejor": best, "configuraciones": results}, f, indent=2)
+        print(f"💾 Resultado guardado en {args.salida}")
+
+    return 0 if best else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
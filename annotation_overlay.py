@@ -0,0 +1,141 @@
+import cv2
+import numpy as np
+
+
+def draw_text_with_background(img, text, position, font, scale, color, thickness, bg_color):
+    """Dibuja texto con un rectángulo de fondo"""
+    (text_width, text_height), baseline = cv2.getTextSize(text, font, scale, thickness)
+    cv2.rectangle(img,
+                 (position[0], position[1] - text_height - 10),
+                 (position[0] + text_width + 10, position[1] + baseline),
+                 bg_color, -1)
+    cv2.putText(img, text, position, font, scale, color, thickness)
+
+
+class OverlayLayer:
+    """
+    Capa de anotaciones pre-renderizada (imagen + máscara)
+    Se dibuja una sola vez y se compone sobre cada frame: los píxeles opacos
+    con una única copia enmascarada (cv2.copyTo) y los bordes suavizados
+    (antialiasing del texto) mezclando solo esos píxeles
+    """
+
+    def __init__(self, image, mask, edges, origin=(0, 0)):
+        self.image = image      # Recorte de la capa al rectángulo que ocupa
+        self.mask = mask        # Píxeles opacos (uint8)
+        self.edges = edges      # (filas, columnas, color, transparencia) de bordes semitransparentes
+        self.origin = origin
+
+    @classmethod
+    def render(cls, width, height, draw_fn, origin=(0, 0)):
+        """
+        Renderiza draw_fn(canvas) sobre un lienzo negro y otro blanco
+        Donde ambos coinciden el píxel es opaco; la diferencia da la
+        transparencia de los bordes suavizados
+        """
+        dark = np.zeros((height, width, 3), dtype=np.uint8)
+        light = np.full((height, width, 3), 255, dtype=np.uint8)
+        draw_fn(dark)
+        draw_fn(light)
+
+        transparency = light.astype(np.uint16) - dark
+        covered = np.any(transparency < 255, axis=2)
+        if not covered.any():
+            return cls(dark[:0, :0], covered[:0, :0].astype(np.uint8), None, origin)
+
+        # Recortar al rectángulo con contenido
+        ys, xs = np.nonzero(covered)
+        y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+        dark = dark[y0:y1, x0:x1].copy()
+        transparency = transparency[y0:y1, x0:x1]
+        covered = covered[y0:y1, x0:x1]
+
+        opaque = np.all(transparency == 0, axis=2)
+        rows, cols = np.nonzero(covered & ~opaque)
+        edges = None
+        if len(rows):
+            edges = (rows, cols, dark[rows, cols].astype(np.uint16), transparency[rows, cols])
+
+        return cls(dark, opaque.astype(np.uint8), edges, (origin[0] + int(x0), origin[1] + int(y0)))
+
+    def apply(self, frame):
+        """Compone la capa sobre el frame (in-place)"""
+        x, y = self.origin
+        h, w = self.image.shape[:2]
+        frame_h, frame_w = frame.shape[:2]
+
+        # Recortar si la capa sale del frame
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, frame_w), min(y + h, frame_h)
+        if x1 <= x0 or y1 <= y0:
+            return frame
+
+        region = frame[y0:y1, x0:x1]
+        clipped = (x0, y0, x1, y1) != (x, y, x + w, y + h)
+        if clipped:
+            image = self.image[y0 - y:y1 - y, x0 - x:x1 - x]
+            mask = self.mask[y0 - y:y1 - y, x0 - x:x1 - x]
+        else:
+            image, mask = self.image, self.mask
+        cv2.copyTo(image, mask, region)
+
+        if self.edges is not None:
+            rows, cols, color, transparency = self.edges
+            if clipped:
+                rows, cols = rows - (y0 - y), cols - (x0 - x)
+                inside = (rows >= 0) & (rows < y1 - y0) & (cols >= 0) & (cols < x1 - x0)
+                rows, cols, color, transparency = rows[inside], cols[inside], color[inside], transparency[inside]
+            background = region[rows, cols].astype(np.uint16)
+            region[rows, cols] = color + (background * transparency + 127) // 255
+
+        return frame
+
+
+class TextPanel:
+    """
+    Panel de textos con fondo cacheado
+    Cada texto es una capa propia que solo se vuelve a renderizar cuando cambia
+    """
+
+    def __init__(self, font=cv2.FONT_HERSHEY_SIMPLEX, bg_color=(0, 0, 0)):
+        self.font = font
+        self.bg_color = bg_color
+        self._items = []
+        self._layers = []
+
+    def _render_item(self, item):
+        """
+        Renderiza un texto con fondo como capa del tamaño de su rectángulo
+        El fondo cubre toda la capa, así que es opaca y no necesita bordes
+        """
+        text, (x, y), scale, color, thickness = item
+        (text_width, text_height), baseline = cv2.getTextSize(text, self.font, scale, thickness)
+        x0, y0 = x, y - text_height - 10
+
+        image = np.empty((text_height + 11 + baseline, text_width + 11, 3), dtype=np.uint8)
+        draw_text_with_background(image, text, (x - x0, y - y0), self.font,
+                                  scale, color, thickness, self.bg_color)
+        mask = np.ones(image.shape[:2], dtype=np.uint8)
+        return OverlayLayer(image, mask, None, origin=(x0, y0))
+
+    def update(self, items):
+        """
+        items: lista de (texto, (x, y), escala, color, grosor)
+        Re-renderiza solo los textos que cambiaron y devuelve el panel
+        """
+        items = list(items)
+        if len(items) != len(self._items):
+            self._items = [None] * len(items)
+            self._layers = [None] * len(items)
+
+        for i, item in enumerate(items):
+            if item != self._items[i]:
+                self._layers[i] = self._render_item(item)
+                self._items[i] = item
+        return self
+
+    def apply(self, frame):
+        """Compone todos los textos del panel sobre el frame (in-place)"""
+        for layer in self._layers:
+            layer.apply(frame)
+        return frame
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Auto-calibración de la línea de detección a partir de trayectorias reales
+
+Toma los tracks de los segmentos recientes del caché de detecciones, acumula
+un mapa de densidad de trayectorias y de dirección de flujo, y propone la
+orientación, posición, margen y ENTRANCE_DIRECTION que maximizan los cruces
+limpios. Ante un empate práctico de cruces entre orientaciones decide el eje
+de flujo dominante: la línea se pone perpendicular al movimiento. El
+resultado se guarda con LineCalibrator.save_calibration (mismo formato
+line_config_*.json que el calibrador manual), junto con la imagen del mapa de
+calor con la línea propuesta.
+
+Uso:
+    python auto_calibrate.py
+    python auto_calibrate.py --segmentos 50 --margenes 5:40:5
+    python auto_calibrate.py --video videos/video_20250606_133535_000.mp4 --entrada negative
+"""
+
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+import config
+from detection_cache import iter_cached_segments
+from line_calibrator import LineCalibrator
+from line_sweep import collect_updates, detection_pass, parse_range, sweep_segments
+
+
+def recent_segments(cache_dir, count):
+    """Los 'count' segmentos cacheados más recientes (por fecha de modificación)"""
+    segments = list(iter_cached_segments(cache_dir))
+    segments.sort(key=lambda segment: segment.path.stat().st_mtime)
+    return segments[-count:] if count else segments
+
+
+def trajectory_maps(segments, frame_size, cell_size=16, confidence_threshold=0.5):
+    """
+    Mapas por celda: densidad de puntos de trayectoria y flujo medio (dx, dy)
+    El flujo se calcula entre puntos consecutivos del mismo track
+    """
+    width, height = frame_size
+    columns = -(-width // cell_size)
+    rows = -(-height // cell_size)
+    density = np.zeros(rows * columns, dtype=np.float64)
+    flow_x = np.zeros_like(density)
+    flow_y = np.zeros_like(density)
+
+    for segment in segments:
+        if tuple(segment.frame_size) != tuple(frame_size):
+            continue
+        # Puntos consecutivos de cada track: con min_points=2 y history=2,
+        # collect_updates devuelve (punto anterior, punto actual) de cada paso
+        previous, current, _ = collect_updates(segment, confidence_threshold, history=2, min_points=2)
+        if len(current) == 0:
+            continue
+
+        cell_x = np.clip(current[:, 0] // cell_size, 0, columns - 1).astype(np.int64)
+        cell_y = np.clip(current[:, 1] // cell_size, 0, rows - 1).astype(np.int64)
+        cells = cell_y * columns + cell_x
+        step = current - previous
+        density += np.bincount(cells, minlength=rows * columns)
+        flow_x += np.bincount(cells, weights=step[:, 0], minlength=rows * columns)
+        flow_y += np.bincount(cells, weights=step[:, 1], minlength=rows * columns)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_x = np.where(density > 0, flow_x / density, 0)
+        mean_y = np.where(density > 0, flow_y / density, 0)
+    shape = (rows, columns)
+    return density.reshape(shape), mean_x.reshape(shape), mean_y.reshape(shape)
+
+
+def dominant_axis(density, flow_x, flow_y):
+    """Eje de movimiento dominante ponderado por densidad: 'x' (←→) o 'y' (↑↓)"""
+    motion_x = np.sum(density * np.abs(flow_x))
+    motion_y = np.sum(density * np.abs(flow_y))
+    return ("x" if motion_x >= motion_y else "y"), motion_x, motion_y
+
+
+def best_candidate(positions, margins, positive, negative, margin_tolerance=0.95):
+    """
+    Mejor posición y margen de una matriz de conteos (posiciones × márgenes)
+    - La posición maximiza los cruces; si hay una meseta de posiciones con el
+      máximo se elige su centro (lejos de donde empiezan/terminan los tracks)
+    - El margen es el mayor que conserva margin_tolerance de esos cruces
+      (más margen = cruces más limpios, menos conteos por temblor del tracker)
+    """
+    totals = (positive + negative).astype(np.float64)
+    best_per_position = totals.max(axis=1)
+    first = int(np.argmax(best_per_position))
+    plateau = best_per_position[first:] == best_per_position[first]
+    length = int(np.argmin(plateau)) if not plateau.all() else len(plateau)
+    i = first + (length - 1) // 2
+
+    row = totals[i]
+    keep = np.flatnonzero(row >= margin_tolerance * row.max()) if row.max() > 0 else [0]
+    j = int(max(keep, key=lambda index: margins[index]))
+    return {
+        "posicion": int(positions[i]),
+        "margen": int(margins[j]),
+        "positivos": int(positive[i, j]),
+        "negativos": int(negative[i, j]),
+        "cruces": int(positive[i, j] + negative[i, j]),
+    }
+
+
+def propose_line(segments, frame_size, margins, position_step=2, confidence_threshold=0.5,
+                 axis=None, tie_tolerance=0.95):
+    """
+    Evalúa ambas orientaciones sobre todas las posiciones y devuelve la mejor propuesta
+    - Gana la orientación con más cruces; si la otra queda dentro de
+      tie_tolerance de ese máximo (empate práctico) se prefiere la línea
+      perpendicular al eje de movimiento dominante ('x' → vertical, 'y' →
+      horizontal): es la que cortan las trayectorias de frente
+    """
+    width, height = frame_size
+    proposals = {}
+    for orientation, dimension in (("horizontal", height), ("vertical", width)):
+        positions = np.arange(0, dimension, position_step)
+        positive, negative, _ = sweep_segments(segments, orientation, positions, margins,
+                                               confidence_threshold)
+        proposals[orientation] = best_candidate(positions, margins, positive, negative)
+    orientation = max(proposals, key=lambda name: proposals[name]["cruces"])
+
+    if axis is not None:
+        perpendicular = "vertical" if axis == "x" else "horizontal"
+        if proposals[perpendicular]["cruces"] >= tie_tolerance * proposals[orientation]["cruces"]:
+            orientation = perpendicular
+    return orientation, proposals
+
+
+def render_heatmap(density, flow_x, flow_y, frame_size, cell_size=16):
+    """Imagen del mapa de densidad (escala logarítmica) con flechas de flujo por celda"""
+    width, height = frame_size
+    scaled = np.log1p(density)
+    if scaled.max() > 0:
+        scaled = scaled / scaled.max()
+    heatmap = cv2.applyColorMap((scaled * 255).astype(np.uint8), cv2.COLORMAP_JET)
+    heatmap = cv2.resize(heatmap, (width, height), interpolation=cv2.INTER_NEAREST)
+
+    # Flechas solo en celdas con suficientes puntos
+    threshold = np.percentile(density[density > 0], 50) if np.any(density > 0) else 1
+    for row, column in zip(*np.nonzero(density >= threshold)):
+        center = (int(column * cell_size + cell_size / 2), int(row * cell_size + cell_size / 2))
+        dx, dy = flow_x[row, column], flow_y[row, column]
+        length = np.hypot(dx, dy)
+        if length < 0.5:
+            continue
+        tip = (int(center[0] + dx / length * cell_size * 0.8), int(center[1] + dy / length * cell_size * 0.8))
+        cv2.arrowedLine(heatmap, center, tip, (255, 255, 255), 1, tipLength=0.4)
+    return heatmap
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto-calibración de la línea desde trayectorias")
+    parser.add_argument("--cache", default=getattr(config, 'DETECTION_CACHE_DIR', "stats/detections"),
+                        help="Directorio del caché de detecciones")
+    parser.add_argument("--video", nargs="*", help="Detectar primero en estos videos (sin usar el caché)")
+    parser.add_argument("--segmentos", type=int, default=30, help="Segmentos recientes a muestrear (0 = todos)")
+    parser.add_argument("--margenes", default="5:40:5", help="Márgenes a evaluar: inicio:fin:paso o a,b,c")
+    parser.add_argument("--paso", type=int, default=2, help="Paso en píxeles entre posiciones candidatas")
+    parser.add_argument("--celda", type=int, default=16, help="Tamaño de celda del mapa de calor")
+    parser.add_argument("--confianza", type=float, default=0.5, help="Confianza mínima de las detecciones")
+    parser.add_argument("--entrada", choices=["positive", "negative"],
+                        help="Dirección de ENTRADA (por defecto la dirección con más cruces)")
+    args = parser.parse_args()
+
+    margins = [int(margin) for margin in parse_range(args.margenes)]
+
+    with tempfile.TemporaryDirectory() as temp_cache:
+        cache_dir = args.cache
+        if args.video:
+            detection_pass(args.video, temp_cache)
+            cache_dir = temp_cache
+
+        segments = recent_segments(cache_dir, args.segmentos)
+        if not segments:
+            print(f"❌ No hay detecciones cacheadas en {cache_dir}")
+            print("💡 Activa ENABLE_DETECTION_CACHE en config.py o usa --video")
+            return 1
+
+        # Todos los segmentos de la misma cámara deberían compartir resolución
+        sizes = [tuple(segment.frame_size) for segment in segments]
+        frame_size = max(set(sizes), key=sizes.count)
+        segments = [segment for segment in segments if tuple(segment.frame_size) == frame_size]
+        width, height = frame_size
+        print(f"🔍 Muestreando trayectorias de {len(segments)} segmentos ({width}x{height})...")
+
+        density, flow_x, flow_y = trajectory_maps(segments, frame_size, args.celda, args.confianza)
+        axis, motion_x, motion_y = dominant_axis(density, flow_x, flow_y)
+        print(f"🧭 Movimiento dominante: {'HORIZONTAL (←→)' if axis == 'x' else 'VERTICAL (↑↓)'} "
+              f"(x={motion_x:.0f}, y={motion_y:.0f})")
+
+        orientation, proposals = propose_line(segments, frame_size, margins, args.paso, args.confianza,
+                                              axis=axis)
+
+    for name, proposal in proposals.items():
+        axis_name = "X" if name == "vertical" else "Y"
+        print(f"   Línea {name:10s} {axis_name}={proposal['posicion']:4d} ±{proposal['margen']}px → "
+              f"{proposal['cruces']} cruces (➡️⬇️ {proposal['positivos']} | ⬅️⬆️ {proposal['negativos']})")
+
+    best = proposals[orientation]
+    if best["cruces"] == 0:
+        print("❌ Ninguna línea candidata registra cruces: se necesitan más trayectorias")
+        return 1
+
+    if args.entrada:
+        entrance_direction = args.entrada
+    else:
+        # Sin referencia externa se asume que la dirección mayoritaria es la entrada
+        entrance_direction = "positive" if best["positivos"] >= best["negativos"] else "negative"
+        print(f"⚠️ ENTRANCE_DIRECTION estimada como la dirección mayoritaria ({entrance_direction}); "
+              f"verifica con --entrada si no corresponde")
+
+    calibrator = LineCalibrator(
+        rtsp_url=config.RTSP_URL,
+        target_width=config.TARGET_WIDTH,
+        rotation_angle=config.ROTATION_ANGLE,
+        line_orientation=orientation
+    )
+    calibrator.frame = render_heatmap(density, flow_x, flow_y, frame_size, args.celda)
+    calibrator.line_margin = best["margen"]
+    calibrator.entrance_direction = entrance_direction
+    if orientation == "vertical":
+        calibrator.line_start = (best["posicion"], 0)
+        calibrator.line_end = (best["posicion"], height - 1)
+    else:
+        calibrator.line_start = (0, best["posicion"])
+        calibrator.line_end = (width - 1, best["posicion"])
+
+    print(f"\n✅ Propuesta: línea {orientation} en {best['posicion']} ±{best['margen']}px, "
+          f"entrada {entrance_direction} ({best['cruces']} cruces limpios)")
+    return 0 if calibrator.save_calibration() else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
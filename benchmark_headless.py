@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark del modo headless
+Procesa el mismo video con el camino con anotaciones (sin ventana, como antes
+con SHOW_LIVE = False) y con el camino headless, y compara los frames/s.
+
+Uso:
+    python benchmark_headless.py videos/video_20250606_133535_000.mp4 --repeticiones 3
+"""
+
+import argparse
+import io
+import json
+import statistics
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+
+def run_mode(processor, video_path, render, repetitions):
+    """Procesa el video varias veces en un modo y devuelve los FPS obtenidos"""
+    fps_values = []
+    for _ in range(repetitions):
+        # Silenciar los logs por frame para no medir la consola
+        with redirect_stdout(io.StringIO()):
+            stats = processor.process_video_live(video_path, show_live=False,
+                                                 render=render, delete_after=False)
+        if not stats:
+            raise RuntimeError(f"No se pudo procesar {video_path}")
+        fps_values.append(stats["fps_processed"])
+    
+    return {
+        "fps": fps_values,
+        "fps_promedio": round(statistics.mean(fps_values), 2),
+        "fps_max": round(max(fps_values), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: anotaciones vs headless")
+    parser.add_argument("video", help="Video de prueba (no se elimina)")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por modo")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    args = parser.parse_args()
+    
+    video_path = Path(args.video)
+    if not video_path.exists():
+        print(f"❌ No existe el video: {video_path}")
+        return 1
+    
+    from video_processor import VideoProcessor
+    
+    # Estadísticas en un directorio temporal para no contaminar stats/
+    with tempfile.TemporaryDirectory() as stats_dir:
+        processor = VideoProcessor(stats_dir=stats_dir)
+        
+        print("🔥 Calentando modelo...")
+        run_mode(processor, video_path, render=False, repetitions=1)
+        
+        print("🎨 Midiendo camino con anotaciones...")
+        rendered = run_mode(processor, video_path, render=True, repetitions=args.repeticiones)
+        
+        print("🖥️ Midiendo camino headless...")
+        headless = run_mode(processor, video_path, render=False, repetitions=args.repeticiones)
+    
+    result = {
+        "video": video_path.name,
+        "repeticiones": args.repeticiones,
+        "con_anotaciones": rendered,
+        "headless": headless,
+        "mejora": round(headless["fps_promedio"] / rendered["fps_promedio"], 2) if rendered["fps_promedio"] else None
+    }
+    
+    print(json.dumps(result, indent=2))
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Resultado guardado en {args.salida}")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
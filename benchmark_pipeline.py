@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark de extremo a extremo con video sintético
+Genera clips con las fuentes de prueba de FFmpeg (testsrc2), opcionalmente con
+siluetas de persona que cruzan el frame, a varias resoluciones y rotaciones, y
+los procesa con VideoProcessor.process_video_live en modo headless. Cada caso
+corre en su propio proceso para medir el pico de memoria (RSS) sin arrastre.
+
+Reporta en JSON: frames/s, ms por etapa, llamadas al detector y pico de RSS.
+Sirve como línea base para comparar cambios de rendimiento.
+
+Uso:
+    python benchmark_pipeline.py
+    python benchmark_pipeline.py --resoluciones 640x360,1280x720,1920x1080 --rotaciones 0,180
+    python benchmark_pipeline.py --sin-personas --segundos 20 --salida base.json
+    python benchmark_pipeline.py --prefetch 0 --salida sin_prefetch.json
+"""
+
+import argparse
+import io
+import json
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+
+RESULT_PREFIX = "BENCHMARK_RESULT "
+
+
+def sprite_filters(width, height, count):
+    """
+    Filtros drawbox de FFmpeg para 'count' siluetas (cabeza + cuerpo) que
+    cruzan el frame de arriba hacia abajo a distintas velocidades y columnas
+    """
+    body_w, body_h = max(8, width // 24), max(20, height // 5)
+    head = max(6, body_w * 2 // 3)
+    filters = []
+    for i in range(count):
+        x = int(width * (i + 1) / (count + 1)) - body_w // 2
+        speed = height * (0.25 + 0.1 * i)  # px/s
+        period = height + body_h + head
+        y = f"mod(t*{speed:.1f}+{i * period // max(1, count)},{period})-{body_h + head}"
+        filters.append(f"drawbox=x={x}:y='{y}+{head}':w={body_w}:h={body_h}:color=0x303060:t=fill")
+        filters.append(f"drawbox=x={x + (body_w - head) // 2}:y='{y}':w={head}:h={head}:color=0xc08060:t=fill")
+    return filters
+
+
+def generate_clip_ffmpeg(path, width, height, seconds, fps, sprites):
+    """Clip sintético con testsrc2 (+ siluetas) codificado en H.264 como los segmentos de la cámara"""
+    video_filter = ",".join(["format=yuv420p"] + sprite_filters(width, height, sprites))
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds}",
+        "-vf", video_filter,
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        str(path)
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def generate_clip_opencv(path, width, height, seconds, fps, sprites):
+    """Alternativa sin FFmpeg: mismo contenido (fondo en degradé + siluetas) con cv2.VideoWriter"""
+    import cv2
+
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    gradient_x = np.linspace(0, 255, width, dtype=np.uint8)
+    background = np.dstack([np.tile(gradient_x, (height, 1))] * 3)
+    body_w, body_h = max(8, width // 24), max(20, height // 5)
+    head = max(6, body_w * 2 // 3)
+    period = height + body_h + head
+    for frame_index in range(int(seconds * fps)):
+        t = frame_index / fps
+        frame = background.copy()
+        cv2.putText(frame, f"{frame_index}", (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        for i in range(sprites):
+            x = int(width * (i + 1) / (sprites + 1)) - body_w // 2
+            y = int((t * height * (0.25 + 0.1 * i) + i * period // max(1, sprites)) % period) - body_h - head
+            cv2.rectangle(frame, (x, y + head), (x + body_w, y + head + body_h), (96, 48, 48), -1)
+            cv2.rectangle(frame, (x + (body_w - head) // 2, y),
+                          (x + (body_w + head) // 2, y + head), (96, 128, 192), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def generate_clip(path, width, height, seconds, fps, sprites):
+    if shutil.which("ffmpeg"):
+        generate_clip_ffmpeg(path, width, height, seconds, fps, sprites)
+        return "ffmpeg"
+    generate_clip_opencv(path, width, height, seconds, fps, sprites)
+    return "opencv"
+
+
+class StageClock:
+    """Acumula tiempo y llamadas de un método envuelto en la instancia (instrumentación del benchmark)"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+
+    def wrap(self, function):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+                self.calls += 1
+        return timed
+
+
+def run_case(case):
+    """Ejecuta un caso en este proceso (llamado en el proceso hijo) y devuelve sus métricas"""
+    import config
+
+    # Solo el pipeline de conteo: sin vista previa, eventos, caché ni recarga
+    config.ROTATION_ANGLE = case["rotacion"]
+    config.ENABLE_PREVIEW_SERVER = False
+    config.ENABLE_EVENT_LOG = False
+    config.ENABLE_DETECTION_CACHE = False
+    config.ENABLE_CONFIG_WATCHER = False
+    config.SHOW_FRAME_SKIP_INFO = False
+    config.DECODE_PREFETCH_FRAMES = case.get("prefetch", getattr(config, 'DECODE_PREFETCH_FRAMES', 0))
+
+    from video_processor import VideoProcessor
+
+    with tempfile.TemporaryDirectory() as stats_dir, redirect_stdout(io.StringIO()):
+        processor = VideoProcessor(stats_dir=stats_dir)
+        counter = processor.counter
+
+        clocks = {name: StageClock() for name in ("proceso_frame", "detector", "conteo", "anotaciones")}
+        # Calentar el modelo fuera de la medición (primera inferencia)
+        processor.process_video_live(case["video"], show_live=False, render=False, delete_after=False)
+
+        counter.process_frame = clocks["proceso_frame"].wrap(counter.process_frame)
+        counter.count_detections = clocks["conteo"].wrap(counter.count_detections)
+        counter.draw_annotations = clocks["anotaciones"].wrap(counter.draw_annotations)
+        if counter.model is not None:
+            counter.model.track = clocks["detector"].wrap(counter.model.track)
+
+        start = time.perf_counter()
+        stats = processor.process_video_live(case["video"], show_live=False, render=False, delete_after=False)
+        wall = time.perf_counter() - start
+
+    if not stats:
+        raise RuntimeError(f"No se pudo procesar {case['video']}")
+
+    frames = stats["total_frames"]
+    per_frame = {name: round(clock.seconds * 1000 / frames, 3) if frames else 0
+                 for name, clock in clocks.items()}
+    # Lo que no es proceso_frame: lectura/decodificación del video y el bucle
+    per_frame["lectura_y_bucle"] = round(max(0.0, wall - clocks["proceso_frame"].seconds) * 1000 / frames, 3) if frames else 0
+    per_frame["total"] = round(wall * 1000 / frames, 3) if frames else 0
+
+    return {
+        "resolucion": case["resolucion"],
+        "rotacion": case["rotacion"],
+        "personas": case["personas"],
+        "prefetch": case.get("prefetch"),
+        "frames": frames,
+        "segundos": round(wall, 3),
+        "fps": round(frames / wall, 2) if wall > 0 else 0,
+        "ms_por_frame": per_frame,
+        # p50/p95 de los temporizadores por etapa del propio pipeline (stage_timer)
+        "etapas_ms": {stage: {key: timing[key] for key in ("media_ms", "p50_ms", "p95_ms")}
+                      for stage, timing in stats.get("stage_timings_ms", {}).items()},
+        "llamadas_detector": clocks["detector"].calls,
+        "frames_saltados": stats.get("frames_skipped", 0),
+        "conteo": {key: stats[key] for key in ("entradas", "salidas", "total") if key in stats},
+        # ru_maxrss está en KB en Linux (bytes en macOS)
+        "pico_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss /
+                             (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+    }
+
+
+def run_case_subprocess(case):
+    """Lanza un proceso hijo por caso y lee su resultado JSON"""
+    process = subprocess.run([sys.executable, __file__, "--caso", json.dumps(case)],
+                             capture_output=True, text=True, cwd=Path(__file__).resolve().parent)
+    for line in reversed(process.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"El caso {case['resolucion']} rot {case['rotacion']} falló:\n{process.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo con video sintético")
+    parser.add_argument("--resoluciones", default="640x360,1280x720,1920x1080", help="Lista AnchoxAlto")
+    parser.add_argument("--rotaciones", default="0,180", help="Rotaciones a probar (0, 90, 180, 270)")
+    parser.add_argument("--segundos", type=int, default=10, help="Duración de cada clip")
+    parser.add_argument("--fps", type=int, default=25, help="FPS de los clips")
+    parser.add_argument("--personas", type=int, default=3, help="Siluetas que cruzan el frame")
+    parser.add_argument("--sin-personas", action="store_true", help="Solo la fuente de prueba")
+    parser.add_argument("--prefetch", type=int, help="DECODE_PREFETCH_FRAMES (por defecto el de config.py)")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    parser.add_argument("--caso", help=argparse.SUPPRESS)  # Uso interno: proceso hijo
+    args = parser.parse_args()
+
+    if args.caso:
+        print(RESULT_PREFIX + json.dumps(run_case(json.loads(args.caso))))
+        return 0
+
+    sprites = 0 if args.sin_personas else args.personas
+    resolutions = [tuple(int(v) for v in value.lower().split("x")) for value in args.resoluciones.split(",")]
+    rotations = [int(value) for value in args.rotaciones.split(",")]
+
+    result = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "segundos_clip": args.segundos,
+        "fps_clip": args.fps,
+        "casos": []
+    }
+
+    with tempfile.TemporaryDirectory() as clips_dir:
+        for width, height in resolutions:
+            clip = Path(clips_dir) / f"sintetico_{width}x{height}.mp4"
+            print(f"🎞️ Generando clip {width}x{height} ({args.segundos}s, {sprites} personas)...")
+            result["generador"] = generate_clip(clip, width, height, args.segundos, args.fps, sprites)
+
+            for rotation in rotations:
+                case = {"video": str(clip), "resolucion": f"{width}x{height}",
+                        "rotacion": rotation, "personas": sprites}
+                if args.prefetch is not None:
+                    case["prefetch"] = args.prefetch
+                print(f"⏱️ Midiendo {width}x{height} rot {rotation}°...")
+                case_result = run_case_subprocess(case)
+                result["casos"].append(case_result)
+                print(f"   {case_result['fps']} fps | {case_result['ms_por_frame']['total']} ms/frame | "
+                      f"detector x{case_result['llamadas_detector']} | RSS {case_result['pico_rss_mb']} MB")
+
+    print(json.dumps(result, indent=2))
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Resultado guardado en {args.salida}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark del reporte PDF
+Genera el mismo reporte con los gráficos vectoriales de reportlab y con
+matplotlib (PNG a 300 dpi, si está instalado) y compara tiempo y tamaño.
+
+Uso:
+    python benchmark_report.py --repeticiones 3
+    python benchmark_report.py --entrada stats/counting_stats.jsonl
+"""
+
+import argparse
+import io
+import json
+import random
+import statistics
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+def synthetic_entries(count, seed=0):
+    """Entradas de estadísticas sintéticas (un segmento por minuto)"""
+    rng = random.Random(seed)
+    start = datetime(2025, 6, 1, 8, 0)
+    for i in range(count):
+        entradas, salidas = rng.randint(0, 6), rng.randint(0, 6)
+        efficiency = rng.uniform(20, 90)
+        yield {
+            "video": f"video_{i:06d}.mp4",
+            "camera": "camara_1",
+            "stats": {
+                "timestamp": (start + timedelta(minutes=i)).isoformat(),
+                "resolution": "640x360",
+                "rotation_angle": 180,
+                "detection_line_position": 320,
+                "line_margin": 40,
+                "counting_mode": "entrance_exit",
+                "frame_skipping_enabled": True,
+                "frame_skip_mode": rng.choice(["normal", "no_detection"]),
+                "skip_efficiency_percent": round(efficiency, 2),
+                "processing_time_seconds": round(rng.uniform(5, 20), 2),
+                "fps_processed": round(rng.uniform(20, 60), 2),
+                "entradas": entradas,
+                "salidas": salidas,
+                "total_movimientos": entradas + salidas
+            }
+        }
+
+
+def run_backend(analysis, backend, output_dir, repetitions):
+    """Genera el reporte varias veces con un backend y devuelve tiempos y tamaño"""
+    from reporte import create_pdf_report
+
+    times = []
+    output_path = Path(output_dir) / f"reporte_{backend}.pdf"
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        # Silenciar los mensajes del generador para no medir la consola
+        with redirect_stdout(io.StringIO()):
+            create_pdf_report(analysis, str(output_path), chart_backend=backend)
+        times.append(time.perf_counter() - start)
+
+    return {
+        "segundos": [round(t, 3) for t in times],
+        "segundos_promedio": round(statistics.mean(times), 3),
+        "tamano_kb": round(output_path.stat().st_size / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: gráficos vectoriales vs matplotlib")
+    parser.add_argument("--entrada", help="Archivo de estadísticas (por defecto datos sintéticos)")
+    parser.add_argument("--segmentos", type=int, default=5000, help="Entradas sintéticas a generar")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Reportes por backend")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    args = parser.parse_args()
+
+    from reporte import load_data, analyze_data
+
+    if args.entrada:
+        data = load_data(args.entrada)
+        if data is None:
+            return 1
+    else:
+        data = synthetic_entries(args.segmentos)
+
+    analysis = analyze_data(data)
+    if not analysis:
+        print("❌ No hay datos para el reporte")
+        return 1
+
+    backends = ["vector"]
+    try:
+        import matplotlib  # noqa: F401
+        import seaborn  # noqa: F401
+        backends.append("matplotlib")
+    except ImportError:
+        print("⚠️ matplotlib/seaborn no instalados: solo se mide el backend vectorial")
+
+    result = {
+        "videos": analysis['general']['total_videos'],
+        "repeticiones": args.repeticiones
+    }
+    with tempfile.TemporaryDirectory() as output_dir:
+        for backend in backends:
+            print(f"📊 Midiendo backend {backend}...")
+            result[backend] = run_backend(analysis, backend, output_dir, args.repeticiones)
+
+    if "matplotlib" in result:
+        result["mejora_tiempo"] = round(result["matplotlib"]["segundos_promedio"] /
+                                        result["vector"]["segundos_promedio"], 2)
+        result["reduccion_tamano"] = round(result["matplotlib"]["tamano_kb"] /
+                                           result["vector"]["tamano_kb"], 2)
+
+    print(json.dumps(result, indent=2))
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Resultado guardado en {args.salida}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
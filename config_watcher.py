@@ -0,0 +1,246 @@
+import json
+import runpy
+import threading
+from pathlib import Path
+
+
+# Parámetros que se pueden cambiar sin reiniciar (el modelo y la captura no se tocan)
+LINE_KEYS = ("LINE_ORIENTATION", "DETECTION_LINE_X", "DETECTION_LINE_Y", "DETECTION_LINE_RATIO",
+             "DETECTION_LINE_START", "DETECTION_LINE_END", "LINE_MARGIN", "ENTRANCE_DIRECTION")
+SKIP_KEYS = ("ENABLE_FRAME_SKIPPING", "DEFAULT_FRAME_SKIP", "NO_DETECTION_FRAME_SKIP",
+             "NO_DETECTION_THRESHOLD", "DETECTION_RECOVERY_THRESHOLD", "SHOW_FRAME_SKIP_INFO")
+
+
+def read_config_file(path):
+    """Valores recargables de config.py (ejecutado aparte: no modifica el módulo importado)"""
+    namespace = runpy.run_path(str(path))
+    return {key: namespace[key] for key in LINE_KEYS + SKIP_KEYS if key in namespace}
+
+
+def read_line_config(path):
+    """Valores de un line_config_*.json del calibrador, con los nombres de config.py"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    values = {key: data[key] for key in ("DETECTION_LINE_X", "DETECTION_LINE_Y", "DETECTION_LINE_RATIO",
+                                         "LINE_MARGIN", "ENTRANCE_DIRECTION") if key in data}
+    if "LINE_ORIENTATION" in data:
+        values["LINE_ORIENTATION"] = data["LINE_ORIENTATION"].lower()
+    if "CALIBRATION_LINE_START" in data and "CALIBRATION_LINE_END" in data:
+        values["DETECTION_LINE_START"] = data["CALIBRATION_LINE_START"]
+        values["DETECTION_LINE_END"] = data["CALIBRATION_LINE_END"]
+    return values
+
+
+def validate_settings(values):
+    """Lanza ValueError si algún valor no tiene sentido (se conserva la configuración anterior)"""
+    orientation = str(values.get("LINE_ORIENTATION", "horizontal")).lower()
+    if orientation not in ("horizontal", "vertical"):
+        raise ValueError(f"LINE_ORIENTATION inválida: {orientation}")
+    if str(values.get("ENTRANCE_DIRECTION", "positive")).lower() not in ("positive", "negative"):
+        raise ValueError(f"ENTRANCE_DIRECTION inválida: {values['ENTRANCE_DIRECTION']}")
+    if values.get("LINE_MARGIN", 0) < 0:
+        raise ValueError(f"LINE_MARGIN negativo: {values['LINE_MARGIN']}")
+    for key in ("DETECTION_LINE_START", "DETECTION_LINE_END"):
+        point = values.get(key)
+        if point is not None and len(point) != 2:
+            raise ValueError(f"{key} debe ser [x, y]: {point}")
+    ratio = values.get("DETECTION_LINE_RATIO")
+    if ratio is not None and not 0 <= ratio <= 1:
+        raise ValueError(f"DETECTION_LINE_RATIO fuera de [0, 1]: {ratio}")
+
+
+class ConfigWatcher:
+    """
+    Recarga en caliente la línea y el frame skipping de un contador en ejecución
+
+    Un hilo revisa cada interval segundos la fecha de modificación de config.py
+    y de los line_config_*.json del calibrador (solo stat). Cuando algo cambia,
+    lee y valida la configuración completa fuera del hilo de procesamiento y la
+    deja pendiente. El procesamiento llama a apply_pending() entre frames y la
+    aplica de una vez: ningún frame ve una configuración a medias. El modelo,
+    el tracker y la sesión de captura no se tocan.
+    """
+
+    def __init__(self, counter, config_path="config.py", line_config_dir=None, interval=2.0):
+        self.counter = counter
+        self.config_path = Path(config_path)
+        self.line_config_dir = Path(line_config_dir) if line_config_dir else None
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._pending = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # Estado aplicado (lo que el contador tiene ahora)
+        self._applied = self._current_settings()
+        self._config_mtime = self._mtime(self.config_path)
+        try:
+            self._config_values = read_config_file(self.config_path)
+        except Exception:
+            self._config_values = {}
+        # Solo calibraciones guardadas después de arrancar: las anteriores ya
+        # pasaron (o no) a config.py
+        self._line_config_path, self._line_config_mtime = self._latest_line_config()
+
+        # Estadísticas
+        self.reloads = 0
+        self.errors = 0
+
+    def _current_settings(self):
+        counter = self.counter
+        position = counter.detection_line_position
+        return {
+            "LINE_ORIENTATION": counter.line_orientation,
+            "DETECTION_LINE_X": position if counter.line_orientation == "vertical" else None,
+            "DETECTION_LINE_Y": position if counter.line_orientation == "horizontal" else None,
+            "DETECTION_LINE_RATIO": counter.detection_line_ratio,
+            "DETECTION_LINE_START": list(counter.line_start) if counter.line_start else None,
+            "DETECTION_LINE_END": list(counter.line_end) if counter.line_end else None,
+            "LINE_MARGIN": counter.line_margin,
+            "ENTRANCE_DIRECTION": counter.entrance_direction,
+            "ENABLE_FRAME_SKIPPING": counter.enable_frame_skipping,
+            "DEFAULT_FRAME_SKIP": counter.default_frame_skip,
+            "NO_DETECTION_FRAME_SKIP": counter.no_detection_frame_skip,
+            "NO_DETECTION_THRESHOLD": counter.no_detection_threshold,
+            "DETECTION_RECOVERY_THRESHOLD": counter.detection_recovery_threshold,
+            "SHOW_FRAME_SKIP_INFO": counter.show_frame_skip_info,
+        }
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
+
+    def _latest_line_config(self):
+        if self.line_config_dir is None or not self.line_config_dir.exists():
+            return None, None
+        candidates = [(self._mtime(path), path) for path in self.line_config_dir.glob("line_config_*.json")]
+        candidates = [(mtime, path) for mtime, path in candidates if mtime is not None]
+        if not candidates:
+            return None, None
+        mtime, path = max(candidates)
+        return path, mtime
+
+    def start(self):
+        """Inicia el hilo de vigilancia"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        watched = [self.config_path.name]
+        if self.line_config_dir is not None:
+            watched.append(f"{self.line_config_dir}/line_config_*.json")
+        print(f"👀 Recarga en caliente activa: {', '.join(watched)} (cada {self.interval}s)")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """
+        Revisa si cambió algún archivo y deja la nueva configuración pendiente
+        Returns: True si hay una configuración nueva pendiente
+        """
+        config_mtime = self._mtime(self.config_path)
+        line_path, line_mtime = self._latest_line_config()
+        config_changed = config_mtime is not None and config_mtime != self._config_mtime
+        line_changed = line_mtime is not None and (line_path, line_mtime) != (self._line_config_path,
+                                                                                self._line_config_mtime)
+        if not (config_changed or line_changed):
+            return False
+
+        try:
+            with self._lock:
+                # Sobre la pendiente si aún no se aplicó, para no perder sus cambios
+                values = dict(self._pending or self._applied)
+            config_values = self._config_values
+            if config_changed:
+                # Solo las claves editadas en config.py: no pisar una calibración
+                # aplicada antes desde line_config_*.json
+                config_values = read_config_file(self.config_path)
+                values.update({key: value for key, value in config_values.items()
+                               if key not in self._config_values or self._config_values[key] != value})
+            if line_changed:
+                # La calibración guardada manda sobre la línea de config.py
+                values.update(read_line_config(line_path))
+            validate_settings(values)
+        except Exception as e:
+            # Archivo a medio guardar o con errores: se reintenta en el próximo cambio
+            self.errors += 1
+            print(f"⚠️ Configuración no recargada: {e}")
+            self._config_mtime = config_mtime
+            self._line_config_path, self._line_config_mtime = line_path, line_mtime
+            return False
+
+        self._config_mtime = config_mtime
+        self._config_values = config_values
+        self._line_config_path, self._line_config_mtime = line_path, line_mtime
+        if values == self._applied:
+            return False
+
+        with self._lock:
+            self._pending = values
+        return True
+
+    def apply_pending(self):
+        """
+        Aplica la configuración pendiente al contador (llamar entre frames)
+        Returns: conjunto con los grupos cambiados ("line", "skip"), vacío si no hubo cambios
+        """
+        with self._lock:
+            values, self._pending = self._pending, None
+        if values is None:
+            return set()
+
+        changed = {key for key in values if values[key] != self._applied.get(key)}
+        groups = set()
+        counter = self.counter
+
+        if changed & set(LINE_KEYS):
+            orientation = values["LINE_ORIENTATION"].lower()
+            segment = values.get("DETECTION_LINE_START") is not None and values.get("DETECTION_LINE_END") is not None
+            position = values.get("DETECTION_LINE_X" if orientation == "vertical" else "DETECTION_LINE_Y")
+            ratio = values.get("DETECTION_LINE_RATIO")
+            if not segment:
+                # Sin segmento: se vuelve a la línea X/Y (o ratio, o centro del frame)
+                counter.line_start = None
+                counter.line_end = None
+                counter.detection_line_position = position
+                counter.detection_line_ratio = ratio if position is None else None
+            counter.configure_line(
+                orientation=orientation,
+                position=position,
+                ratio=ratio,
+                line_start=values["DETECTION_LINE_START"] if segment else None,
+                line_end=values["DETECTION_LINE_END"] if segment else None,
+                margin=values.get("LINE_MARGIN"),
+                entrance_direction=values.get("ENTRANCE_DIRECTION"),
+                reset_counts=False
+            )
+            groups.add("line")
+
+        if changed & set(SKIP_KEYS):
+            counter.configure_frame_skipping(
+                enable=values.get("ENABLE_FRAME_SKIPPING"),
+                default_skip=values.get("DEFAULT_FRAME_SKIP"),
+                no_detection_skip=values.get("NO_DETECTION_FRAME_SKIP"),
+                no_detection_threshold=values.get("NO_DETECTION_THRESHOLD"),
+                recovery_threshold=values.get("DETECTION_RECOVERY_THRESHOLD"),
+                show_info=values.get("SHOW_FRAME_SKIP_INFO")
+            )
+            groups.add("skip")
+
+        self._applied = values
+        self.reloads += 1
+        print(f"🔁 Configuración recargada en caliente: {', '.join(sorted(changed))}")
+        return groups
@@ -0,0 +1,199 @@
+import hashlib
+import io
+import json
+import os
+from contextlib import nullcontext, redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+
+CACHE_FORMAT_VERSION = 1
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Hash del contenido del video (identifica el segmento aunque se renombre)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def inference_params(counter):
+    """
+    Parámetros que determinan qué detecciones produce el detector:
+    modelo, confianza, resize/rotación y frame skipping (decide qué frames se procesan).
+    La línea, el margen y la dirección de entrada NO forman parte: se pueden
+    cambiar y recontar con el mismo caché
+    """
+    return {
+        "model": Path(str(counter.model_path)).name,
+        "confidence_threshold": counter.confidence_threshold,
+        "target_width": counter.target_width,
+        "rotation_angle": counter.rotation_angle,
+        "enable_frame_skipping": counter.enable_frame_skipping,
+        "default_frame_skip": counter.default_frame_skip,
+        "no_detection_frame_skip": counter.no_detection_frame_skip,
+        "no_detection_threshold": counter.no_detection_threshold,
+        "detection_recovery_threshold": counter.detection_recovery_threshold,
+    }
+
+
+def cache_key(file_hash, params):
+    payload = json.dumps({"version": CACHE_FORMAT_VERSION, "file": file_hash, "params": params},
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DetectionCacheWriter:
+    """
+    Acumula las detecciones con track de un video y las guarda en un .npz
+
+    Columnas: frame (índice del frame procesado), track_id, box (x1, y1, x2, y2
+    en el frame redimensionado), conf. processed_frames guarda todos los frames
+    que pasaron por el detector, con o sin detecciones.
+    """
+
+    def __init__(self, cache_dir, video_path, params, file_hash=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.video_path = Path(video_path)
+        self.params = params
+        self.file_hash = file_hash or file_sha256(video_path)
+        self.key = cache_key(self.file_hash, params)
+        self.path = self.cache_dir / f"{self.video_path.stem}_{self.key[:16]}.npz"
+
+        self._frames = []
+        self._track_ids = []
+        self._boxes = []
+        self._confidences = []
+        self._processed_frames = []
+
+    def exists(self):
+        return self.path.exists()
+
+    def add(self, frame_index, boxes, track_ids, confidences):
+        """Agrega las detecciones de un frame procesado"""
+        self._processed_frames.append(frame_index)
+        count = len(track_ids)
+        if not count:
+            return
+        self._frames.append(np.full(count, frame_index, dtype=np.int32))
+        self._track_ids.append(np.asarray(track_ids, dtype=np.int32))
+        self._boxes.append(np.asarray(boxes, dtype=np.float32).reshape(-1, 4))
+        self._confidences.append(np.asarray(confidences, dtype=np.float16))
+
+    def save(self, frame_size, fps=0, total_frames=0):
+        """Escribe el caché (temporal + renombrado)"""
+        def concat(parts, dtype, shape=(0,)):
+            return np.concatenate(parts) if parts else np.empty(shape, dtype=dtype)
+
+        meta = {
+            "version": CACHE_FORMAT_VERSION,
+            "video": self.video_path.name,
+            "file_sha256": self.file_hash,
+            "key": self.key,
+            "params": self.params,
+            "frame_size": list(frame_size),
+            "fps": fps,
+            "total_frames": total_frames,
+        }
+
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                frame=concat(self._frames, np.int32),
+                track_id=concat(self._track_ids, np.int32),
+                box=concat(self._boxes, np.float32, (0, 4)),
+                conf=concat(self._confidences, np.float16),
+                processed_frames=np.asarray(self._processed_frames, dtype=np.int32),
+                meta=np.asarray(json.dumps(meta)),
+            )
+        os.replace(tmp_path, self.path)
+        return self.path
+
+
+class CachedSegment:
+    """Detecciones cacheadas de un video (lectura)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with np.load(self.path, allow_pickle=False) as data:
+            self.meta = json.loads(str(data["meta"]))
+            self.frame = data["frame"]
+            self.track_id = data["track_id"]
+            self.box = data["box"]
+            self.conf = data["conf"].astype(np.float32)
+            self.processed_frames = data["processed_frames"]
+
+    @property
+    def video(self):
+        return self.meta["video"]
+
+    @property
+    def frame_size(self):
+        return tuple(self.meta["frame_size"])
+
+    def iter_frames(self):
+        """Detecciones agrupadas por frame procesado: (frame, cajas, ids, confianzas)"""
+        # Las filas están en orden de frame: cortar por los cambios de índice
+        bounds = np.flatnonzero(np.diff(self.frame)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(self.frame)]))
+        for start, end in zip(starts, ends):
+            if end > start:
+                yield (int(self.frame[start]), self.box[start:end],
+                       self.track_id[start:end], self.conf[start:end])
+
+
+def iter_cached_segments(cache_dir, params=None):
+    """
+    Recorre los cachés de detecciones
+    params: si se indica, solo los generados con esos parámetros de inferencia
+    """
+    cache_dir = Path(cache_dir)
+    if not cache_dir.exists():
+        return
+    for path in sorted(cache_dir.glob("*.npz")):
+        try:
+            segment = CachedSegment(path)
+        except Exception as e:
+            print(f"⚠️ Caché de detecciones ilegible {path.name}: {e}")
+            continue
+        if params is not None and segment.meta.get("params") != params:
+            continue
+        yield segment
+
+
+def replay_segment(counter, segment, quiet=True):
+    """
+    Recuenta un segmento cacheado con la configuración de línea actual del
+    contador, sin ejecutar el detector (el contador puede crearse con model_path=None)
+    Devuelve las estadísticas de conteo del segmento
+    """
+    width, height = segment.frame_size
+
+    output = io.StringIO()
+    with redirect_stdout(output) if quiet else nullcontext():
+        counter.reset_counters()
+        counter.set_detection_line(width, height)
+        for frame_index, boxes, track_ids, confidences in segment.iter_frames():
+            counter.count_detections(boxes, track_ids, confidences)
+
+    stats = {
+        "video": segment.video,
+        "frames_procesados": int(len(segment.processed_frames)),
+        "detecciones": int(len(segment.track_id)),
+        "counting_mode": counter.counting_mode,
+        "line_orientation": counter.line_orientation,
+        "detection_line_position": counter.detection_line,
+        "line_margin": counter.line_margin,
+    }
+    if counter.counting_mode == "entrance_exit":
+        stats.update({"entradas": counter.count_entrance, "salidas": counter.count_exit})
+    else:
+        stats.update({"positivos": counter.count_positive, "negativos": counter.count_negative})
+    return stats
+
@@ -0,0 +1,220 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+
+# Columnas de cada evento de cruce (tipo compacto por columna)
+EVENT_COLUMNS = {
+    "timestamp": np.float64,   # Segundos epoch (inicio estimado del video + frame / fps)
+    "frame": np.int32,         # Índice de frame dentro del video
+    "track_id": np.int32,
+    "direction": np.int8,      # +1 positiva (derecha/abajo), -1 negativa (izquierda/arriba)
+    "kind": np.int8,           # +1 entrada, -1 salida, 0 modo direccional
+    "x": np.int16,             # Posición del centro al cruzar (frame redimensionado)
+    "y": np.int16,
+    "video": np.int16,         # Índice en el arreglo 'videos' del chunk
+}
+
+KIND_CODES = {"entrada": 1, "salida": -1, None: 0}
+
+
+class CrossingEventLog:
+    """
+    Registro de eventos de cruce en chunks columnares (.npz) por día
+
+    record() solo agrega a un búfer en memoria; al llegar a flush_every eventos
+    (o al terminar cada video, o al cambiar de día) el búfer se escribe como un
+    chunk comprimido en events_dir/AAAA-MM-DD/. Cada chunk se escribe en un
+    temporal y se renombra, así un lector nunca ve un archivo a medias.
+    """
+
+    def __init__(self, events_dir="stats/events", camera_id="camara_1", flush_every=1024):
+        self.events_dir = Path(events_dir)
+        self.events_dir.mkdir(parents=True, exist_ok=True)
+        self.camera_id = camera_id
+        self.flush_every = flush_every
+
+        self._lock = threading.Lock()
+        self._rows = []
+        self._videos = []          # Nombres de video del chunk en curso
+        self._day = None
+        self._chunk_sequence = 0
+
+        # Fuente actual (se fija por video con begin_video)
+        self._video_name = None
+        self._video_start = None
+        self._fps = 0
+
+        # Estadísticas
+        self.events_recorded = 0
+        self.chunks_written = 0
+
+    def begin_video(self, video_name, start_timestamp=None, fps=0):
+        """
+        Fija el video del que provienen los próximos eventos
+        start_timestamp: instante (epoch) del primer frame; None = hora de proceso
+        """
+        with self._lock:
+            self._video_name = video_name
+            self._video_start = start_timestamp
+            self._fps = fps
+
+    def record(self, frame_index, track_id, direction, kind=None, position=(0, 0)):
+        """Agrega un cruce al búfer (sin E/S salvo que toque escribir un chunk)"""
+        if self._video_start is not None and self._fps > 0:
+            timestamp = self._video_start + frame_index / self._fps
+        else:
+            timestamp = time.time()
+
+        day = datetime.fromtimestamp(timestamp).date()
+        with self._lock:
+            if self._day is not None and day != self._day and self._rows:
+                self._flush_locked()
+            self._day = day
+            video_index = -1
+            if self._video_name is not None:
+                if self._video_name not in self._videos:
+                    self._videos.append(self._video_name)
+                video_index = self._videos.index(self._video_name)
+            self._rows.append((timestamp, frame_index, track_id,
+                               1 if direction == "positive" else -1,
+                               KIND_CODES.get(kind, 0),
+                               position[0], position[1],
+                               video_index))
+            self.events_recorded += 1
+            if len(self._rows) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        """Escribe los eventos pendientes como un chunk"""
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._rows:
+            return None
+
+        columns = list(zip(*self._rows))
+        arrays = {name: np.asarray(values, dtype=dtype)
+                  for (name, dtype), values in zip(EVENT_COLUMNS.items(), columns)}
+        arrays["videos"] = np.asarray(self._videos if self._videos else [""])
+
+        day_dir = self.events_dir / self._day.isoformat()
+        day_dir.mkdir(parents=True, exist_ok=True)
+        first = datetime.fromtimestamp(arrays["timestamp"][0])
+        self._chunk_sequence += 1
+        path = day_dir / f"{self.camera_id}_{first:%H%M%S}_{os.getpid()}_{self._chunk_sequence:05d}.npz"
+
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        self._rows = []
+        self._videos = []
+        self.chunks_written += 1
+        return path
+
+
+def iter_event_chunks(events_dir="stats/events", start=None, end=None, camera=None):
+    """
+    Recorre los chunks de eventos (dict de columnas) de los días en [start, end]
+    Solo se abren los directorios de los días pedidos
+    """
+    events_dir = Path(events_dir)
+    if not events_dir.exists():
+        return
+
+    first_day = start.date() if start is not None else None
+    last_day = end.date() if end is not None else None
+
+    for day_dir in sorted(p for p in events_dir.iterdir() if p.is_dir()):
+        try:
+            day = datetime.strptime(day_dir.name, "%Y-%m-%d").date()
+        except ValueError:
+            continue
+        if (first_day and day < first_day) or (last_day and day > last_day):
+            continue
+
+        pattern = f"{camera}_*.npz" if camera else "*.npz"
+        for chunk_path in sorted(day_dir.glob(pattern)):
+            try:
+                with np.load(chunk_path, allow_pickle=False) as chunk:
+                    yield {name: chunk[name] for name in chunk.files}
+            except Exception as e:
+                print(f"⚠️ Chunk de eventos ilegible {chunk_path.name}: {e}")
+
+
+def load_events(events_dir="stats/events", start=None, end=None, camera=None):
+    """Concatena los eventos del rango en un dict de columnas numpy"""
+    parts = {name: [] for name in EVENT_COLUMNS}
+    parts["video_name"] = []
+
+    for chunk in iter_event_chunks(events_dir, start, end, camera):
+        for name in EVENT_COLUMNS:
+            parts[name].append(chunk[name])
+        parts["video_name"].append(chunk["videos"][np.maximum(chunk["video"], 0)])
+
+    events = {name: (np.concatenate(values) if values else
+                     np.empty(0, dtype=EVENT_COLUMNS.get(name, np.str_)))
+              for name, values in parts.items()}
+
+    if start is not None or end is not None:
+        timestamps = events["timestamp"]
+        keep = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            keep &= timestamps >= start.timestamp()
+        if end is not None:
+            keep &= timestamps < end.timestamp()
+        events = {name: values[keep] for name, values in events.items()}
+
+    return events
+
+
+def aggregate_events(events, bucket_seconds=3600):
+    """
+    Re-agrega eventos a cualquier granularidad (segundos) con operaciones vectorizadas
+    Devuelve lista de dicts con inicio del intervalo y conteos por tipo
+    """
+    timestamps = events["timestamp"]
+    if len(timestamps) == 0:
+        return []
+
+    # Intervalos alineados a la hora local (como los acumulados por minuto/hora/día)
+    # El desfase UTC se calcula por minuto (los cambios de horario caen en minuto
+    # exacto) y se difunde a cada evento, así un rango con cambio de horario no
+    # desplaza los intervalos posteriores
+    minutes = np.floor(timestamps / 60).astype(np.int64)
+    unique_minutes, minute_index = np.unique(minutes, return_inverse=True)
+    minute_offsets = np.array([
+        (datetime.fromtimestamp(int(minute) * 60).astimezone().utcoffset() or timedelta(0)).total_seconds()
+        for minute in unique_minutes
+    ])
+    offsets = minute_offsets[minute_index]
+    buckets = np.floor((timestamps + offsets) / bucket_seconds).astype(np.int64)
+    unique_buckets, inverse = np.unique(buckets, return_inverse=True)
+    n = len(unique_buckets)
+
+    kind = events["kind"]
+    direction = events["direction"]
+    counts = {
+        "eventos": np.bincount(inverse, minlength=n),
+        "entradas": np.bincount(inverse, weights=(kind == 1), minlength=n),
+        "salidas": np.bincount(inverse, weights=(kind == -1), minlength=n),
+        "direccion_positiva": np.bincount(inverse, weights=(kind == 0) & (direction == 1), minlength=n),
+        "direccion_negativa": np.bincount(inverse, weights=(kind == 0) & (direction == -1), minlength=n),
+    }
+
+    rows = []
+    for i, bucket in enumerate(unique_buckets):
+        start = datetime(1970, 1, 1) + timedelta(seconds=int(bucket * bucket_seconds))
+        row = {"inicio": start.isoformat(timespec="seconds")}
+        row.update({name: int(values[i]) for name, values in counts.items()})
+        rows.append(row)
+    return rows
@@ -1,13 +1,26 @@
 import cv2
 import numpy as np
+import time
 from datetime import datetime
 from collections import defaultdict, deque
 from ultralytics import YOLO
+from annotation_overlay import OverlayLayer, TextPanel
+from stage_timer import StageTimer
 # Suprimir COMPLETAMENTE el output de YOLO
 import io
 import sys
 from contextlib import redirect_stdout, redirect_stderr
 
+class SkippedResult:
+    """Resultado vacío de un frame sin detección: plot() devuelve el frame tal cual"""
+    
+    def __init__(self, frame):
+        self.frame = frame
+    
+    def plot(self):
+        return self.frame
+
+
 class FlexiblePersonCounter:
     """
     Contador de personas que soporta líneas horizontales y verticales
@@ -18,11 +31,17 @@ class FlexiblePersonCounter:
     def __init__(self, model_path="yolo11n.pt", target_width=640, rotation_angle=0,
                  line_orientation="vertical", detection_line_position=None, 
                  detection_line_ratio=None, line_margin=30,
-                 entrance_direction="positive", counting_mode="entrance_exit"):
-        
-        print("🤖 Cargando modelo YOLOv11...")
-        self.model = YOLO(model_path)
-        print("✅ Modelo YOLOv11 cargado exitosamente")
+                 entrance_direction="positive", counting_mode="entrance_exit",
+                 line_start=None, line_end=None):
+        
+        # model_path=None: contador sin detector (p. ej. para recontar detecciones cacheadas)
+        self.model_path = model_path
+        self.model = None
+        if model_path is not None:
+            print("🤖 Cargando modelo YOLOv11...")
+            self.model = YOLO(model_path)
+            print("✅ Modelo YOLOv11 cargado exitosamente")
+        self.confidence_threshold = 0.5
         
         # Configuración de resize y rotación
         self.target_width = target_width
@@ -38,10 +57,29 @@ class FlexiblePersonCounter:
         self.line_margin = line_margin
         self.detection_line = None
         
+        # Segmento exacto dibujado en el calibrador (CALIBRATION_LINE_START/END)
+        # Si no se define, la línea X/Y se convierte en un segmento que cruza todo el frame
+        self.line_start = tuple(line_start) if line_start is not None else None
+        self.line_end = tuple(line_end) if line_end is not None else None
+        self.line_segment = None
+        self._line_origin = None
+        self._line_vector = None
+        self._line_normal = None
+        
+        # Caché de anotaciones: capa estática + paneles de texto
+        self._static_overlay = None
+        self._static_overlay_key_cache = None
+        self._text_panels = {name: TextPanel() for name in ("counters", "skip", "info")}
+        
         # Configuración del conteo
         self.tracks = defaultdict(lambda: deque(maxlen=30))
         self.counted_ids = set()
         self.direction_threshold = 50
+        self.last_crossings = []  # Cruces del último frame: (track_id, dirección, tipo, (x, y))
+        self.last_detections = None  # Detecciones del último frame procesado: (cajas, ids, confianzas)
+        
+        # Tiempos por etapa (rotación, resize, detección, conteo, anotaciones); se reinician por video
+        self.stage_timer = StageTimer()
         
         # Configuración semántica
         self.entrance_direction = entrance_direction.lower()  # "positive" o "negative"
@@ -56,7 +94,8 @@ class FlexiblePersonCounter:
             self.count_negative = 0  # Izquierda/Arriba
         
         # Información de configuración
-        self.line_calibrated = detection_line_position is not None or detection_line_ratio is not None
+        self.line_calibrated = (detection_line_position is not None or detection_line_ratio is not None
+                                or self.has_line_segment())
         
         # =====================================================================
         # NUEVA FUNCIONALIDAD: FRAME SKIPPING DINÁMICO
@@ -191,6 +230,30 @@ class FlexiblePersonCounter:
            if self.show_frame_skip_info:
                print(f"🔄 Cambio de modo: {previous_mode} → {self.skip_mode} (skip: {previous_skip} → {self.current_frame_skip})")
     
+    def configure_frame_skipping(self, enable=None, default_skip=None, no_detection_skip=None,
+                                 no_detection_threshold=None, recovery_threshold=None, show_info=None):
+        """
+        Cambia los parámetros de frame skipping en caliente (sin reiniciar estadísticas)
+        El skip actual se ajusta al valor del modo en curso
+        """
+        if enable is not None:
+            self.enable_frame_skipping = enable
+        if default_skip is not None:
+            self.default_frame_skip = default_skip
+        if no_detection_skip is not None:
+            self.no_detection_frame_skip = no_detection_skip
+        if no_detection_threshold is not None:
+            self.no_detection_threshold = no_detection_threshold
+        if recovery_threshold is not None:
+            self.detection_recovery_threshold = recovery_threshold
+        if show_info is not None:
+            self.show_frame_skip_info = show_info
+        
+        if self.enable_frame_skipping:
+            self.validate_frame_skip_config()
+        self.current_frame_skip = (self.no_detection_frame_skip if self.skip_mode == "no_detection"
+                                   else self.default_frame_skip)
+    
     def get_frame_skip_stats(self):
         """Obtiene estadísticas del frame skipping"""
         total_frames = self.total_frames_processed + self.total_frames_skipped
@@ -241,6 +304,37 @@ class FlexiblePersonCounter:
         
         return cv2.resize(frame, (self.target_width, self.target_height))
     
+    def has_line_segment(self):
+        """Indica si se configuró el segmento exacto dibujado en el calibrador"""
+        return self.line_start is not None and self.line_end is not None
+    
+    def _orient_segment(self, start, end):
+        """
+        Ordena los extremos del segmento para que el lado POSITIVO de la línea
+        sea ABAJO (línea horizontal) o DERECHA (línea vertical), igual que con X/Y
+        """
+        (x1, y1), (x2, y2) = start, end
+        # Normal del segmento A→B: (-dy, dx)
+        normal_x, normal_y = -(y2 - y1), x2 - x1
+        if self.line_orientation == "vertical" and normal_x < 0:
+            return end, start
+        if self.line_orientation == "horizontal" and normal_y < 0:
+            return end, start
+        return start, end
+    
+    def _set_line_segment(self, start, end):
+        """Precalcula la geometría del segmento usada en las pruebas de cruce"""
+        start = (int(start[0]), int(start[1]))
+        end = (int(end[0]), int(end[1]))
+        self.line_segment = (start, end)
+        self._line_origin = np.array(start, dtype=np.float32)
+        self._line_vector = np.array(end, dtype=np.float32) - self._line_origin
+        length = float(np.hypot(self._line_vector[0], self._line_vector[1]))
+        if length == 0:
+            length = 1.0
+        # Normal unitaria: la distancia con signo queda en píxeles
+        self._line_normal = np.array([-self._line_vector[1], self._line_vector[0]], dtype=np.float32) / length
+    
     def set_detection_line(self, frame_width, frame_height):
         """Establece la línea de detección según orientación"""
         if self.line_orientation == "vertical":
@@ -254,6 +348,15 @@ class FlexiblePersonCounter:
             default_position = frame_height // 2
             line_type = "horizontal (Y)"
         
+        if self.has_line_segment():
+            start, end = self._orient_segment(self.line_start, self.line_end)
+            self._set_line_segment(start, end)
+            # Posición de referencia (centro del segmento) para logs y estadísticas
+            axis = 0 if self.line_orientation == "vertical" else 1
+            self.detection_line = int((start[axis] + end[axis]) / 2)
+            print(f"📏 Línea {line_type} por segmento calibrado: {self.line_segment[0]} → {self.line_segment[1]}")
+            return
+        
         if self.detection_line_position is not None:
             self.detection_line = self.detection_line_position
             print(f"📏 Línea {line_type} fija en {self.detection_line}")
@@ -270,56 +373,108 @@ class FlexiblePersonCounter:
         elif self.detection_line >= reference_dimension:
             self.detection_line = reference_dimension - 1
         
-        print(f"📏 Línea de detección establecida: {line_type} = {self.detection_line}")
-    
-    def crossed_line(self, track_id, current_pos):
-        """Verifica si la persona cruzó la línea - LÓGICA SIMPLIFICADA"""
-        if not self.detection_line or len(self.tracks[track_id]) < 5:  # Mínimo 5 puntos
-            return False
+        # La línea X/Y es un segmento que atraviesa todo el frame
+        if self.line_orientation == "vertical":
+            self._set_line_segment((self.detection_line, frame_height), (self.detection_line, 0))
+        else:
+            self._set_line_segment((0, self.detection_line), (frame_width, self.detection_line))
         
-        positions = list(self.tracks[track_id])
+        print(f"📏 Línea de detección establecida: {line_type} = {self.detection_line}")
+
+    def configure_line(self, orientation=None, position=None, margin=None,
+                       line_start=None, line_end=None, entrance_direction=None,
+                       ratio=None, reset_counts=True):
+        """
+        Cambia la configuración de la línea en caliente (calibración en vivo,
+        recarga de configuración). Se conservan los tracks: las trayectorias
+        siguen siendo válidas con la nueva línea
+        line_start/line_end: segmento dibujado; position o ratio: línea X/Y (descarta el segmento)
+        reset_counts: reiniciar los contadores (los cruces de la línea anterior no aplican);
+                      con False se siguen acumulando y los tracks ya contados no se recuentan
+        """
+        if orientation is not None:
+            self.line_orientation = orientation.lower()
+        if line_start is not None and line_end is not None:
+            self.line_start = tuple(line_start)
+            self.line_end = tuple(line_end)
+        elif position is not None or ratio is not None:
+            self.line_start = None
+            self.line_end = None
+            self.detection_line_position = int(position) if position is not None else None
+            self.detection_line_ratio = ratio if position is None else None
+        if margin is not None:
+            self.line_margin = margin
+        if entrance_direction is not None:
+            self.entrance_direction = entrance_direction.lower()
+        self.line_calibrated = True
+
+        if reset_counts:
+            if self.counting_mode == "entrance_exit":
+                self.count_entrance = 0
+                self.count_exit = 0
+            else:
+                self.count_positive = 0
+                self.count_negative = 0
+            self.counted_ids.clear()
+
+        # Recalcular la geometría si ya se conoce la resolución
+        if self.target_height is not None:
+            self.set_detection_line(self.target_width, self.target_height)
+        else:
+            self.detection_line = None
+
+    def detect_crossings(self, track_ids):
+        """
+        Evalúa el cruce de la línea para varios tracks a la vez (vectorizado)
         
-        # Obtener posiciones de inicio y final del trayecto
-        start_pos = positions[0]
-        end_pos = positions[-1]
+        Un track cruza si el inicio y el final de su trayecto están a lados opuestos
+        de la línea, fuera del margen, y el movimiento corta el segmento finito.
+        Returns: dict {track_id: "positive" | "negative"}
+        """
+        if self.line_segment is None:
+            return {}
         
-        line_before = self.detection_line - self.line_margin
-        line_after = self.detection_line + self.line_margin
+        candidates = [track_id for track_id in track_ids
+                      if track_id not in self.counted_ids and len(self.tracks[track_id]) >= 5]  # Mínimo 5 puntos
+        if not candidates:
+            return {}
         
-        # NUEVA LÓGICA: ¿Cruzó completamente la zona?
-        crossed_positive = start_pos < line_before and end_pos > line_after
-        crossed_negative = start_pos > line_after and end_pos < line_before
+        starts = np.array([self.tracks[track_id][0] for track_id in candidates], dtype=np.float32)
+        ends = np.array([self.tracks[track_id][-1] for track_id in candidates], dtype=np.float32)
         
-        if crossed_positive or crossed_negative:
-            direction_name = ""
-            if crossed_positive:
-                direction_name = "ABAJO" if self.line_orientation == "horizontal" else "DERECHA"
-            else:
-                direction_name = "ARRIBA" if self.line_orientation == "horizontal" else "IZQUIERDA"
-            
-            if self.show_frame_skip_info:
-                print(f"   ✅ ¡CRUCE COMPLETO! ID {track_id} hacia {direction_name}")
-            return True
+        # Distancia con signo a la línea (positiva = abajo/derecha)
+        start_side = (starts - self._line_origin) @ self._line_normal
+        end_side = (ends - self._line_origin) @ self._line_normal
         
-        return False
-    
-    def get_direction(self, track_id, current_pos):
-        """Determina la dirección usando TODO el trayecto"""
-        if len(self.tracks[track_id]) < 5:
-            return None
+        crossed_positive = (start_side < -self.line_margin) & (end_side > self.line_margin)
+        crossed_negative = (start_side > self.line_margin) & (end_side < -self.line_margin)
         
-        positions = list(self.tracks[track_id])
-        start_pos = positions[0]
-        end_pos = positions[-1]
+        # Intersección con el segmento finito: parámetro t del cruce sobre A→B
+        movement = ends - starts
+        relative = starts - self._line_origin
+        denominator = self._line_vector[0] * movement[:, 1] - self._line_vector[1] * movement[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (relative[:, 0] * movement[:, 1] - relative[:, 1] * movement[:, 0]) / denominator
+        within_segment = (t >= 0) & (t <= 1)
         
-        # Calcular movimiento total
-        total_movement = end_pos - start_pos
+        # Movimiento mínimo perpendicular a la línea
+        enough_movement = np.abs(end_side - start_side) >= self.direction_threshold
         
-        if abs(total_movement) < self.direction_threshold:
-            return None
+        crossed = (crossed_positive | crossed_negative) & within_segment & enough_movement
         
-        direction = "positive" if total_movement > 0 else "negative"
-        return direction
+        return {
+            track_id: "positive" if positive else "negative"
+            for track_id, has_crossed, positive in zip(candidates, crossed, crossed_positive)
+            if has_crossed
+        }
+    
+    def crossed_line(self, track_id, current_pos=None):
+        """Verifica si la persona cruzó la línea"""
+        return track_id in self.detect_crossings([track_id])
+    
+    def get_direction(self, track_id, current_pos=None):
+        """Determina la dirección del cruce usando TODO el trayecto"""
+        return self.detect_crossings([track_id]).get(track_id)
     # NUEVA FUNCIÓN: Validar configuración de frame skipping
     def validate_frame_skip_config(self):
         """
@@ -342,29 +497,51 @@ class FlexiblePersonCounter:
             print(f"⚠️ ADVERTENCIA: NO_DETECTION_THRESHOLD muy bajo ({self.no_detection_threshold}) - cambios de modo muy frecuentes")
         
         print(f"✅ Configuración de frame skipping validada")
-    def process_frame(self, frame):
-        """
-        Procesa un frame para detectar y contar personas - CON FRAME SKIPPING CORREGIDO
-        """
-        # NUEVA LÓGICA: Siempre rotar y redimensionar para mantener consistencia visual
+    def prepare_frame(self, frame):
+        """Rota y redimensiona un frame decodificado (fija la línea con el primer frame)"""
+        timer = self.stage_timer
+        stage_start = time.perf_counter()
         rotated_frame = self.rotate_frame(frame)
+        rotated_time = time.perf_counter()
         resized_frame = self.resize_frame(rotated_frame)
-        h, w = resized_frame.shape[:2]
+        resized_time = time.perf_counter()
+        timer.add("rotacion", rotated_time - stage_start)
+        timer.add("redimension", resized_time - rotated_time)
         
         if self.detection_line is None:
+            h, w = resized_frame.shape[:2]
             self.set_detection_line(w, h)
+        return resized_frame
+    
+    def skip_frame(self):
+        """
+        Registra un frame saltado sin recibirlo: para quien decide con
+        should_process_frame() antes de decodificar (solo grab() del video)
+        """
+        self.last_crossings = []
+        self.last_detections = None
+        self.update_frame_skip_mode(has_detections=False)
+    
+    def process_frame(self, frame, skip_checked=False):
+        """
+        Procesa un frame para detectar y contar personas - CON FRAME SKIPPING CORREGIDO
+        skip_checked: el llamador ya llamó a should_process_frame() y dio True
+        (decidió antes de decodificar): se detecta sin volver a preguntar
+        """
+        timer = self.stage_timer
+        
+        # NUEVA LÓGICA: Siempre rotar y redimensionar para mantener consistencia visual
+        resized_frame = self.prepare_frame(frame)
+        self.last_crossings = []
+        self.last_detections = None
         
         # AHORA verificar si se debe procesar este frame para detección
-        if not self.should_process_frame():
+        if not skip_checked and not self.should_process_frame():
             # Frame saltado - actualizar modo sin detecciones y devolver frame básico
             self.update_frame_skip_mode(has_detections=False)
             
             # Crear resultado vacío pero mantener frame visual
-            class SkippedResult:
-                def plot(self):
-                    return resized_frame
-            
-            return SkippedResult(), resized_frame
+            return SkippedResult(resized_frame), resized_frame
         
         # FRAME A PROCESAR - hacer detección completa
         # Suprimir output de YOLO
@@ -373,96 +550,123 @@ class FlexiblePersonCounter:
         from contextlib import redirect_stdout, redirect_stderr
         
         f = io.StringIO()
+        stage_start = time.perf_counter()
         with redirect_stdout(f), redirect_stderr(f):
-            results = self.model.track(resized_frame, persist=True, classes=[0], conf=0.5, verbose=False)
-        
-        has_detections = False
+            results = self.model.track(resized_frame, persist=True, classes=[0],
+                                       conf=self.confidence_threshold, verbose=False)
+        inference_time = time.perf_counter()
+        timer.add("deteccion_tracking", inference_time - stage_start)
         
         # Procesar detecciones si existen
         if results[0].boxes is not None and results[0].boxes.id is not None:
             boxes = results[0].boxes.xyxy.cpu().numpy()
             track_ids = results[0].boxes.id.cpu().numpy().astype(int)
             confidences = results[0].boxes.conf.cpu().numpy()
-            
-            valid_detections = sum(1 for conf in confidences if conf >= 0.5)
-            has_detections = valid_detections > 0
-            
-            if has_detections and self.show_frame_skip_info:
-                print(f"👥 {valid_detections} personas detectadas (Frame #{self.frame_counter})")
-            
-            for box, track_id, conf in zip(boxes, track_ids, confidences):
-                if conf < 0.5:
-                    continue
-                
-                x1, y1, x2, y2 = box
-                center_x = int((x1 + x2) / 2)
-                center_y = int((y1 + y2) / 2)
-                
-                if self.line_orientation == "vertical":
-                    tracking_coord = center_x
-                    movement_axis = "horizontal"
-                else:
-                    tracking_coord = center_y
-                    movement_axis = "vertical"
-                
-                self.tracks[track_id].append(tracking_coord)
-                
-                if track_id not in self.counted_ids and self.crossed_line(track_id, tracking_coord):
-                    direction = self.get_direction(track_id, tracking_coord)
-                    
-                    if direction:
-                        self.counted_ids.add(track_id)
-                        
-                        if self.counting_mode == "entrance_exit":
-                            if direction == self.entrance_direction:
-                                self.count_entrance += 1
-                                arrow = "⬇️" if movement_axis == "vertical" else "➡️"
-                                print(f"🚪{arrow} Persona #{track_id} ENTRÓ (Total entradas: {self.count_entrance})")
-                            else:
-                                self.count_exit += 1
-                                arrow = "⬆️" if movement_axis == "vertical" else "⬅️"
-                                print(f"🚪{arrow} Persona #{track_id} SALIÓ (Total salidas: {self.count_exit})")
-                        else:
-                            if direction == "positive":
-                                self.count_positive += 1
-                                arrow = "⬇️" if movement_axis == "vertical" else "➡️"
-                                direction_name = "ABAJO" if movement_axis == "vertical" else "DERECHA"
-                                print(f"{arrow} Persona #{track_id} fue hacia {direction_name} (Total: {self.count_positive})")
-                            else:
-                                self.count_negative += 1
-                                arrow = "⬆️" if movement_axis == "vertical" else "⬅️"
-                                direction_name = "ARRIBA" if movement_axis == "vertical" else "IZQUIERDA"
-                                print(f"{arrow} Persona #{track_id} fue hacia {direction_name} (Total: {self.count_negative})")
+        else:
+            boxes = np.empty((0, 4), dtype=np.float32)
+            track_ids = np.empty(0, dtype=int)
+            confidences = np.empty(0, dtype=np.float32)
+        
+        self.last_detections = (boxes, track_ids, confidences)
+        has_detections = self.count_detections(boxes, track_ids, confidences)
+        timer.add("conteo", time.perf_counter() - inference_time)
         
         # Actualizar modo de frame skipping
         self.update_frame_skip_mode(has_detections=has_detections)
         
         return results[0], resized_frame
     
-    def draw_annotations(self, frame, results):
-        """Dibuja las anotaciones en el frame - INCLUYENDO INFO DE FRAME SKIPPING"""
-        annotated_frame = results.plot()
-        h, w = annotated_frame.shape[:2]
+    def count_detections(self, boxes, track_ids, confidences):
+        """
+        Actualiza tracks y contadores con las detecciones de un frame
+        Es la parte del conteo que no depende del detector: también se usa para
+        recontar detecciones cacheadas con otra configuración de línea
+        Returns: True si hubo detecciones válidas
+        """
+        if len(track_ids) == 0:
+            return False
         
-        if self.detection_line:
-            # Dibujar línea según orientación
-            if self.line_orientation == "vertical":
-                # Línea vertical
-                cv2.line(annotated_frame, 
-                        (self.detection_line, 0), 
-                        (self.detection_line, h), 
-                        (0, 255, 255), 5)
-                
-                # Líneas de margen
-                cv2.line(annotated_frame, 
-                        (self.detection_line - self.line_margin, 0), 
-                        (self.detection_line - self.line_margin, h), 
-                        (0, 255, 255), 2)
-                cv2.line(annotated_frame, 
-                        (self.detection_line + self.line_margin, 0), 
-                        (self.detection_line + self.line_margin, h), 
+        valid_detections = sum(1 for conf in confidences if conf >= self.confidence_threshold)
+        has_detections = valid_detections > 0
+        
+        if has_detections and self.show_frame_skip_info:
+            print(f"👥 {valid_detections} personas detectadas (Frame #{self.frame_counter})")
+        
+        movement_axis = "horizontal" if self.line_orientation == "vertical" else "vertical"
+        updated_ids = []
+        
+        for box, track_id, conf in zip(boxes, track_ids, confidences):
+            if conf < self.confidence_threshold:
+                continue
+            
+            x1, y1, x2, y2 = box
+            center_x = int((x1 + x2) / 2)
+            center_y = int((y1 + y2) / 2)
+            
+            track_id = int(track_id)
+            self.tracks[track_id].append((center_x, center_y))
+            updated_ids.append(track_id)
+        
+        # Pruebas de cruce para todos los tracks actualizados a la vez
+        crossings = self.detect_crossings(updated_ids)
+        
+        for track_id, direction in crossings.items():
+            if self.show_frame_skip_info:
+                if direction == "positive":
+                    direction_name = "ABAJO" if self.line_orientation == "horizontal" else "DERECHA"
+                else:
+                    direction_name = "ARRIBA" if self.line_orientation == "horizontal" else "IZQUIERDA"
+                print(f"   ✅ ¡CRUCE COMPLETO! ID {track_id} hacia {direction_name}")
+            
+            self.counted_ids.add(track_id)
+            
+            kind = None
+            if self.counting_mode == "entrance_exit":
+                kind = "entrada" if direction == self.entrance_direction else "salida"
+            self.last_crossings.append((track_id, direction, kind, self.tracks[track_id][-1]))
+            
+            if self.counting_mode == "entrance_exit":
+                if direction == self.entrance_direction:
+                    self.count_entrance += 1
+                    arrow = "⬇️" if movement_axis == "vertical" else "➡️"
+                    print(f"🚪{arrow} Persona #{track_id} ENTRÓ (Total entradas: {self.count_entrance})")
+                else:
+                    self.count_exit += 1
+                    arrow = "⬆️" if movement_axis == "vertical" else "⬅️"
+                    print(f"🚪{arrow} Persona #{track_id} SALIÓ (Total salidas: {self.count_exit})")
+            else:
+                if direction == "positive":
+                    self.count_positive += 1
+                    arrow = "⬇️" if movement_axis == "vertical" else "➡️"
+                    direction_name = "ABAJO" if movement_axis == "vertical" else "DERECHA"
+                    print(f"{arrow} Persona #{track_id} fue hacia {direction_name} (Total: {self.count_positive})")
+                else:
+                    self.count_negative += 1
+                    arrow = "⬆️" if movement_axis == "vertical" else "⬅️"
+                    direction_name = "ARRIBA" if movement_axis == "vertical" else "IZQUIERDA"
+                    print(f"{arrow} Persona #{track_id} fue hacia {direction_name} (Total: {self.count_negative})")
+        
+        return has_detections
+    
+    def _draw_static_annotations(self, canvas):
+        """Dibuja los elementos constantes de la sesión: línea, márgenes, flechas y etiquetas"""
+        h, w = canvas.shape[:2]
+        
+        if self.line_segment is not None:
+            # Dibujar el segmento de detección (línea X/Y o segmento calibrado)
+            start, end = self.line_segment
+            cv2.line(canvas, start, end, (0, 255, 255), 5)
+            
+            # Líneas de margen: paralelas a ±margen sobre la normal
+            offset_x = int(round(self._line_normal[0] * self.line_margin))
+            offset_y = int(round(self._line_normal[1] * self.line_margin))
+            for sign in (-1, 1):
+                cv2.line(canvas, 
+                        (start[0] + sign * offset_x, start[1] + sign * offset_y), 
+                        (end[0] + sign * offset_x, end[1] + sign * offset_y), 
                         (0, 255, 255), 2)
-                
+            
+            if self.line_orientation == "vertical":
                 # Indicadores de dirección para entrada/salida
                 if self.counting_mode == "entrance_exit":
                     if self.entrance_direction == "positive":
@@ -474,33 +678,17 @@ class FlexiblePersonCounter:
                         entrance_arrow = (entrance_x + 20, h//2), (entrance_x - 20, h//2)
                         exit_arrow = (exit_x - 20, h//2), (exit_x + 20, h//2)
                     
-                    cv2.putText(annotated_frame, "ENTRADA", (entrance_x - 30, h//2 - 20), 
+                    cv2.putText(canvas, "ENTRADA", (entrance_x - 30, h//2 - 20), 
                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                    cv2.arrowedLine(annotated_frame, entrance_arrow[0], entrance_arrow[1], 
+                    cv2.arrowedLine(canvas, entrance_arrow[0], entrance_arrow[1], 
                                    (0, 255, 0), 3, tipLength=0.3)
                     
-                    cv2.putText(annotated_frame, "SALIDA", (exit_x - 25, h//2 - 20), 
+                    cv2.putText(canvas, "SALIDA", (exit_x - 25, h//2 - 20), 
                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-                    cv2.arrowedLine(annotated_frame, exit_arrow[0], exit_arrow[1], 
+                    cv2.arrowedLine(canvas, exit_arrow[0], exit_arrow[1], 
                                    (0, 0, 255), 3, tipLength=0.3)
             
             else:
-                # Línea horizontal
-                cv2.line(annotated_frame, 
-                        (0, self.detection_line), 
-                        (w, self.detection_line), 
-                        (0, 255, 255), 5)
-                
-                # Líneas de margen
-                cv2.line(annotated_frame, 
-                        (0, self.detection_line - self.line_margin), 
-                        (w, self.detection_line - self.line_margin), 
-                        (0, 255, 255), 2)
-                cv2.line(annotated_frame, 
-                        (0, self.detection_line + self.line_margin), 
-                        (w, self.detection_line + self.line_margin), 
-                        (0, 255, 255), 2)
-                
                 # Indicadores de dirección para entrada/salida
                 if self.counting_mode == "entrance_exit":
                     if self.entrance_direction == "positive":
@@ -512,88 +700,85 @@ class FlexiblePersonCounter:
                         entrance_arrow = (w//2, entrance_y + 20), (w//2, entrance_y - 20)
                         exit_arrow = (w//2, exit_y - 20), (w//2, exit_y + 20)
                     
-                    cv2.putText(annotated_frame, "ENTRADA", (w//2 - 40, entrance_y), 
+                    cv2.putText(canvas, "ENTRADA", (w//2 - 40, entrance_y), 
                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                    cv2.arrowedLine(annotated_frame, entrance_arrow[0], entrance_arrow[1], 
+                    cv2.arrowedLine(canvas, entrance_arrow[0], entrance_arrow[1], 
                                    (0, 255, 0), 3, tipLength=0.3)
                     
-                    cv2.putText(annotated_frame, "SALIDA", (w//2 - 35, exit_y), 
+                    cv2.putText(canvas, "SALIDA", (w//2 - 35, exit_y), 
                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-                    cv2.arrowedLine(annotated_frame, exit_arrow[0], exit_arrow[1], 
+                    cv2.arrowedLine(canvas, exit_arrow[0], exit_arrow[1], 
                                    (0, 0, 255), 3, tipLength=0.3)
             
             # Texto de la línea
             line_text = f"LINEA {self.line_orientation.upper()}"
+            if self.has_line_segment():
+                line_text += " SEGMENTO"
             if self.line_calibrated:
                 line_text += " (CALIBRADA)"
-            cv2.putText(annotated_frame, line_text, 
+            cv2.putText(canvas, line_text, 
                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        
-        # Función para texto con fondo
-        def draw_text_with_background(img, text, position, font, scale, color, thickness, bg_color):
-            (text_width, text_height), baseline = cv2.getTextSize(text, font, scale, thickness)
-            cv2.rectangle(img, 
-                         (position[0], position[1] - text_height - 10),
-                         (position[0] + text_width + 10, position[1] + baseline),
-                         bg_color, -1)
-            cv2.putText(img, text, position, font, scale, color, thickness)
-        
-        font = cv2.FONT_HERSHEY_SIMPLEX
+    
+    def _static_overlay_key(self, width, height):
+        """Todo lo que determina la capa estática (resolución y configuración de línea)"""
+        return (width, height, self.line_segment, self.line_margin, self.line_orientation,
+                self.counting_mode, self.entrance_direction, self.line_calibrated,
+                self.has_line_segment())
+    
+    def _get_static_overlay(self, width, height):
+        """Devuelve la capa estática, renderizándola solo si cambió la resolución o la línea"""
+        key = self._static_overlay_key(width, height)
+        if self._static_overlay is None or self._static_overlay_key_cache != key:
+            self._static_overlay = OverlayLayer.render(width, height, self._draw_static_annotations)
+            self._static_overlay_key_cache = key
+        return self._static_overlay
+    
+    def _counter_panel_items(self):
+        """Textos del panel de contadores"""
         font_scale = 0.8
         thickness = 2
         
-        # Contadores
         if self.counting_mode == "entrance_exit":
-            draw_text_with_background(annotated_frame, f"ENTRADAS: {self.count_entrance}", 
-                                    (20, 70), font, font_scale, (0, 255, 0), thickness, (0, 0, 0))
-            draw_text_with_background(annotated_frame, f"SALIDAS: {self.count_exit}", 
-                                    (20, 110), font, font_scale, (0, 0, 255), thickness, (0, 0, 0))
-            
             current_inside = self.count_entrance - self.count_exit
             color_current = (255, 255, 0) if current_inside >= 0 else (0, 0, 255)
-            draw_text_with_background(annotated_frame, f"DENTRO: {current_inside}", 
-                                    (20, 150), font, font_scale, color_current, thickness, (0, 0, 0))
+            return [
+                (f"ENTRADAS: {self.count_entrance}", (20, 70), font_scale, (0, 255, 0), thickness),
+                (f"SALIDAS: {self.count_exit}", (20, 110), font_scale, (0, 0, 255), thickness),
+                (f"DENTRO: {current_inside}", (20, 150), font_scale, color_current, thickness)
+            ]
+        
+        if self.line_orientation == "vertical":
+            positive_label, negative_label = "DERECHA", "IZQUIERDA"
         else:
-            if self.line_orientation == "vertical":
-                draw_text_with_background(annotated_frame, f"DERECHA: {self.count_positive}", 
-                                        (20, 70), font, font_scale, (0, 255, 0), thickness, (0, 0, 0))
-                draw_text_with_background(annotated_frame, f"IZQUIERDA: {self.count_negative}", 
-                                        (20, 110), font, font_scale, (0, 0, 255), thickness, (0, 0, 0))
-            else:
-                draw_text_with_background(annotated_frame, f"ABAJO: {self.count_positive}", 
-                                        (20, 70), font, font_scale, (0, 255, 0), thickness, (0, 0, 0))
-                draw_text_with_background(annotated_frame, f"ARRIBA: {self.count_negative}", 
-                                        (20, 110), font, font_scale, (0, 0, 255), thickness, (0, 0, 0))
-            
-            total = self.count_positive + self.count_negative
-            draw_text_with_background(annotated_frame, f"TOTAL: {total}", 
-                                    (20, 150), font, font_scale, (255, 255, 255), thickness, (0, 0, 0))
+            positive_label, negative_label = "ABAJO", "ARRIBA"
+        total = self.count_positive + self.count_negative
+        return [
+            (f"{positive_label}: {self.count_positive}", (20, 70), font_scale, (0, 255, 0), thickness),
+            (f"{negative_label}: {self.count_negative}", (20, 110), font_scale, (0, 0, 255), thickness),
+            (f"TOTAL: {total}", (20, 150), font_scale, (255, 255, 255), thickness)
+        ]
+    
+    def _skip_panel_items(self):
+        """Textos del panel de frame skipping"""
+        if not self.enable_frame_skipping:
+            return []
         
-        # NUEVA SECCIÓN: Info de Frame Skipping
-        if self.enable_frame_skipping:
-            skip_stats = self.get_frame_skip_stats()
-            if skip_stats:
-                # Color según el modo
-                skip_color = (0, 255, 255) if skip_stats['current_mode'] == "normal" else (255, 0, 255)
-                
-                # Texto del modo actual
-                mode_text = f"SKIP: {skip_stats['current_mode'].upper()}"
-                draw_text_with_background(annotated_frame, mode_text, 
-                                        (20, 190), font, 0.6, skip_color, 2, (0, 0, 0))
-                
-                # Estadísticas de eficiencia
-                efficiency_text = f"Eficiencia: {skip_stats['skip_percentage']:.1f}% saltados"
-                draw_text_with_background(annotated_frame, efficiency_text, 
-                                        (20, 220), font, 0.5, (255, 255, 255), 1, (0, 0, 0))
-                
-                # Frame actual
-                frame_text = f"Frame: {self.frame_counter} (Skip: {skip_stats['current_skip']})"
-                draw_text_with_background(annotated_frame, frame_text, 
-                                        (20, 245), font, 0.5, (200, 200, 200), 1, (0, 0, 0))
-        
-        # Info de configuración
+        skip_stats = self.get_frame_skip_stats()
+        if not skip_stats:
+            return []
+        
+        # Color según el modo
+        skip_color = (0, 255, 255) if skip_stats['current_mode'] == "normal" else (255, 0, 255)
+        return [
+            (f"SKIP: {skip_stats['current_mode'].upper()}", (20, 190), 0.6, skip_color, 2),
+            (f"Eficiencia: {skip_stats['skip_percentage']:.1f}% saltados", (20, 220), 0.5, (255, 255, 255), 1),
+            (f"Frame: {self.frame_counter} (Skip: {skip_stats['current_skip']})", (20, 245), 0.5, (200, 200, 200), 1)
+        ]
+    
+    def _info_panel_items(self, width, height):
+        """Texto de configuración en la parte inferior"""
         info_parts = [
-            f"{w}x{h}",
+            f"{width}x{height}",
             f"Linea: {self.line_orientation}",
             f"Modo: {self.counting_mode}"
         ]
@@ -604,10 +789,30 @@ class FlexiblePersonCounter:
         if self.enable_frame_skipping:
             info_parts.append(f"Skip: {self.skip_mode}")
         
-        info_text = " | ".join(info_parts)
-        draw_text_with_background(annotated_frame, info_text, (20, h - 30), 
-                                font, 0.5, (255, 255, 255), 1, (0, 0, 0))
+        return [(" | ".join(info_parts), (20, height - 30), 0.5, (255, 255, 255), 1)]
+    
+    def draw_annotations(self, frame, results):
+        """
+        Dibuja las anotaciones en el frame - INCLUYENDO INFO DE FRAME SKIPPING
+        La capa estática y los paneles de texto están cacheados: por frame solo
+        se componen, y los paneles se re-renderizan cuando cambian sus valores
+        """
+        stage_start = time.perf_counter()
+        annotated_frame = results.plot()
+        h, w = annotated_frame.shape[:2]
+        
+        if self.line_segment is not None:
+            self._get_static_overlay(w, h).apply(annotated_frame)
         
+        self._text_panels["counters"].update(self._counter_panel_items()).apply(annotated_frame)
+        
+        skip_items = self._skip_panel_items()
+        if skip_items:
+            self._text_panels["skip"].update(skip_items).apply(annotated_frame)
+        
+        self._text_panels["info"].update(self._info_panel_items(w, h)).apply(annotated_frame)
+        
+        self.stage_timer.add("anotaciones", time.perf_counter() - stage_start)
         return annotated_frame
     
     def reset_counters(self):
@@ -631,6 +836,7 @@ class FlexiblePersonCounter:
         self.total_frames_processed = 0
         self.total_frames_skipped = 0
         self.mode_changes = 0
+        self.stage_timer.reset()
         
         print("🔄 Contadores y estadísticas de frame skipping reiniciados")
     
@@ -642,6 +848,8 @@ class FlexiblePersonCounter:
             "rotation_angle": self.rotation_angle,
             "line_orientation": self.line_orientation,
             "detection_line_position": self.detection_line,
+            "detection_line_segment": [list(point) for point in self.line_segment] if self.line_segment else None,
+            "line_geometry": "segment" if self.has_line_segment() else "axis",
             "line_calibrated": self.line_calibrated,
             "line_margin": self.line_margin,
             "counting_mode": self.counting_mode,
@@ -663,6 +871,9 @@ class FlexiblePersonCounter:
         else:
             base_stats["frame_skipping_enabled"] = False
         
+        # Tiempos por etapa del segmento (p50/p95 en ms + histograma combinable)
+        base_stats["stage_timings_ms"] = self.stage_timer.summary()
+        
         if self.counting_mode == "entrance_exit":
             base_stats.update({
                 "entradas": self.count_entrance,
@@ -99,6 +99,8 @@ def draw_interface(self):
 Calibrador de Línea de Detección para Sistema RTSP
 Este módulo permite capturar un frame del stream RTSP y dibujar interactivamente
 la línea de detección para generar los parámetros de configuración.
+Con --en-vivo mantiene abierta una sola sesión del stream y cuenta en tiempo
+real con la línea dibujada mientras se ajusta.
 
 Autor: Tu Nombre
 Fecha: 2024
@@ -130,6 +132,7 @@ class LineCalibrator:
         self.line_end = None
         self.current_mouse_pos = None
         self.line_margin = 30
+        self.entrance_direction = None  # "positive"/"negative" si se conoce (auto-calibración)
         
         # Frame capturado
         self.frame = None
@@ -315,6 +318,14 @@ class LineCalibrator:
            cv2.circle(display_frame, self.line_start, 5, (0, 255, 0), -1)
            cv2.circle(display_frame, self.line_end, 5, (0, 0, 255), -1)
            
+           # Etiquetas de las flechas según la dirección de entrada (E la invierte)
+           entrance = ("ENTRADA", (0, 255, 0))
+           exit_ = ("SALIDA", (0, 0, 255))
+           if self.entrance_direction == "negative":
+               (positive_label, positive_color), (negative_label, negative_color) = exit_, entrance
+           else:
+               (positive_label, positive_color), (negative_label, negative_color) = entrance, exit_
+           
            # Calcular línea de detección según orientación
            if self.line_orientation == "vertical":
                # Línea vertical de detección
@@ -333,15 +344,15 @@ class LineCalibrator:
                
                # Flechas indicando direcciones de movimiento HORIZONTAL
                arrow_y = h//2
-               # Flecha DERECHA (entrada)
-               cv2.arrowedLine(display_frame, (50, arrow_y), (100, arrow_y), (0, 255, 0), 3, tipLength=0.3)
-               cv2.putText(display_frame, "ENTRADA", (50, arrow_y - 20), 
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+               # Flecha DERECHA (dirección positiva)
+               cv2.arrowedLine(display_frame, (50, arrow_y), (100, arrow_y), positive_color, 3, tipLength=0.3)
+               cv2.putText(display_frame, positive_label, (50, arrow_y - 20), 
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, positive_color, 2)
                
-               # Flecha IZQUIERDA (salida)
-               cv2.arrowedLine(display_frame, (w - 50, arrow_y), (w - 100, arrow_y), (0, 0, 255), 3, tipLength=0.3)
-               cv2.putText(display_frame, "SALIDA", (w - 100, arrow_y - 20), 
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+               # Flecha IZQUIERDA (dirección negativa)
+               cv2.arrowedLine(display_frame, (w - 50, arrow_y), (w - 100, arrow_y), negative_color, 3, tipLength=0.3)
+               cv2.putText(display_frame, negative_label, (w - 100, arrow_y - 20), 
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, negative_color, 2)
            
            else:  # LÍNEA HORIZONTAL
                # Línea horizontal de detección
@@ -360,15 +371,15 @@ class LineCalibrator:
                
                # Flechas indicando direcciones de movimiento VERTICAL
                arrow_x = w//2
-               # Flecha ABAJO (entrada)
-               cv2.arrowedLine(display_frame, (arrow_x, 50), (arrow_x, 100), (0, 255, 0), 3, tipLength=0.3)
-               cv2.putText(display_frame, "ENTRADA", (arrow_x - 40, 40), 
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+               # Flecha ABAJO (dirección positiva)
+               cv2.arrowedLine(display_frame, (arrow_x, 50), (arrow_x, 100), positive_color, 3, tipLength=0.3)
+               cv2.putText(display_frame, positive_label, (arrow_x - 40, 40), 
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, positive_color, 2)
                
-               # Flecha ARRIBA (salida)
-               cv2.arrowedLine(display_frame, (arrow_x, h - 50), (arrow_x, h - 100), (0, 0, 255), 3, tipLength=0.3)
-               cv2.putText(display_frame, "SALIDA", (arrow_x - 30, h - 10), 
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+               # Flecha ARRIBA (dirección negativa)
+               cv2.arrowedLine(display_frame, (arrow_x, h - 50), (arrow_x, h - 100), negative_color, 3, tipLength=0.3)
+               cv2.putText(display_frame, negative_label, (arrow_x - 30, h - 10), 
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, negative_color, 2)
            
            cv2.putText(display_frame, f"Margen: {self.line_margin}px", 
                       (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
@@ -382,11 +393,12 @@ class LineCalibrator:
        instructions = [
            f"CALIBRADOR DE LINEA {self.line_orientation.upper()}",
            "Click y arrastra para dibujar la linea",
-           "TAB: Cambiar orientacion | ESC: Salir | R: Reset | S: Guardar | +/-: Margen"
+           "TAB: Cambiar orientacion | ESC: Salir | R: Reset | S: Guardar | +/-: Margen",
+           "E: Invertir entrada"
        ]
        
        for i, text in enumerate(instructions):
-           y_pos = h - 80 + (i * 25)
+           y_pos = h - 30 - (len(instructions) - 1 - i) * 25
            cv2.putText(display_frame, text, (10, y_pos), 
                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
        
@@ -432,11 +444,15 @@ class LineCalibrator:
             "LINE_MARGIN": self.line_margin,
             "TARGET_WIDTH": self.target_width,
             "ROTATION_ANGLE": self.rotation_angle,
+        }
+        if self.entrance_direction:
+            config_params["ENTRANCE_DIRECTION"] = self.entrance_direction
+        config_params.update({
             "# Coordenadas de calibración": f"# Resolución: {w}x{h}",
             "CALIBRATION_LINE_START": list(self.line_start),
             "CALIBRATION_LINE_END": list(self.line_end),
             "CALIBRATION_TIMESTAMP": datetime.now().isoformat()
-        }
+        })
         
         return config_params
     
@@ -475,6 +491,10 @@ class LineCalibrator:
                 print(f"DETECTION_LINE_Y = {config_params['DETECTION_LINE_Y']}")
             print(f"DETECTION_LINE_RATIO = {config_params['DETECTION_LINE_RATIO']}")
             print(f"LINE_MARGIN = {config_params['LINE_MARGIN']}")
+            if "ENTRANCE_DIRECTION" in config_params:
+                print(f"ENTRANCE_DIRECTION = \"{config_params['ENTRANCE_DIRECTION']}\"")
+            print(f"DETECTION_LINE_START = {config_params['CALIBRATION_LINE_START']}")
+            print(f"DETECTION_LINE_END = {config_params['CALIBRATION_LINE_END']}")
             print(f"# Línea {self.line_orientation} dibujada de ({config_params['CALIBRATION_LINE_START']}) a ({config_params['CALIBRATION_LINE_END']})")
             
             return True
@@ -496,6 +516,7 @@ class LineCalibrator:
         print("\n🖱️ Controles del calibrador:")
         print("   • Click y arrastra para dibujar la línea de detección")
         print("   • TAB: Cambiar orientación (vertical ↔ horizontal)")
+        print("   • E: Invertir dirección de entrada")
         print("   • R: Reset (borrar línea)")
         print("   • S: Guardar calibración")
         print("   • +/-: Aumentar/Disminuir margen de línea")
@@ -545,6 +566,10 @@ class LineCalibrator:
                     # Disminuir margen
                     self.line_margin = max(5, self.line_margin - 5)
                     print(f"📏 Margen reducido a: {self.line_margin}px")
+                elif key == ord('e') or key == ord('E'):
+                    # Invertir dirección de entrada (sin fijar, la entrada es la positiva)
+                    self.entrance_direction = "positive" if self.entrance_direction == "negative" else "negative"
+                    print(f"🚪 Dirección de ENTRADA: {self.entrance_direction.upper()}")
                 elif key == 9:  # TAB
                     # Cambiar orientación
                     self.line_orientation = "horizontal" if self.line_orientation == "vertical" else "vertical"
@@ -563,13 +588,109 @@ class LineCalibrator:
         
         finally:
             cv2.destroyAllWindows()
-        
+
         return True
 
+    def run_live_calibration(self, counter):
+        """
+        Calibración en vivo: una sola sesión de stream abierta, frames en vivo
+        redimensionados por el contador y conteo en tiempo real con la línea dibujada
+        counter: FlexiblePersonCounter con modelo; cada cambio de línea o margen
+        se aplica con counter.configure_line y los contadores vuelven a cero
+        """
+        from live_stream import LatestFrameStream
 
-def main():
+        print("🎯 Iniciando Calibrador de Línea EN VIVO")
+        print("=" * 50)
+        print("\n🖱️ Controles del calibrador en vivo:")
+        print("   • Click y arrastra para dibujar la línea (se aplica al soltar)")
+        print("   • TAB: Cambiar orientación | E: Invertir dirección de entrada")
+        print("   • +/-: Margen | R: Reset | S: Guardar | ESC: Salir")
+
+        # En calibración se procesan todos los frames para ver cada cruce
+        counter.enable_frame_skipping = False
+        counter.show_frame_skip_info = False
+        self.entrance_direction = self.entrance_direction or counter.entrance_direction
+
+        stream = LatestFrameStream(self.rtsp_url)
+        stream.start()
+
+        window_name = "🎯 Calibrador de Línea EN VIVO"
+        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+        cv2.setMouseCallback(window_name, self.mouse_callback)
+
+        applied = None
+        sequence = 0
+        try:
+            while True:
+                sequence, raw_frame = stream.read(sequence, timeout=1.0)
+                if raw_frame is not None:
+                    # Aplicar la línea dibujada al contador (solo si cambió)
+                    if self.line_start and self.line_end and not self.drawing:
+                        current = (self.line_start, self.line_end, self.line_margin,
+                                   self.line_orientation, self.entrance_direction)
+                        if current != applied:
+                            counter.configure_line(orientation=self.line_orientation,
+                                                   line_start=self.line_start, line_end=self.line_end,
+                                                   margin=self.line_margin,
+                                                   entrance_direction=self.entrance_direction)
+                            applied = current
+                            print(f"✅ Línea aplicada al contador: {self.line_start} → {self.line_end} "
+                                  f"(±{self.line_margin}px, entrada {self.entrance_direction})")
+
+                    results, resized_frame = counter.process_frame(raw_frame)
+                    self.scale_factor = counter.scale_factor
+                    self.frame = counter.draw_annotations(resized_frame, results)
+
+                display_frame = self.draw_interface()
+                if display_frame is not None:
+                    cv2.imshow(window_name, display_frame)
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == 27:  # ESC
+                    print("🚪 Saliendo del calibrador")
+                    break
+                elif key == ord('r') or key == ord('R'):
+                    self.line_start = None
+                    self.line_end = None
+                    self.drawing = False
+                    print("🔄 Línea borrada")
+                elif key == ord('s') or key == ord('S'):
+                    if self.save_calibration():
+                        print("✅ Calibración guardada exitosamente")
+                    else:
+                        print("❌ Error guardando calibración")
+                elif key == ord('+') or key == ord('='):
+                    self.line_margin = min(100, self.line_margin + 5)
+                    print(f"📏 Margen aumentado a: {self.line_margin}px")
+                elif key == ord('-'):
+                    self.line_margin = max(5, self.line_margin - 5)
+                    print(f"📏 Margen reducido a: {self.line_margin}px")
+                elif key == ord('e') or key == ord('E'):
+                    self.entrance_direction = "positive" if self.entrance_direction == "negative" else "negative"
+                    print(f"🚪 Dirección de ENTRADA: {self.entrance_direction.upper()}")
+                elif key == 9:  # TAB
+                    self.line_orientation = "horizontal" if self.line_orientation == "vertical" else "vertical"
+                    self.line_start = None
+                    self.line_end = None
+                    self.drawing = False
+                    print(f"🔄 Orientación cambiada a: {self.line_orientation.upper()} (dibuja la nueva línea)")
+
+        except KeyboardInterrupt:
+            print("\n🛑 Calibración interrumpida")
+
+        finally:
+            stream.stop()
+            cv2.destroyAllWindows()
+            print(f"📊 Frames leídos: {stream.frames_read} | Reconexiones: {stream.reconnections}")
+
+        return True
+
+
+def main(live=False):
     """
     Función principal del calibrador
+    live: calibración en vivo (sesión de stream persistente + conteo en tiempo real)
     """
     # Importar configuración si existe
     try:
@@ -600,7 +721,22 @@ def main():
         line_orientation=LINE_ORIENTATION
     )
     
-    success = calibrator.run_calibration()
+    if live:
+        # Conteo en vivo con la configuración de conteo de config.py
+        import config
+        from flexible_person_counter import FlexiblePersonCounter
+        counter = FlexiblePersonCounter(
+            model_path=getattr(config, 'YOLO_MODEL_PATH', "yolo11n.pt"),
+            target_width=TARGET_WIDTH,
+            rotation_angle=ROTATION_ANGLE,
+            line_orientation=LINE_ORIENTATION,
+            line_margin=calibrator.line_margin,
+            entrance_direction=getattr(config, 'ENTRANCE_DIRECTION', "positive"),
+            counting_mode=getattr(config, 'COUNTING_MODE', "entrance_exit")
+        )
+        success = calibrator.run_live_calibration(counter)
+    else:
+        success = calibrator.run_calibration()
     
     if success:
         print("\n✅ Calibración completada")
@@ -615,7 +751,7 @@ if __name__ == "__main__":
     import sys
     
     try:
-        success = main()
+        success = main(live="--en-vivo" in sys.argv[1:])
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n👋 Hasta luego!")
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Barrido de configuraciones de línea ("what-if") sobre trayectorias cacheadas
+
+Evalúa muchas posiciones de línea y márgenes sobre las mismas trayectorias en
+una sola pasada vectorizada y devuelve los conteos de cada candidato. Replica
+la prueba de cruce de FlexiblePersonCounter.detect_crossings: un track se
+cuenta la primera vez que el inicio de su historial (últimos 30 puntos) y su
+posición actual quedan a lados opuestos de la línea, fuera del margen.
+
+Uso:
+    python line_sweep.py --posiciones 120:260:5 --margenes 5,10,20
+    python line_sweep.py --video videos/video_20250606_133535_000.mp4 --posiciones 150:200:2
+    python line_sweep.py --posiciones 140:220:2 --referencia 35 31
+"""
+
+import argparse
+import json
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+import config
+from detection_cache import iter_cached_segments
+
+
+TRACK_HISTORY = 30       # maxlen del historial de cada track en el contador
+MIN_TRACK_POINTS = 5     # Puntos mínimos antes de evaluar un cruce
+
+
+def collect_updates(segment, confidence_threshold=0.5, history=TRACK_HISTORY,
+                    min_points=MIN_TRACK_POINTS):
+    """
+    Convierte las detecciones de un segmento en actualizaciones de track:
+    (inicio del historial, posición actual, id de track) por cada punto nuevo
+    a partir del quinto, en el mismo orden en que el contador las evalúa
+    """
+    keep = segment.conf >= confidence_threshold
+    boxes = segment.box[keep]
+    track_ids = segment.track_id[keep]
+
+    # Centro igual que el contador: int((x1 + x2) / 2) sobre float32
+    centers = np.stack([((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int32),
+                        ((boxes[:, 1] + boxes[:, 3]) / 2).astype(np.int32)], axis=1)
+
+    # Ordenar por track manteniendo el orden temporal de cada uno
+    order = np.argsort(track_ids, kind="stable")
+    track_ids = track_ids[order]
+    centers = centers[order]
+
+    # Índice de cada punto dentro de su track
+    boundaries = np.flatnonzero(np.diff(track_ids)) + 1
+    track_starts = np.concatenate(([0], boundaries))
+    lengths = np.diff(np.concatenate((track_starts, [len(track_ids)])))
+    position = np.arange(len(track_ids)) - np.repeat(track_starts, lengths)
+
+    updates = position >= min_points - 1
+    start_index = np.arange(len(track_ids)) - np.minimum(position, history - 1)
+    return (centers[start_index[updates]].astype(np.float32),
+            centers[updates].astype(np.float32),
+            track_ids[updates])
+
+
+def candidate_lines(orientation, positions, frame_size):
+    """Segmentos (origen, vector, normal) de cada posición, como set_detection_line"""
+    width, height = frame_size
+    positions = np.asarray(positions, dtype=np.int32).astype(np.float32)
+    count = len(positions)
+    if orientation == "vertical":
+        positions = np.clip(positions, 0, width - 1)
+        origins = np.stack([positions, np.full(count, height, np.float32)], axis=1)
+        vectors = np.tile(np.array([0, -height], np.float32), (count, 1))
+    else:
+        positions = np.clip(positions, 0, height - 1)
+        origins = np.stack([np.zeros(count, np.float32), positions], axis=1)
+        vectors = np.tile(np.array([width, 0], np.float32), (count, 1))
+    lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+    normals = np.stack([-vectors[:, 1], vectors[:, 0]], axis=1) / lengths[:, None]
+    return origins, vectors, normals.astype(np.float32)
+
+
+def sweep_updates(starts, ends, groups, origins, vectors, normals, margins,
+                  direction_threshold=50, chunk_size=64):
+    """
+    Cuenta cruces para todos los candidatos (línea i × margen j)
+    groups: id entero del track (único por segmento) de cada actualización, ordenado
+    Devuelve arreglos (posiciones, márgenes) con cruces positivos y negativos
+    """
+    margins = np.asarray(margins, dtype=np.float32)
+    positive = np.zeros((len(origins), len(margins)), dtype=np.int64)
+    negative = np.zeros_like(positive)
+    if len(groups) == 0:
+        return positive, negative
+
+    group_starts = np.concatenate(([0], np.flatnonzero(np.diff(groups)) + 1))
+    movement = ends - starts
+    no_crossing = len(groups)
+
+    for first in range(0, len(origins), chunk_size):
+        o = origins[first:first + chunk_size]
+        v = vectors[first:first + chunk_size]
+        n = normals[first:first + chunk_size]
+
+        # (actualizaciones × líneas): lado de inicio/fin y prueba del segmento finito
+        relative = starts[:, None, :] - o[None, :, :]
+        start_side = np.einsum('ucd,cd->uc', relative, n)
+        end_side = np.einsum('ucd,cd->uc', ends[:, None, :] - o[None, :, :], n)
+        relative_x, relative_y = relative[..., 0], relative[..., 1]
+        denominator = v[:, 0] * movement[:, 1:2] - v[:, 1] * movement[:, 0:1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (relative_x * movement[:, 1:2] - relative_y * movement[:, 0:1]) / denominator
+        valid = (t >= 0) & (t <= 1) & (np.abs(end_side - start_side) >= direction_threshold)
+
+        for j, margin in enumerate(margins):
+            crossed_positive = (start_side < -margin) & (end_side > margin)
+            crossed_negative = (start_side > margin) & (end_side < -margin)
+            crossed = (crossed_positive | crossed_negative) & valid
+
+            # Primera actualización que cruza en cada track (el contador lo cuenta una vez)
+            index = np.where(crossed, np.arange(len(groups))[:, None], no_crossing)
+            first_crossing = np.minimum.reduceat(index, group_starts, axis=0)
+            counted = first_crossing < no_crossing
+            direction = np.take_along_axis(crossed_positive, np.minimum(first_crossing, no_crossing - 1), axis=0)
+            positive[first:first + chunk_size, j] = np.sum(counted & direction, axis=0)
+            negative[first:first + chunk_size, j] = np.sum(counted & ~direction, axis=0)
+
+    return positive, negative
+
+
+def sweep_segments(segments, orientation, positions, margins, confidence_threshold=0.5,
+                   direction_threshold=50):
+    """Barrido sobre varios segmentos (agrupados por tamaño de frame)"""
+    by_size = defaultdict(lambda: ([], [], []))
+    next_group = 0
+    segment_count = 0
+    for segment in segments:
+        starts, ends, track_ids = collect_updates(segment, confidence_threshold)
+        # Ids de track únicos entre segmentos (cada video reinicia los contadores)
+        _, local_groups = np.unique(track_ids, return_inverse=True)
+        parts = by_size[tuple(segment.frame_size)]
+        parts[0].append(starts)
+        parts[1].append(ends)
+        parts[2].append(local_groups + next_group)
+        next_group += int(local_groups.max()) + 1 if len(local_groups) else 0
+        segment_count += 1
+
+    positive = np.zeros((len(positions), len(margins)), dtype=np.int64)
+    negative = np.zeros_like(positive)
+    for frame_size, (starts, ends, groups) in by_size.items():
+        origins, vectors, normals = candidate_lines(orientation, positions, frame_size)
+        p, n = sweep_updates(np.concatenate(starts), np.concatenate(ends), np.concatenate(groups),
+                             origins, vectors, normals, margins, direction_threshold)
+        positive += p
+        negative += n
+    return positive, negative, segment_count
+
+
+def detection_pass(video_paths, cache_dir, frame_skipping=None):
+    """
+    Ejecuta YOLO una vez sobre los videos y deja sus detecciones en cache_dir
+    frame_skipping: None = el de config.py, False = detectar en todos los frames
+    """
+    import cv2
+    from detection_cache import DetectionCacheWriter, inference_params
+    from flexible_person_counter import FlexiblePersonCounter
+
+    counter = FlexiblePersonCounter(
+        model_path=getattr(config, 'YOLO_MODEL_PATH', "yolo11n.pt"),
+        target_width=config.TARGET_WIDTH,
+        rotation_angle=config.ROTATION_ANGLE,
+        line_orientation=config.LINE_ORIENTATION,
+        line_margin=config.LINE_MARGIN
+    )
+    counter.show_frame_skip_info = False
+    if frame_skipping is not None:
+        counter.configure_frame_skipping(enable=frame_skipping)
+
+    for video_path in video_paths:
+        print(f"🎬 Detectando en {Path(video_path).name}...")
+        counter.reset_counters()
+        writer = DetectionCacheWriter(cache_dir, video_path, inference_params(counter))
+        cap = cv2.VideoCapture(str(video_path))
+        frame_index = 0
+        frame_size = None
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            _, resized_frame = counter.process_frame(frame)
+            if counter.last_detections is not None:
+                writer.add(frame_index, *counter.last_detections)
+                frame_size = resized_frame.shape[1::-1]
+            frame_index += 1
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        cap.release()
+        if frame_size is not None:
+            writer.save(frame_size, fps, frame_index)
+
+
+def parse_range(value):
+    """'inicio:fin:paso' (fin incluido) o lista 'a,b,c'"""
+    if ":" in value:
+        start, end, *step = (float(part) for part in value.split(":"))
+        step = step[0] if step else 1
+        return list(np.arange(start, end + step / 2, step))
+    return [float(part) for part in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de posiciones/márgenes de línea")
+    parser.add_argument("--posiciones", required=True, help="Posiciones de línea: inicio:fin:paso o a,b,c")
+    parser.add_argument("--margenes", default=str(config.LINE_MARGIN), help="Márgenes: inicio:fin:paso o a,b,c")
+    parser.add_argument("--orientacion", choices=["horizontal", "vertical"],
+                        default=config.LINE_ORIENTATION.lower())
+    parser.add_argument("--entrada", choices=["positive", "negative"], default=config.ENTRANCE_DIRECTION,
+                        help="Dirección de ENTRADA para etiquetar los cruces")
+    parser.add_argument("--cache", default=getattr(config, 'DETECTION_CACHE_DIR', "stats/detections"),
+                        help="Directorio del caché de detecciones")
+    parser.add_argument("--video", nargs="*", help="Detectar primero en estos videos (sin usar el caché)")
+    parser.add_argument("--confianza", type=float, default=0.5, help="Confianza mínima de las detecciones")
+    parser.add_argument("--referencia", type=int, nargs=2, metavar=("ENTRADAS", "SALIDAS"),
+                        help="Conteo real para ordenar candidatos por error")
+    parser.add_argument("--top", type=int, default=15, help="Candidatos a mostrar")
+    parser.add_argument("--salida", help="Archivo JSON con todos los candidatos")
+    args = parser.parse_args()
+
+    positions = parse_range(args.posiciones)
+    margins = parse_range(args.margenes)
+
+    with tempfile.TemporaryDirectory() as temp_cache:
+        cache_dir = args.cache
+        if args.video:
+            detection_pass(args.video, temp_cache)
+            cache_dir = temp_cache
+
+        segments = list(iter_cached_segments(cache_dir))
+        if not segments:
+            print(f"❌ No hay detecciones cacheadas en {cache_dir}")
+            return 1
+
+        print(f"🔍 Evaluando {len(positions) * len(margins)} candidatos sobre {len(segments)} segmentos...")
+        positive, negative, _ = sweep_segments(segments, args.orientacion, positions, margins,
+                                               args.confianza)
+
+    entradas, salidas = (positive, negative) if args.entrada == "positive" else (negative, positive)
+    candidates = []
+    for i, position in enumerate(positions):
+        for j, margin in enumerate(margins):
+            candidate = {
+                "posicion": int(position),
+                "margen": int(margin),
+                "entradas": int(entradas[i, j]),
+                "salidas": int(salidas[i, j]),
+            }
+            if args.referencia:
+                candidate["error"] = (abs(candidate["entradas"] - args.referencia[0]) +
+                                      abs(candidate["salidas"] - args.referencia[1]))
+            candidates.append(candidate)
+
+    if args.referencia:
+        candidates.sort(key=lambda c: (c["error"], c["margen"]))
+    else:
+        candidates.sort(key=lambda c: -(c["entradas"] + c["salidas"]))
+
+    axis = "X" if args.orientacion == "vertical" else "Y"
+    print(f"\n📊 Mejores candidatos (línea {args.orientacion}, {axis}):")
+    for candidate in candidates[:args.top]:
+        error = f" | error {candidate['error']}" if args.referencia else ""
+        print(f"   {axis}={candidate['posicion']:4d} ±{candidate['margen']:3d}px → "
+              f"🚪 {candidate['entradas']} entradas | {candidate['salidas']} salidas{error}")
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(candidates, f, indent=2)
+        print(f"💾 Resultado guardado en {args.salida}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
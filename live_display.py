@@ -0,0 +1,117 @@
+import threading
+import cv2
+
+
+class LiveDisplay:
+    """
+    Ventana de visualización en vivo en su propio hilo
+    El procesamiento entrega frames sin esperar; el hilo muestra siempre el
+    más reciente y descarta los que quedaron viejos (latest-frame-wins).
+    Las teclas 'q' y ESC se leen aquí y el procesamiento las consulta con poll_key()
+    """
+
+    WINDOW_NAME = "person_counter"
+
+    def __init__(self, refresh_ms=15):
+        self.refresh_ms = refresh_ms
+        self._condition = threading.Condition()
+        self._frame = None
+        self._title = None
+        self._pending_action = None
+        self._running = False
+        self._thread = None
+
+        # Estadísticas
+        self.frames_submitted = 0
+        self.frames_shown = 0
+
+    @property
+    def frames_dropped(self):
+        return max(0, self.frames_submitted - self.frames_shown)
+
+    def start(self):
+        """Inicia el hilo de visualización"""
+        if self._running:
+            return
+        self._running = True
+        self._pending_action = None
+        self.frames_submitted = 0
+        self.frames_shown = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, title=None):
+        """Entrega un frame para mostrar (no bloquea; reemplaza al pendiente)"""
+        with self._condition:
+            self._frame = frame
+            if title is not None:
+                self._title = title
+            self.frames_submitted += 1
+            self._condition.notify()
+
+    def poll_key(self):
+        """Devuelve la acción de teclado pendiente ('skip', 'exit' o None) y la limpia"""
+        with self._condition:
+            action = self._pending_action
+            self._pending_action = None
+        return action
+
+    def stop(self):
+        """Detiene el hilo y cierra la ventana"""
+        if not self._running:
+            return
+        with self._condition:
+            self._running = False
+            self._frame = None
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        """Bucle del hilo: toda la interacción con HighGUI ocurre aquí"""
+        window_created = False
+        current_title = None
+
+        try:
+            while True:
+                with self._condition:
+                    if self._running and self._frame is None:
+                        self._condition.wait(timeout=self.refresh_ms / 1000)
+                    if not self._running:
+                        break
+                    frame, title = self._frame, self._title
+                    self._frame = None
+
+                if frame is not None:
+                    if not window_created:
+                        cv2.namedWindow(self.WINDOW_NAME, cv2.WINDOW_AUTOSIZE)
+                        window_created = True
+                    if title and title != current_title:
+                        try:
+                            cv2.setWindowTitle(self.WINDOW_NAME, title)
+                        except cv2.error:
+                            pass
+                        current_title = title
+                    cv2.imshow(self.WINDOW_NAME, frame)
+                    self.frames_shown += 1
+
+                # waitKey mantiene viva la ventana y lee el teclado
+                if window_created:
+                    key = cv2.waitKey(1) & 0xFF
+                    if key == ord('q'):
+                        self._set_action("skip")
+                    elif key == 27:  # ESC
+                        self._set_action("exit")
+        except Exception as e:
+            print(f"⚠️ Error en la visualización en vivo: {e}")
+        finally:
+            if window_created:
+                cv2.destroyWindow(self.WINDOW_NAME)
+                cv2.waitKey(1)
+
+    def _set_action(self, action):
+        with self._condition:
+            # ESC tiene prioridad sobre 'q'
+            if self._pending_action != "exit":
+                self._pending_action = action
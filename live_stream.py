@@ -0,0 +1,99 @@
+import threading
+import time
+
+import cv2
+
+
+class LatestFrameStream:
+    """
+    Sesión de decodificación persistente de un stream (RTSP o archivo)
+
+    Un hilo lee continuamente de una sola conexión cv2.VideoCapture y conserva
+    solo el frame más reciente (latest-frame-wins), así el consumidor nunca
+    trabaja con frames atrasados por el búfer. Solo se reconecta si el stream
+    se corta, no por cada lectura.
+    """
+
+    def __init__(self, source, reconnect_delay=2.0, open_timeout_ms=10000):
+        self.source = source
+        self.reconnect_delay = reconnect_delay
+        self.open_timeout_ms = open_timeout_ms
+
+        self._condition = threading.Condition()
+        self._frame = None
+        self._sequence = 0
+        self._running = False
+        self._thread = None
+
+        # Estadísticas
+        self.frames_read = 0
+        self.reconnections = 0
+
+    def start(self):
+        """Abre la conexión e inicia el hilo lector"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def read(self, last_sequence=0, timeout=5.0):
+        """
+        Espera un frame más nuevo que last_sequence
+        Returns: (secuencia, frame) o (last_sequence, None) si vence el timeout
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence != last_sequence or not self._running,
+                                     timeout=timeout)
+            if self._sequence == last_sequence or self._frame is None:
+                return last_sequence, None
+            return self._sequence, self._frame
+
+    def stop(self):
+        """Detiene el hilo lector y libera la conexión"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _open(self):
+        capture = cv2.VideoCapture(self.source, cv2.CAP_FFMPEG,
+                                   [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, self.open_timeout_ms])
+        if not capture.isOpened():
+            capture.release()
+            return None
+        return capture
+
+    def _run(self):
+        """Bucle del hilo: una conexión abierta mientras el stream entregue frames"""
+        capture = None
+        try:
+            while self._running:
+                if capture is None:
+                    capture = self._open()
+                    if capture is None:
+                        print(f"⚠️ No se pudo abrir el stream, reintentando en {self.reconnect_delay}s")
+                        time.sleep(self.reconnect_delay)
+                        continue
+                    print("📡 Sesión de stream abierta")
+
+                ret, frame = capture.read()
+                if not ret:
+                    # Corte del stream: única situación en la que se reconecta
+                    capture.release()
+                    capture = None
+                    self.reconnections += 1
+                    print(f"⚠️ Stream interrumpido, reconectando ({self.reconnections})...")
+                    time.sleep(self.reconnect_delay)
+                    continue
+
+                with self._condition:
+                    self._frame = frame
+                    self._sequence += 1
+                    self.frames_read += 1
+                    self._condition.notify_all()
+        finally:
+            if capture is not None:
+                capture.release()
@@ -13,6 +13,7 @@ Fecha: 2024
 import asyncio
 import subprocess
 import sys
+from datetime import datetime
 from pathlib import Path
 
 # Importar módulos del sistema
@@ -173,13 +174,39 @@ def show_stats():
     processor.print_summary()
     
     # Mostrar estadísticas detalladas si hay datos
-    if processor.all_stats:
-        print(f"\n📋 Últimos 5 videos procesados:")
-        for i, entry in enumerate(processor.all_stats[-5:], 1):
+    recent = processor.recent_stats(5)
+    if recent:
+        print(f"\n📋 Últimos {len(recent)} videos procesados:")
+        for i, entry in enumerate(recent, 1):
             stats = entry['stats']
             print(f"   {i}. {entry['video']}")
-            print(f"      👥 Total: {stats['total']} | ➡️ {stats['derecha']} | ⬅️ {stats['izquierda']}")
+            if stats.get('counting_mode') == 'entrance_exit':
+                print(f"      🚪 Entradas: {stats.get('entradas', 0)} | Salidas: {stats.get('salidas', 0)}")
+            else:
+                positive = stats.get('derecha', stats.get('abajo', 0))
+                negative = stats.get('izquierda', stats.get('arriba', 0))
+                print(f"      👥 Total: {stats.get('total', 0)} | ➡️⬇️ {positive} | ⬅️⬆️ {negative}")
             print(f"      🕒 {entry['processed_at'][:19].replace('T', ' ')}")
+    
+    # Tráfico por hora desde los acumulados (sin recorrer el historial)
+    entrance_exit = processor.counter.counting_mode == 'entrance_exit'
+    hourly = [row for row in processor.rollups.last_hours(24) if row['segmentos']]
+    if hourly:
+        print(f"\n🕒 Tráfico por hora (últimas 24 h, cámara {processor.camera_id}):")
+        for row in hourly:
+            hour = row['inicio'][:16].replace('T', ' ')
+            if entrance_exit:
+                print(f"   {hour}  🚪 Entradas: {row['entradas']:4d} | Salidas: {row['salidas']:4d}")
+            else:
+                print(f"   {hour}  ➡️⬇️ {row['direccion_positiva']:4d} | ⬅️⬆️ {row['direccion_negativa']:4d}")
+    
+    today = processor.rollups.totals(start=datetime.now().replace(hour=0, minute=0, second=0, microsecond=0))
+    if today['segmentos']:
+        if entrance_exit:
+            counts = f"{today['entradas']} entradas | {today['salidas']} salidas"
+        else:
+            counts = f"➡️⬇️ {today['direccion_positiva']} | ⬅️⬆️ {today['direccion_negativa']}"
+        print(f"\n📅 Hoy: {counts} | {today['segmentos']} segmentos")
 
 
 async def main():
@@ -0,0 +1,154 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from stage_timer import HISTOGRAM_BINS, HISTOGRAM_MIN_SECONDS, BINS_PER_DECADE
+
+
+# Cubetas exportadas: 2 por década (cada 5 intervalos del histograma de stage_timer)
+EXPORT_BUCKET_STEP = BINS_PER_DECADE // 2
+
+
+def stage_histogram_buckets(counts):
+    """Histograma de stage_timer → [(le en segundos, conteo acumulado)] al estilo Prometheus"""
+    buckets = []
+    cumulative = 0
+    for index, count in enumerate(counts):
+        cumulative += count
+        if (index + 1) % EXPORT_BUCKET_STEP == 0 and index + 1 < HISTOGRAM_BINS:
+            upper = HISTOGRAM_MIN_SECONDS * 10 ** ((index + 1) / BINS_PER_DECADE)
+            buckets.append((upper, cumulative))
+    return buckets
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def format_metrics(samples, base_labels=None):
+    """
+    Formato de texto de Prometheus (0.0.4)
+    samples: tuplas (nombre, tipo, ayuda, valor, etiquetas); para tipo
+    "histogram" el valor es (cubetas [(le, acumulado)], suma, cantidad)
+    """
+    base_labels = base_labels or {}
+    lines = []
+    described = set()
+    for name, metric_type, help_text, value, labels in samples:
+        if value is None:
+            continue
+        if name not in described:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            described.add(name)
+        labels = {**base_labels, **(labels or {})}
+        if metric_type == "histogram":
+            buckets, total, count = value
+            for upper, cumulative in buckets:
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': f'{upper:.6g}'})} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(float(total))}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        else:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Endpoint HTTP local con métricas en formato Prometheus (/metrics)
+
+    Las métricas se recolectan en el hilo del servidor, al momento de cada
+    consulta, llamando a los recolectores registrados (funciones que leen
+    contadores ya existentes). El bucle de frames no hace nada extra: ni
+    colas, ni locks, ni E/S por frame.
+    """
+
+    def __init__(self, host="127.0.0.1", port=9108, labels=None):
+        self.host = host
+        self.port = port
+        self.labels = labels or {}
+        self._collectors = []
+        self._server = None
+        self._server_thread = None
+
+        # Estadísticas
+        self.scrapes = 0
+        self.collector_errors = 0
+
+    def register(self, collector):
+        """Agrega un recolector: función sin argumentos que devuelve una lista de muestras"""
+        self._collectors.append(collector)
+
+    def render(self):
+        """Texto de todas las métricas (lo que responde /metrics)"""
+        samples = []
+        for collector in self._collectors:
+            try:
+                samples.extend(collector())
+            except Exception as e:
+                # Un recolector con error no debe tumbar el endpoint
+                self.collector_errors += 1
+                print(f"⚠️ Error recolectando métricas: {e}")
+        samples.append(("person_counter_metrics_collector_errors_total", "counter",
+                        "Errores de recolectores de métricas", self.collector_errors, None))
+        return format_metrics(samples, self.labels)
+
+    def start(self):
+        """Inicia el servidor HTTP en un hilo propio"""
+        if self._server is not None:
+            return True
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        except OSError as e:
+            print(f"❌ No se pudo iniciar el endpoint de métricas en {self.host}:{self.port}: {e}")
+            self._server = None
+            return False
+
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._server_thread.start()
+        print(f"📈 Métricas Prometheus en http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+
+    def _make_handler(self):
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                # Silenciar el log por petición de http.server
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                metrics.scrapes += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return MetricsHandler
@@ -0,0 +1,151 @@
+import threading
+from collections import deque
+
+
+# Marca en la cola: frame avanzado con grab() pero no recuperado (se saltará)
+_SKIPPED = -1
+
+
+class PrefetchReader:
+    """
+    Decodificación adelantada de un cv2.VideoCapture en su propio hilo
+
+    El hilo lector decodifica hasta 'depth' frames por delante sobre un anillo
+    de buffers preasignados (cap.retrieve escribe en el buffer: sin
+    asignaciones por frame) mientras el procesamiento corre YOLO sobre el
+    frame actual. read() tiene la semántica de cap.read(); el frame devuelto
+    es válido hasta la siguiente llamada a read() (copiarlo si se guarda).
+
+    should_retrieve: función que decide, en el hilo lector y en orden, si el
+    frame se usará (p. ej. counter.should_process_frame). Los frames para los
+    que devuelve False solo se avanzan con grab() y read() los entrega como
+    (True, None): no se convierten a BGR. La decisión se toma hasta 'depth'
+    frames antes de que el procesamiento llegue a ellos, así que un cambio de
+    modo de skip se aplica con ese retraso.
+
+    Mientras el lector esté activo, el VideoCapture es solo suyo: leer las
+    propiedades antes de start() y liberarlo después de stop().
+    """
+
+    def __init__(self, cap, depth=4, should_retrieve=None):
+        self.cap = cap
+        self.depth = max(1, depth)
+        self.should_retrieve = should_retrieve
+        self._condition = threading.Condition()
+        self._buffers = []
+        self._filled = deque()      # índices de buffers con frame listo (_SKIPPED = saltado, None = fin)
+        self._free = deque()        # índices de buffers disponibles para el lector
+        self._held = None           # buffer entregado al consumidor
+        self._running = False
+        self._thread = None
+
+        # Estadísticas
+        self.frames_decoded = 0
+        self.frames_skipped = 0
+        self.consumer_waits = 0     # read() tuvo que esperar: la decodificación es el cuello de botella
+
+    def start(self):
+        """Inicia el hilo lector"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el hilo lector (después se puede liberar el VideoCapture)"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def read(self):
+        """
+        Siguiente frame en orden: (True, frame), (True, None) si should_retrieve
+        lo descartó, o (False, None) al terminar el video
+        Libera el buffer del frame anterior
+        """
+        with self._condition:
+            if self._held is not None:
+                self._free.append(self._held)
+                self._held = None
+                self._condition.notify_all()
+            if not self._filled:
+                self.consumer_waits += 1
+                while not self._filled and self._running:
+                    self._condition.wait()
+            if not self._filled:
+                return False, None
+            index = self._filled.popleft()
+            if index is None:
+                # Fin del video: la marca queda para lecturas posteriores
+                self._filled.appendleft(None)
+                return False, None
+            self._condition.notify_all()
+            if index == _SKIPPED:
+                return True, None
+            self._held = index
+            return True, self._buffers[index]
+
+    def __iter__(self):
+        """Itera los frames en orden hasta el final del video (None = frame saltado)"""
+        while True:
+            ret, frame = self.read()
+            if not ret:
+                return
+            yield frame
+
+    def _run(self):
+        """Bucle del hilo lector: grab + retrieve en el siguiente buffer libre"""
+        try:
+            while True:
+                with self._condition:
+                    # Como mucho 'depth' frames por delante (recuperados o saltados)
+                    while self._running and len(self._filled) >= self.depth:
+                        self._condition.wait()
+                    if not self._running:
+                        return
+
+                if not self.cap.grab():
+                    break
+                if self.should_retrieve is not None and not self.should_retrieve():
+                    with self._condition:
+                        self.frames_skipped += 1
+                        self._filled.append(_SKIPPED)
+                        self._condition.notify_all()
+                    continue
+
+                with self._condition:
+                    while self._running and not self._free and len(self._buffers) >= self.depth + 1:
+                        self._condition.wait()
+                    if not self._running:
+                        return
+                    index = self._free.popleft() if self._free else None
+
+                if index is None:
+                    # Primeros frames: el tamaño se conoce al decodificar; se asignan
+                    # depth + 1 buffers (uno queda en manos del consumidor)
+                    ret, frame = self.cap.retrieve()
+                    if not ret:
+                        break
+                    with self._condition:
+                        index = len(self._buffers)
+                        self._buffers.append(frame)
+                else:
+                    ret, frame = self.cap.retrieve(self._buffers[index])
+                    if not ret:
+                        break
+                    if frame is not self._buffers[index]:
+                        # Cambió la resolución o el formato: el buffer se reemplaza
+                        self._buffers[index] = frame
+
+                with self._condition:
+                    self.frames_decoded += 1
+                    self._filled.append(index)
+                    self._condition.notify_all()
+        finally:
+            with self._condition:
+                self._filled.append(None)
+                self._condition.notify_all()
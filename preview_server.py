@@ -0,0 +1,219 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+
+class PreviewServer:
+    """
+    Vista previa en vivo por HTTP (MJPEG) para equipos sin pantalla
+
+    El procesamiento solo entrega referencias a frames con publish(); la
+    codificación JPEG ocurre en un hilo propio, limitada a max_fps y max_width,
+    y únicamente mientras haya algún cliente conectado.
+
+    Endpoints:
+        /            página con la vista previa
+        /stream      multipart/x-mixed-replace (MJPEG)
+        /snapshot    último frame en JPEG
+    """
+
+    BOUNDARY = "frame"
+
+    def __init__(self, host="127.0.0.1", port=8081, max_fps=5, max_width=640,
+                 jpeg_quality=70, title="Person Counter"):
+        self.host = host
+        self.port = port
+        self.max_fps = max(0.1, max_fps)
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self.title = title
+
+        self._condition = threading.Condition()
+        self._clients = 0
+        self._frame = None
+        self._jpeg = None
+        self._jpeg_sequence = 0
+        self._last_publish_time = 0.0
+        self._running = False
+        self._server = None
+        self._server_thread = None
+        self._encoder_thread = None
+
+        # Estadísticas
+        self.frames_encoded = 0
+
+    @property
+    def has_clients(self):
+        return self._clients > 0
+
+    def wants_frame(self):
+        """
+        Indica si vale la pena renderizar un frame para la vista previa:
+        hay clientes y ya pasó el intervalo de max_fps desde el último
+        """
+        if not self._clients:
+            return False
+        return time.monotonic() - self._last_publish_time >= 1.0 / self.max_fps
+
+    def publish(self, frame):
+        """Entrega un frame anotado (no bloquea; no copia ni codifica aquí)"""
+        if not self._clients:
+            return
+        with self._condition:
+            self._frame = frame
+            self._last_publish_time = time.monotonic()
+            self._condition.notify_all()
+
+    def start(self):
+        """Inicia el servidor HTTP y el hilo de codificación"""
+        if self._running:
+            return True
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        except OSError as e:
+            print(f"❌ No se pudo iniciar la vista previa en {self.host}:{self.port}: {e}")
+            return False
+
+        self._server.daemon_threads = True
+        self._running = True
+
+        self._server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._server_thread.start()
+        self._encoder_thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self._encoder_thread.start()
+
+        print(f"📺 Vista previa MJPEG en http://{self.host}:{self.port}/ "
+              f"(máx {self.max_fps} FPS, {self.max_width}px)")
+        return True
+
+    def stop(self):
+        """Detiene servidor y codificador"""
+        if not self._running:
+            return
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+        print("📺 Vista previa detenida")
+
+    def _encode_loop(self):
+        """Hilo de codificación: toma el último frame publicado y lo comprime"""
+        while True:
+            with self._condition:
+                while self._running and self._frame is None:
+                    self._condition.wait(timeout=1.0)
+                if not self._running:
+                    break
+                frame = self._frame
+                self._frame = None
+
+            try:
+                h, w = frame.shape[:2]
+                if self.max_width and w > self.max_width:
+                    frame = cv2.resize(frame, (self.max_width, int(h * self.max_width / w)),
+                                       interpolation=cv2.INTER_AREA)
+                ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            except Exception as e:
+                print(f"⚠️ Error codificando vista previa: {e}")
+                continue
+
+            if ok:
+                with self._condition:
+                    self._jpeg = buffer.tobytes()
+                    self._jpeg_sequence += 1
+                    self.frames_encoded += 1
+                    self._condition.notify_all()
+
+    def _wait_for_jpeg(self, last_sequence, timeout=5.0):
+        """Espera un JPEG más nuevo que last_sequence (para los clientes)"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self._running or self._jpeg_sequence != last_sequence,
+                timeout=timeout)
+            return self._jpeg, self._jpeg_sequence
+
+    def _client_connected(self, delta):
+        with self._condition:
+            self._clients += delta
+            count = self._clients
+        print(f"📺 Clientes de vista previa: {count}")
+
+    def _make_handler(self):
+        preview = self
+
+        class PreviewHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                # Silenciar el log por petición de http.server
+                pass
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/":
+                    self._send_index()
+                elif path == "/stream":
+                    self._send_stream()
+                elif path == "/snapshot":
+                    self._send_snapshot()
+                else:
+                    self.send_error(404)
+
+            def _send_index(self):
+                body = (f"<html><head><title>{preview.title}</title></head>"
+                        f"<body style='margin:0;background:#111'>"
+                        f"<img src='/stream' style='max-width:100%'></body></html>").encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_snapshot(self):
+                preview._client_connected(1)
+                try:
+                    # Si aún no hay JPEG, esperar el primero
+                    last_sequence = preview._jpeg_sequence
+                    if preview._jpeg is not None:
+                        last_sequence -= 1
+                    jpeg, _ = preview._wait_for_jpeg(last_sequence)
+                finally:
+                    preview._client_connected(-1)
+                if jpeg is None:
+                    self.send_error(503, "Sin frames disponibles")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(jpeg)))
+                self.end_headers()
+                self.wfile.write(jpeg)
+
+            def _send_stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={preview.BOUNDARY}")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+
+                preview._client_connected(1)
+                sequence = -1
+                try:
+                    while preview._running:
+                        jpeg, new_sequence = preview._wait_for_jpeg(sequence)
+                        if new_sequence == sequence:
+                            continue
+                        sequence = new_sequence
+                        if jpeg is None:
+                            continue
+                        self.wfile.write(f"--{preview.BOUNDARY}\r\n".encode("ascii"))
+                        self.wfile.write(b"Content-Type: image/jpeg\r\n")
+                        self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode("ascii"))
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    preview._client_connected(-1)
+
+        return PreviewHandler
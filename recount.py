@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Recuento desde el caché de detecciones
+Vuelve a contar los segmentos cacheados con otra línea, margen o dirección
+de entrada sin ejecutar YOLO (habilitar ENABLE_DETECTION_CACHE en config.py).
+
+Uso:
+    python recount.py --linea 180 --margen 15
+    python recount.py --orientacion vertical --linea 320 --entrada negative --salida recuento.json
+"""
+
+import argparse
+import json
+
+import config
+from detection_cache import iter_cached_segments, replay_segment
+from flexible_person_counter import FlexiblePersonCounter
+
+
+def build_counter(args):
+    """Contador sin modelo con la configuración de línea pedida (o la de config.py)"""
+    orientation = (args.orientacion or config.LINE_ORIENTATION).lower()
+    if args.linea is not None:
+        position = args.linea
+    elif args.orientacion is None or orientation == config.LINE_ORIENTATION.lower():
+        position = config.DETECTION_LINE_X if orientation == "vertical" else config.DETECTION_LINE_Y
+    else:
+        position = None
+
+    # El segmento calibrado solo aplica si no se pide otra línea
+    use_segment = args.linea is None and args.orientacion is None
+    return FlexiblePersonCounter(
+        model_path=None,
+        target_width=config.TARGET_WIDTH,
+        rotation_angle=config.ROTATION_ANGLE,
+        line_orientation=orientation,
+        detection_line_position=position,
+        detection_line_ratio=getattr(config, 'DETECTION_LINE_RATIO', None) if position is None else None,
+        line_margin=args.margen if args.margen is not None else config.LINE_MARGIN,
+        entrance_direction=args.entrada or config.ENTRANCE_DIRECTION,
+        counting_mode=args.modo or config.COUNTING_MODE,
+        line_start=getattr(config, 'DETECTION_LINE_START', None) if use_segment else None,
+        line_end=getattr(config, 'DETECTION_LINE_END', None) if use_segment else None
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recuento desde detecciones cacheadas (sin YOLO)")
+    parser.add_argument("--cache", default=getattr(config, 'DETECTION_CACHE_DIR', "stats/detections"),
+                        help="Directorio del caché de detecciones")
+    parser.add_argument("--orientacion", choices=["horizontal", "vertical"], help="Orientación de la línea")
+    parser.add_argument("--linea", type=int, help="Posición de la línea (Y si horizontal, X si vertical)")
+    parser.add_argument("--margen", type=int, help="Margen de la línea en píxeles")
+    parser.add_argument("--entrada", choices=["positive", "negative"], help="Dirección de ENTRADA")
+    parser.add_argument("--modo", choices=["entrance_exit", "directional"], help="Modo de conteo")
+    parser.add_argument("--modelo", help="Solo cachés generados con este modelo (p. ej. yolo11n.pt)")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    args = parser.parse_args()
+
+    counter = build_counter(args)
+
+    results = []
+    totals = {}
+    for segment in iter_cached_segments(args.cache):
+        if args.modelo and segment.meta.get("params", {}).get("model") != args.modelo:
+            continue
+        stats = replay_segment(counter, segment)
+        results.append(stats)
+        for key in ("entradas", "salidas", "positivos", "negativos", "frames_procesados", "detecciones"):
+            if key in stats:
+                totals[key] = totals.get(key, 0) + stats[key]
+
+        if counter.counting_mode == "entrance_exit":
+            print(f"   {stats['video']}: 🚪 {stats['entradas']} entradas | {stats['salidas']} salidas")
+        else:
+            print(f"   {stats['video']}: ➡️⬇️ {stats['positivos']} | ⬅️⬆️ {stats['negativos']}")
+
+    if not results:
+        print(f"❌ No hay detecciones cacheadas en {args.cache}")
+        return 1
+
+    print(f"\n📊 {len(results)} segmentos recontados | Línea {counter.line_orientation} = "
+          f"{counter.detection_line} (±{counter.line_margin}px)")
+    print(f"   Totales: {totals}")
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump({"segmentos": results, "totales": totals}, f, indent=2)
+        print(f"💾 Resultado guardado en {args.salida}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
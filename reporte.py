@@ -5,30 +5,39 @@ Crea un reporte profesional con gráficos y estadísticas
 """
 
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
+from pathlib import Path
 from collections import defaultdict
-import statistics
+import argparse
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-from reportlab.graphics.shapes import Drawing, Rect, String
+from reportlab.graphics.shapes import Drawing, Line, Rect, String
 from reportlab.graphics.charts.piecharts import Pie
 from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics import renderPDF
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-import matplotlib.pyplot as plt
-import seaborn as sns
 import io
 import base64
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from stats_store import iter_jsonl
+from rollups import TrafficRollups
 
-def install_requirements():
-    """Instala las dependencias necesarias"""
+# Gráficos: "vector" (reportlab.graphics, nativo del PDF) o "matplotlib" (PNG, opcional)
+CHART_BACKENDS = ("vector", "matplotlib")
+
+def install_requirements(chart_backend="vector"):
+    """Instala las dependencias necesarias (matplotlib/seaborn solo si se usan)"""
     import subprocess
     import sys
     
-    packages = ['reportlab', 'matplotlib', 'seaborn']
+    packages = ['reportlab']
+    if chart_backend == "matplotlib":
+        packages += ['matplotlib', 'seaborn']
     
     for package in packages:
         try:
@@ -39,8 +48,15 @@ def install_requirements():
             print(f"✅ {package} instalado correctamente")
 
 def load_data(filename):
-    """Carga los datos desde el archivo JSON"""
+    """
+    Abre el archivo de estadísticas (JSON Lines o JSON antiguo)
+    Para JSON Lines devuelve un iterador: las entradas se leen a medida que se analizan
+    """
     try:
+        if str(filename).endswith('.jsonl'):
+            if not Path(filename).exists():
+                raise FileNotFoundError(filename)
+            return iter_jsonl(filename)
         with open(filename, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
@@ -50,88 +66,351 @@ def load_data(filename):
         print(f"❌ Error: El archivo {filename} no es un JSON válido")
         return None
 
-def analyze_data(data):
-    """Analiza los datos y genera estadísticas"""
-    if not data:
+def parse_timestamp(value):
+    """Convierte un timestamp ISO de las estadísticas a datetime (sin zona horaria)"""
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+def entry_time(item):
+    """
+    Instante de una entrada: inicio estimado de la grabación (capture_start) o,
+    en entradas antiguas, cuándo se contó; mismo criterio que los acumulados
+    """
+    return parse_timestamp(item.get('capture_start') or item['stats']['timestamp'])
+
+def iter_filtered(data, start=None, end=None, camera=None):
+    """
+    Filtra entradas mientras se leen: rango [start, end) y cámara
+    Las entradas sin campo 'camera' (anteriores a los ids de cámara) cuentan como
+    CAMERA_ID, igual que en los acumulados de tráfico
+    Entrega (datetime, entrada)
+    """
+    default_camera = default_camera_id() if camera is not None else None
+    for item in data:
+        if camera is not None and (item.get('camera') or default_camera) != camera:
+            continue
+        try:
+            moment = entry_time(item)
+        except (KeyError, TypeError, ValueError):
+            continue
+        if start is not None and moment < start:
+            continue
+        if end is not None and moment >= end:
+            continue
+        yield moment, item
+
+class OnlineStats:
+    """Media, mínimo y máximo en una pasada (memoria constante)"""
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+    
+    def add(self, value):
+        self.count += 1
+        self.mean += (value - self.mean) / self.count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    def summary(self, digits=2):
+        if not self.count:
+            return 0, 0, 0
+        return round(self.mean, digits), round(self.min, digits), round(self.max, digits)
+
+class Histogram:
+    """Histograma de intervalos fijos acumulado en una pasada"""
+    
+    def __init__(self, low=0.0, high=100.0, bins=10):
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self.counts = [0] * bins
+    
+    def add(self, value):
+        index = int((value - self.low) / (self.high - self.low) * self.bins)
+        self.counts[min(max(index, 0), self.bins - 1)] += 1
+    
+    @property
+    def edges(self):
+        step = (self.high - self.low) / self.bins
+        return [self.low + i * step for i in range(self.bins + 1)]
+
+def load_traffic(db_path, camera=None, days=7, start=None, end=None):
+    """
+    Tráfico por día (últimos días del rango) y por hora (último día con datos)
+    desde los acumulados SQLite, sin recorrer las estadísticas de cada segmento
+    """
+    if not Path(db_path).exists():
         return None
     
-    total_videos = len(data)
-    
-    # Métricas principales
-    entradas_total = sum(item['stats']['entradas'] for item in data)
-    salidas_total = sum(item['stats']['salidas'] for item in data)
-    movimientos_total = sum(item['stats']['total_movimientos'] for item in data)
+    rollups = TrafficRollups(db_path)
+    try:
+        camera = camera or "*"
+        daily = [row for row in rollups.query("day", start=start, end=end, camera=camera)
+                 if row['segmentos']][-days:]
+        if not daily:
+            return None
+        
+        last_day = datetime.fromisoformat(daily[-1]['inicio'])
+        hourly = [row for row in rollups.query("hour", start=last_day, end=end, camera=camera)
+                  if row['segmentos']]
+        return {
+            'camaras': rollups.cameras(),
+            'por_dia': daily,
+            'por_hora': hourly
+        }
+    finally:
+        rollups.close()
+
+class ReportAnalyzer:
+    """
+    Acumula el análisis de un reporte entrada por entrada (una sola pasada)
+    La memoria depende del contenido del reporte (intervalos horarios,
+    histogramas), no del tamaño del historial
+    """
     
-    # Eficiencia y rendimiento
-    skip_efficiencies = [item['stats']['skip_efficiency_percent'] for item in data]
-    processing_times = [item['stats']['processing_time_seconds'] for item in data]
-    fps_processed = [item['stats']['fps_processed'] for item in data]
+    def __init__(self, camera=None):
+        self.camera = camera
+        self.total_videos = 0
+        self.entradas_total = 0
+        self.salidas_total = 0
+        self.movimientos_total = 0
+        self.videos_con_movimiento = 0
+        
+        # Eficiencia y rendimiento (estadísticas en línea)
+        self.skip_efficiency = OnlineStats()
+        self.processing_time = OnlineStats()
+        self.fps_processed = OnlineStats()
+        self.efficiency_histogram = Histogram(0, 100, 10)
+        
+        # Análisis por modo
+        self.frame_skip_modes = defaultdict(int)
+        
+        # Análisis temporal: línea de tiempo por hora
+        self.first_time = None
+        self.last_time = None
+        self.timeline = {}
+        self.configuracion = None
+    
+    def add(self, time, item):
+        stats = item['stats']
+        self.total_videos += 1
+        
+        entradas = stats.get('entradas', 0)
+        salidas = stats.get('salidas', 0)
+        movimientos = stats.get('total_movimientos', stats.get('total', 0))
+        self.entradas_total += entradas
+        self.salidas_total += salidas
+        self.movimientos_total += movimientos
+        if movimientos > 0:
+            self.videos_con_movimiento += 1
+        
+        efficiency = stats.get('skip_efficiency_percent', 0)
+        self.skip_efficiency.add(efficiency)
+        self.efficiency_histogram.add(efficiency)
+        self.processing_time.add(stats.get('processing_time_seconds', 0))
+        self.fps_processed.add(stats.get('fps_processed', 0))
+        self.frame_skip_modes[stats.get('frame_skip_mode', 'deshabilitado')] += 1
+        
+        self.first_time = time if self.first_time is None else min(self.first_time, time)
+        self.last_time = time if self.last_time is None else max(self.last_time, time)
+        
+        hour = time.strftime('%Y-%m-%d %H:00')
+        bucket = self.timeline.setdefault(hour, {'tiempo': hour, 'entradas': 0, 'salidas': 0,
+                                                 'videos': 0, 'eficiencia': OnlineStats()})
+        bucket['entradas'] += entradas
+        bucket['salidas'] += salidas
+        bucket['videos'] += 1
+        bucket['eficiencia'].add(efficiency)
+        
+        if self.configuracion is None:
+            self.configuracion = {
+                'resolucion': stats.get('resolution', 'N/D'),
+                'angulo_rotacion': stats.get('rotation_angle', 0),
+                'posicion_linea_deteccion': stats.get('detection_line_position'),
+                'margen_linea': stats.get('line_margin')
+            }
+    
+    def result(self):
+        """Diccionario de análisis (None si no hubo entradas)"""
+        total_videos = self.total_videos
+        if not total_videos:
+            return None
+        
+        first_time, last_time = self.first_time, self.last_time
+        duracion_sesion = (last_time - first_time).total_seconds() / 60
+        same_day = first_time.date() == last_time.date()
+        time_format = '%H:%M:%S' if same_day else '%d/%m %H:%M'
+        
+        # Datos para gráficos
+        timeline_data = []
+        for hour in sorted(self.timeline):
+            bucket = dict(self.timeline[hour])
+            bucket['eficiencia'] = round(bucket['eficiencia'].mean, 2)
+            timeline_data.append(bucket)
+        
+        eficiencia_promedio, eficiencia_min, eficiencia_max = self.skip_efficiency.summary()
+        
+        return {
+            'general': {
+                'total_videos': total_videos,
+                'duracion_sesion_minutos': round(duracion_sesion, 2),
+                'periodo': f"{first_time.strftime(time_format)} - {last_time.strftime(time_format)}",
+                'fecha': first_time.strftime('%d/%m/%Y') if same_day
+                         else f"{first_time.strftime('%d/%m/%Y')} - {last_time.strftime('%d/%m/%Y')}",
+                'camara': self.camera or 'todas'
+            },
+            'conteo_personas': {
+                'total_entradas': self.entradas_total,
+                'total_salidas': self.salidas_total,
+                'total_movimientos': self.movimientos_total,
+                'balance_personas': self.entradas_total - self.salidas_total
+            },
+            'rendimiento': {
+                'eficiencia_promedio': eficiencia_promedio,
+                'eficiencia_min': eficiencia_min,
+                'eficiencia_max': eficiencia_max,
+                'tiempo_procesamiento_promedio': self.processing_time.summary()[0],
+                'fps_promedio': self.fps_processed.summary()[0],
+                'histograma_eficiencia': {
+                    'bordes': self.efficiency_histogram.edges,
+                    'conteos': list(self.efficiency_histogram.counts)
+                }
+            },
+            'configuracion': self.configuracion,
+            'modos_salto_frames': dict(self.frame_skip_modes),
+            'actividad': {
+                'videos_con_movimiento': self.videos_con_movimiento,
+                'videos_sin_movimiento': total_videos - self.videos_con_movimiento,
+                'porcentaje_actividad': round((self.videos_con_movimiento / total_videos) * 100, 2)
+            },
+            'timeline_data': timeline_data
+        }
+
+def analyze_data(data, start=None, end=None, camera=None):
+    """
+    Analiza los datos en una sola pasada y genera estadísticas
+    data puede ser un iterador (p. ej. el de load_data para JSON Lines)
+    """
+    analyzer = ReportAnalyzer(camera)
+    for time, item in iter_filtered(data, start, end, camera):
+        analyzer.add(time, item)
+    return analyzer.result()
+
+CHART_COLORS = {
+    'entradas': colors.HexColor('#2E8B57'),
+    'salidas': colors.HexColor('#DC143C'),
+    'balance': colors.HexColor('#4169E1'),
+    'eficiencia': colors.HexColor('#4CAF50'),
+    'modos': [colors.HexColor(c) for c in ('#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4')]
+}
+
+def _chart_title(drawing, text):
+    drawing.add(String(drawing.width / 2, drawing.height - 18, text,
+                       fontName='Helvetica-Bold', fontSize=13, textAnchor='middle'))
+
+def create_vector_charts(analysis, width=6*inch, height=4*inch):
+    """
+    Crea los gráficos como dibujos vectoriales de reportlab
+    Se insertan directamente en el PDF: sin rasterizar ni archivos intermedios
+    """
+    charts = {}
     
-    # Análisis por modo
-    frame_skip_modes = defaultdict(int)
-    for item in data:
-        mode = item['stats']['frame_skip_mode']
-        frame_skip_modes[mode] += 1
+    # 1. Gráfico de barras - Entradas vs Salidas
+    conteo = analysis['conteo_personas']
+    values = [conteo['total_entradas'], conteo['total_salidas'], conteo['balance_personas']]
+    
+    drawing = Drawing(width, height)
+    _chart_title(drawing, 'Conteo de Personas - Resumen General')
+    chart = VerticalBarChart()
+    chart.x, chart.y = 50, 40
+    chart.width, chart.height = width - 80, height - 90
+    chart.data = [values]
+    chart.categoryAxis.categoryNames = ['Entradas', 'Salidas', 'Balance']
+    chart.valueAxis.valueMin = min(0, min(values))
+    chart.valueAxis.valueMax = max(1, max(values)) * 1.15
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = colors.lightgrey
+    chart.bars.strokeColor = colors.black
+    for i, name in enumerate(('entradas', 'salidas', 'balance')):
+        chart.bars[(0, i)].fillColor = CHART_COLORS[name]
+    chart.barLabelFormat = '%d'
+    chart.barLabels.nudge = 8
+    chart.barLabels.fontName = 'Helvetica-Bold'
+    drawing.add(chart)
+    charts['conteo_barras'] = drawing
     
-    # Videos con actividad
-    videos_con_movimiento = [item for item in data if item['stats']['total_movimientos'] > 0]
+    # 2. Gráfico circular - Modos de salto de frames
+    modes = analysis['modos_salto_frames']
+    if modes:
+        total = sum(modes.values())
+        drawing = Drawing(width, height)
+        _chart_title(drawing, 'Distribución de Modos de Salto de Frames')
+        pie = Pie()
+        pie.width = pie.height = height - 90
+        pie.x, pie.y = (width - pie.width) / 2, 30
+        pie.data = list(modes.values())
+        pie.labels = [f"{mode} ({count / total * 100:.1f}%)" for mode, count in modes.items()]
+        pie.startAngle = 90
+        pie.slices.strokeColor = colors.white
+        pie.slices.popout = 4
+        for i in range(len(pie.data)):
+            pie.slices[i].fillColor = CHART_COLORS['modos'][i % len(CHART_COLORS['modos'])]
+        drawing.add(pie)
+        charts['modos_pie'] = drawing
     
-    # Análisis temporal
-    timestamps = [datetime.fromisoformat(item['stats']['timestamp'].replace('Z', '+00:00')) 
-                 for item in data]
-    duracion_sesion = (max(timestamps) - min(timestamps)).total_seconds() / 60
+    # 3. Histograma - Eficiencia de procesamiento
+    histogram = analysis['rendimiento']['histograma_eficiencia']
+    edges = histogram['bordes']
+    
+    drawing = Drawing(width, height)
+    _chart_title(drawing, 'Distribución de Eficiencia de Procesamiento')
+    chart = VerticalBarChart()
+    chart.x, chart.y = 50, 50
+    chart.width, chart.height = width - 80, height - 100
+    chart.data = [histogram['conteos']]
+    chart.categoryAxis.categoryNames = [f"{edges[i]:.0f}-{edges[i + 1]:.0f}" for i in range(len(edges) - 1)]
+    chart.categoryAxis.labels.fontSize = 8
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = colors.lightgrey
+    chart.barSpacing = 0
+    chart.groupSpacing = 1
+    chart.bars[0].fillColor = CHART_COLORS['eficiencia']
+    chart.bars[0].strokeColor = colors.black
+    drawing.add(chart)
+    
+    # Línea vertical para el promedio (posición proporcional en el eje de eficiencia)
+    avg_eff = analysis['rendimiento']['eficiencia_promedio']
+    span = (edges[-1] - edges[0]) or 1
+    x = chart.x + chart.width * (avg_eff - edges[0]) / span
+    drawing.add(Line(x, chart.y, x, chart.y + chart.height,
+                     strokeColor=colors.red, strokeWidth=2, strokeDashArray=[6, 3]))
+    drawing.add(String(x + 4, chart.y + chart.height - 10, f'Promedio: {avg_eff}%',
+                       fontName='Helvetica', fontSize=9, fillColor=colors.red))
+    drawing.add(String(chart.x + chart.width / 2, 12, 'Eficiencia (%)',
+                       fontName='Helvetica', fontSize=10, textAnchor='middle'))
+    charts['eficiencia_hist'] = drawing
     
-    # Datos para gráficos
-    timeline_data = []
-    for item in data:
-        time = datetime.fromisoformat(item['stats']['timestamp'].replace('Z', '+00:00'))
-        timeline_data.append({
-            'tiempo': time.strftime('%H:%M'),
-            'entradas': item['stats']['entradas'],
-            'salidas': item['stats']['salidas'],
-            'eficiencia': item['stats']['skip_efficiency_percent']
-        })
-    
-    return {
-        'general': {
-            'total_videos': total_videos,
-            'duracion_sesion_minutos': round(duracion_sesion, 2),
-            'periodo': f"{min(timestamps).strftime('%H:%M:%S')} - {max(timestamps).strftime('%H:%M:%S')}",
-            'fecha': min(timestamps).strftime('%d/%m/%Y')
-        },
-        'conteo_personas': {
-            'total_entradas': entradas_total,
-            'total_salidas': salidas_total,
-            'total_movimientos': movimientos_total,
-            'balance_personas': entradas_total - salidas_total
-        },
-        'rendimiento': {
-            'eficiencia_promedio': round(statistics.mean(skip_efficiencies), 2),
-            'eficiencia_min': round(min(skip_efficiencies), 2),
-            'eficiencia_max': round(max(skip_efficiencies), 2),
-            'tiempo_procesamiento_promedio': round(statistics.mean(processing_times), 2),
-            'fps_promedio': round(statistics.mean(fps_processed), 2),
-            'skip_efficiencies': skip_efficiencies,
-            'processing_times': processing_times
-        },
-        'configuracion': {
-            'resolucion': data[0]['stats']['resolution'],
-            'angulo_rotacion': data[0]['stats']['rotation_angle'],
-            'posicion_linea_deteccion': data[0]['stats']['detection_line_position'],
-            'margen_linea': data[0]['stats']['line_margin']
-        },
-        'modos_salto_frames': dict(frame_skip_modes),
-        'actividad': {
-            'videos_con_movimiento': len(videos_con_movimiento),
-            'videos_sin_movimiento': total_videos - len(videos_con_movimiento),
-            'porcentaje_actividad': round((len(videos_con_movimiento) / total_videos) * 100, 2)
-        },
-        'timeline_data': timeline_data,
-        'raw_data': data
-    }
+    return charts
+
+def create_charts(analysis, backend="vector"):
+    """Crea los gráficos con el backend indicado ("vector" o "matplotlib")"""
+    if backend == "matplotlib":
+        return create_matplotlib_charts(analysis)
+    return create_vector_charts(analysis)
 
-def create_charts(analysis):
-    """Crea gráficos usando matplotlib"""
+def create_matplotlib_charts(analysis):
+    """Crea gráficos usando matplotlib (opcional; se rasterizan como PNG)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
     charts = {}
     
     # Configurar estilo
@@ -187,8 +466,9 @@ def create_charts(analysis):
     # 3. Histograma - Eficiencia de procesamiento
     fig, ax = plt.subplots(figsize=(10, 6))
     
-    ax.hist(analysis['rendimiento']['skip_efficiencies'], bins=10, 
-            color='#4CAF50', alpha=0.7, edgecolor='black', linewidth=1)
+    histogram = analysis['rendimiento']['histograma_eficiencia']
+    ax.stairs(histogram['conteos'], histogram['bordes'], fill=True,
+              color='#4CAF50', alpha=0.7, edgecolor='black', linewidth=1)
     ax.set_title('Distribución de Eficiencia de Procesamiento', fontsize=16, fontweight='bold', pad=20)
     ax.set_xlabel('Eficiencia (%)', fontsize=12)
     ax.set_ylabel('Frecuencia', fontsize=12)
@@ -206,6 +486,47 @@ def create_charts(analysis):
     
     return charts
 
+def chart_inputs_key(analysis, backend):
+    """Hash de los agregados que dibujan los gráficos (clave del caché de gráficos)"""
+    inputs = {
+        'backend': backend,
+        'conteo': analysis['conteo_personas'],
+        'modos': analysis['modos_salto_frames'],
+        'histograma': analysis['rendimiento']['histograma_eficiencia'],
+        'eficiencia_promedio': analysis['rendimiento']['eficiencia_promedio']
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()[:24]
+
+def render_charts(analysis, backend="vector", cache_dir=None):
+    """
+    Gráficos listos para el PDF: Drawing (vector) o bytes PNG (matplotlib)
+    Los PNG se guardan en cache_dir por hash de sus datos; si los datos no
+    cambiaron, no se vuelve a dibujar ni rasterizar nada
+    """
+    if backend != "matplotlib":
+        # Los gráficos vectoriales se construyen en milisegundos: no se cachean
+        return create_vector_charts(analysis)
+    
+    names = ('conteo_barras', 'modos_pie', 'eficiencia_hist')
+    key = chart_inputs_key(analysis, backend)
+    if cache_dir is not None:
+        cache_dir = Path(cache_dir) / 'graficos'
+        paths = {name: cache_dir / f"{key}_{name}.png" for name in names}
+        if all(path.exists() for path in paths.values()):
+            return {name: path.read_bytes() for name, path in paths.items()}
+    
+    charts = {name: save_chart_to_bytes(fig).getvalue()
+              for name, fig in create_charts(analysis, backend).items()}
+    
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for name, data in charts.items():
+            # Temporal por proceso: dos reportes del pool pueden tener el mismo gráfico
+            tmp_path = paths[name].with_suffix(f'.{os.getpid()}.tmp')
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, paths[name])
+    return charts
+
 def save_chart_to_bytes(fig):
     """Convierte un gráfico matplotlib a bytes para ReportLab"""
     img_buffer = io.BytesIO()
@@ -213,7 +534,7 @@ def save_chart_to_bytes(fig):
     img_buffer.seek(0)
     return img_buffer
 
-def create_pdf_report(analysis, output_filename):
+def create_pdf_report(analysis, output_filename, chart_backend="vector", chart_cache_dir=None):
     """Crea el reporte PDF profesional"""
     
     # Crear documento
@@ -357,21 +678,52 @@ def create_pdf_report(analysis, output_filename):
     story.append(config_table)
     story.append(Spacer(1, 20))
     
+    # Tráfico por día y por hora (acumulados)
+    traffic = analysis.get('trafico')
+    if traffic:
+        story.append(Paragraph("🕒 TRÁFICO POR DÍA Y HORA", subtitle_style))
+        story.append(Paragraph(f"Cámaras: {', '.join(traffic['camaras'])}", normal_style))
+        
+        traffic_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+        ])
+        
+        for title, rows, label in (("Por día", traffic['por_dia'], lambda r: r['inicio'][:10]),
+                                   ("Por hora (último día)", traffic['por_hora'], lambda r: r['inicio'][11:16])):
+            table_data = [[title, 'Entradas', 'Salidas', 'Dir. +', 'Dir. -', 'Segmentos']]
+            for row in rows:
+                table_data.append([label(row), str(row['entradas']), str(row['salidas']),
+                                   str(row['direccion_positiva']), str(row['direccion_negativa']),
+                                   str(row['segmentos'])])
+            traffic_table = Table(table_data, colWidths=[1.6*inch] + [0.9*inch] * 5)
+            traffic_table.setStyle(traffic_style)
+            story.append(traffic_table)
+            story.append(Spacer(1, 15))
+        story.append(Spacer(1, 15))
+    
     # Generar gráficos
     print("📊 Generando gráficos...")
-    charts = create_charts(analysis)
+    charts = render_charts(analysis, chart_backend, chart_cache_dir)
     
     # Añadir gráficos al PDF
     if charts:
         story.append(Paragraph("📊 ANÁLISIS GRÁFICO", subtitle_style))
         
-        for chart_name, fig in charts.items():
-            chart_buffer = save_chart_to_bytes(fig)
-            
-            # Crear imagen para ReportLab
-            from reportlab.platypus import Image as RLImage
-            chart_img = RLImage(chart_buffer, width=6*inch, height=4*inch)
-            story.append(chart_img)
+        for chart_name, chart in charts.items():
+            if isinstance(chart, Drawing):
+                # Gráfico vectorial: es un flowable de reportlab
+                story.append(chart)
+            else:
+                # Crear imagen para ReportLab desde el PNG
+                chart_img = Image(io.BytesIO(chart), width=6*inch, height=4*inch)
+                story.append(chart_img)
             story.append(Spacer(1, 20))
     
     # Pie de página con timestamp
@@ -391,38 +743,224 @@ def create_pdf_report(analysis, output_filename):
     doc.build(story)
     print(f"✅ Reporte PDF generado: {output_filename}")
 
+def day_fingerprint(rollups, camera, day):
+    """
+    Huella de los datos de un día y cámara tomada de los acumulados diarios
+    Si no cambia, el análisis cacheado de ese día sigue siendo válido
+    """
+    if rollups is None:
+        return None
+    rows = rollups.query("day", start=day, end=day + timedelta(days=1), camera=camera)
+    if not rows:
+        return None
+    return hashlib.sha256(json.dumps(rows, sort_keys=True).encode('utf-8')).hexdigest()[:24]
+
+def _build_report_job(analysis, output_filename, chart_backend, chart_cache_dir, traffic_db, camera, day):
+    """Genera un reporte (se ejecuta en un proceso del pool)"""
+    import contextlib
+    
+    traffic = load_traffic(traffic_db, camera=camera, start=day, end=day + timedelta(days=1))
+    if traffic:
+        analysis['trafico'] = traffic
+    
+    Path(output_filename).parent.mkdir(parents=True, exist_ok=True)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        create_pdf_report(analysis, output_filename, chart_backend, chart_cache_dir)
+    return output_filename
+
+def default_camera_id():
+    """Cámara a la que los acumulados atribuyen las entradas sin campo 'camera' (CAMERA_ID)"""
+    try:
+        import config
+        return getattr(config, 'CAMERA_ID', "camara_1")
+    except ImportError:
+        return "camara_1"
+
+def batch_reports(input_file, start, end, cameras=None, output_dir='reportes',
+                  chart_backend="vector", workers=None, cache_dir='./stats/report_cache'):
+    """
+    Reportes diarios por cámara en lote
+    
+    - El análisis de cada (cámara, día) se cachea junto a la huella de sus
+      acumulados diarios: los días sin cambios no vuelven a leer las estadísticas
+    - Los días pendientes se analizan juntos en una sola pasada del archivo
+    - Los PDF se generan en paralelo en un pool de procesos
+    """
+    cache_dir = Path(cache_dir)
+    analysis_dir = cache_dir / 'analisis'
+    analysis_dir.mkdir(parents=True, exist_ok=True)
+    traffic_db = Path(input_file).parent / 'rollups.sqlite3'
+    # Mismo criterio que los acumulados para entradas sin cámara (históricas o migradas)
+    default_camera = default_camera_id()
+    rollups = TrafficRollups(traffic_db, camera_id=default_camera) if traffic_db.exists() else None
+    
+    try:
+        if not cameras:
+            cameras = rollups.cameras() if rollups is not None else None
+        
+        days = []
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day < end:
+            days.append(day)
+            day += timedelta(days=1)
+        
+        # 1. Análisis cacheados cuya huella no cambió
+        analyses = {}
+        fingerprints = {}
+        pending = set()
+        reused = 0
+        for camera in cameras or []:
+            for day in days:
+                key = (camera, day)
+                fingerprint = day_fingerprint(rollups, camera, day)
+                fingerprints[key] = fingerprint
+                cache_path = analysis_dir / f"{camera}_{day:%Y-%m-%d}.json"
+                if fingerprint is not None and cache_path.exists():
+                    with open(cache_path, 'r', encoding='utf-8') as f:
+                        cached = json.load(f)
+                    if cached.get('huella') == fingerprint:
+                        analyses[key] = cached['analisis']
+                        reused += 1
+                        continue
+                if fingerprint is not None or rollups is None:
+                    pending.add(key)
+        
+        # 2. Una sola pasada para todos los días pendientes
+        if pending or cameras is None:
+            print(f"🔍 Analizando {len(pending) if cameras else 'todos los'} días pendientes...")
+            analyzers = {}
+            data = load_data(input_file)
+            for time, item in iter_filtered(data or [], start, end):
+                key = (item.get('camera') or default_camera,
+                       time.replace(hour=0, minute=0, second=0, microsecond=0))
+                if cameras is not None and key not in pending:
+                    continue
+                if key not in analyzers:
+                    analyzers[key] = ReportAnalyzer(key[0])
+                analyzers[key].add(time, item)
+            
+            for key, analyzer in analyzers.items():
+                analysis = analyzer.result()
+                if analysis is None:
+                    continue
+                analyses[key] = analysis
+                fingerprint = fingerprints.get(key) or day_fingerprint(rollups, *key)
+                if fingerprint is not None:
+                    cache_path = analysis_dir / f"{key[0]}_{key[1]:%Y-%m-%d}.json"
+                    tmp_path = cache_path.with_suffix('.tmp')
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump({'huella': fingerprint, 'analisis': analysis}, f)
+                    os.replace(tmp_path, cache_path)
+        
+        print(f"♻️ Análisis reutilizados del caché: {reused}")
+    finally:
+        if rollups is not None:
+            rollups.close()
+    
+    if not analyses:
+        print("❌ No hay estadísticas para el rango/cámaras indicados")
+        return []
+    
+    # 3. Generación de PDF en paralelo
+    print(f"📝 Generando {len(analyses)} reportes con {workers or os.cpu_count()} procesos...")
+    generated = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_build_report_job, analysis,
+                        str(Path(output_dir) / camera / f"reporte_{camera}_{day:%Y%m%d}.pdf"),
+                        chart_backend, str(cache_dir), str(traffic_db), camera, day): (camera, day)
+            for (camera, day), analysis in sorted(analyses.items())
+        }
+        for future in as_completed(futures):
+            camera, day = futures[future]
+            try:
+                generated.append(future.result())
+                print(f"   ✅ {camera} {day:%d/%m/%Y}")
+            except Exception as e:
+                print(f"   ❌ {camera} {day:%d/%m/%Y}: {e}")
+    
+    return sorted(generated)
+
+def parse_date_arg(value, end_of_range=False):
+    """Fecha de la línea de comandos: AAAA-MM-DD (día completo) o ISO con hora"""
+    moment = datetime.fromisoformat(value)
+    if end_of_range and len(value) <= 10:
+        moment += timedelta(days=1)  # --hasta con solo fecha incluye ese día
+    return moment
+
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Genera el reporte PDF de conteo de personas")
+    parser.add_argument("--entrada", default=None,
+                        help="Archivo de estadísticas (por defecto ./stats/counting_stats.jsonl)")
+    parser.add_argument("--desde", default=None, help="Inicio del rango: AAAA-MM-DD o AAAA-MM-DDTHH:MM")
+    parser.add_argument("--hasta", default=None, help="Fin del rango (incluido si es solo fecha)")
+    parser.add_argument("--camara", default=None, help="Solo esta cámara (CAMERA_ID)")
+    parser.add_argument("--graficos", choices=CHART_BACKENDS, default="vector",
+                        help="Backend de gráficos: vector (nativo, por defecto) o matplotlib (PNG)")
+    parser.add_argument("--lote", action="store_true",
+                        help="Un reporte por cámara y día del rango (por defecto: ayer)")
+    parser.add_argument("--camaras", nargs="*", default=None,
+                        help="Cámaras del lote (por defecto todas las de los acumulados)")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del lote (por defecto CPUs)")
+    parser.add_argument("--salida-dir", default="reportes", help="Directorio de los reportes del lote")
+    args = parser.parse_args()
+    
+    start = parse_date_arg(args.desde) if args.desde else None
+    end = parse_date_arg(args.hasta, end_of_range=True) if args.hasta else None
+    
     print("🎬 Generador de Reporte PDF - Análisis de Videos")
     print("=" * 50)
     
     # Verificar e instalar dependencias
     try:
-        install_requirements()
+        install_requirements(args.graficos)
     except Exception as e:
         print(f"⚠️ Error instalando dependencias: {e}")
-        print("Por favor, instala manualmente: pip install reportlab matplotlib seaborn")
+        if args.graficos == "matplotlib":
+            print("Por favor, instala manualmente: pip install reportlab matplotlib seaborn")
+        else:
+            print("Por favor, instala manualmente: pip install reportlab")
         return
     
     # Configuración
-    input_file = './stats/counting_stats.json'
+    input_file = args.entrada or './stats/counting_stats.jsonl'
+    if not args.entrada and not Path(input_file).exists() and Path('./stats/counting_stats.json').exists():
+        input_file = './stats/counting_stats.json'
     output_file = f'reporte_videos_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
     
+    if args.lote:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = start or (end or today) - timedelta(days=1)
+        end = end or start + timedelta(days=1)
+        cameras = args.camaras or ([args.camara] if args.camara else None)
+        generated = batch_reports(input_file, start, end, cameras, args.salida_dir,
+                                  args.graficos, args.procesos)
+        print(f"\n🎉 {len(generated)} reportes generados en {args.salida_dir}/")
+        return
+    
     # Cargar y analizar datos
     print("📂 Cargando datos...")
     data = load_data(input_file)
-    if not data:
+    if data is None:
         return
     
     print("🔍 Analizando estadísticas...")
-    analysis = analyze_data(data)
+    if start or end or args.camara:
+        print(f"   Filtro: {args.desde or 'inicio'} → {args.hasta or 'fin'} | Cámara: {args.camara or 'todas'}")
+    analysis = analyze_data(data, start=start, end=end, camera=args.camara)
     if not analysis:
-        print("❌ Error en el análisis de datos")
+        print("❌ No hay estadísticas en el rango/cámara indicados")
         return
     
+    traffic = load_traffic(Path(input_file).parent / 'rollups.sqlite3', camera=args.camara,
+                           start=start, end=end)
+    if traffic:
+        analysis['trafico'] = traffic
+    
     # Generar reporte PDF
     try:
-        create_pdf_report(analysis, output_file)
+        create_pdf_report(analysis, output_file, chart_backend=args.graficos)
         print(f"\n🎉 ¡Reporte completado exitosamente!")
         print(f"📄 Archivo generado: {output_file}")
         print(f"📊 Videos analizados: {analysis['general']['total_videos']}")
@@ -0,0 +1,220 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+# Granularidades disponibles: nombre -> formato del inicio del intervalo
+GRANULARITIES = {
+    "minute": "%Y-%m-%dT%H:%M:00",
+    "hour": "%Y-%m-%dT%H:00:00",
+    "day": "%Y-%m-%dT00:00:00",
+}
+
+# Métricas acumuladas por intervalo (mismos nombres que en las estadísticas)
+METRICS = (
+    "segmentos",
+    "entradas",
+    "salidas",
+    "direccion_positiva",
+    "direccion_negativa",
+    "frames_procesados",
+    "frames_saltados",
+    "duracion_video_segundos",
+)
+
+
+def bucket_start(moment, granularity):
+    """Inicio del intervalo (texto ISO, hora local) que contiene a moment"""
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment.replace('Z', '+00:00'))
+    return moment.strftime(GRANULARITIES[granularity])
+
+
+def entry_metrics(entry):
+    """Extrae las métricas de una entrada de estadísticas (igual que en el resumen)"""
+    stats = entry.get('stats', {})
+    metrics = dict.fromkeys(METRICS, 0)
+    metrics["segmentos"] = 1
+
+    if stats.get('counting_mode') == 'entrance_exit':
+        metrics["entradas"] = stats.get('entradas', 0)
+        metrics["salidas"] = stats.get('salidas', 0)
+    else:
+        metrics["direccion_positiva"] = stats.get('derecha', 0) + stats.get('abajo', 0)
+        metrics["direccion_negativa"] = stats.get('izquierda', 0) + stats.get('arriba', 0)
+
+    if stats.get('frame_skipping_enabled', False):
+        metrics["frames_procesados"] = stats.get('frames_processed', 0)
+        metrics["frames_saltados"] = stats.get('frames_skipped', 0)
+    else:
+        metrics["frames_procesados"] = stats.get('total_frames', 0)
+
+    metrics["duracion_video_segundos"] = stats.get('video_duration_seconds', 0)
+    return metrics
+
+
+class TrafficRollups:
+    """
+    Acumulados de tráfico por minuto, hora y día en SQLite (modo WAL)
+
+    Cada segmento guardado suma sus métricas en las tres granularidades dentro
+    de una sola transacción, así las consultas por rango leen unas pocas filas
+    indexadas en vez de recorrer todo el historial de estadísticas.
+    Los segmentos quedan registrados por (cámara, video, processed_at): volver a
+    agregar el mismo segmento (p. ej. al reconstruir) no lo cuenta dos veces.
+    """
+
+    def __init__(self, db_path="stats/rollups.sqlite3", camera_id="camara_1"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.camera_id = camera_id
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        metric_columns = ", ".join(f"{name} REAL NOT NULL DEFAULT 0" for name in METRICS)
+        with self._conn:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS rollups (
+                    camera TEXT NOT NULL,
+                    granularity TEXT NOT NULL,
+                    bucket_start TEXT NOT NULL,
+                    {metric_columns},
+                    PRIMARY KEY (camera, granularity, bucket_start)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS rolled_segments (
+                    camera TEXT NOT NULL,
+                    video TEXT NOT NULL,
+                    processed_at TEXT NOT NULL,
+                    PRIMARY KEY (camera, video, processed_at)
+                ) WITHOUT ROWID
+            """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM rolled_segments LIMIT 1").fetchone() is None
+
+    def _add_entry(self, entry, camera):
+        """Suma una entrada (dentro de una transacción abierta); False si ya estaba"""
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO rolled_segments (camera, video, processed_at) VALUES (?, ?, ?)",
+            (camera, entry.get('video', ''), entry.get('processed_at', '')))
+        if cursor.rowcount == 0:
+            return False
+
+        # El instante del segmento es el inicio estimado de la grabación (la misma base
+        # que el registro de eventos); las entradas antiguas usan cuándo se contó
+        moment = (entry.get('capture_start') or entry.get('stats', {}).get('timestamp')
+                  or entry.get('processed_at'))
+        if not moment:
+            return False
+        metrics = entry_metrics(entry)
+
+        columns = ", ".join(METRICS)
+        placeholders = ", ".join("?" for _ in METRICS)
+        updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in METRICS)
+        values = [metrics[name] for name in METRICS]
+        for granularity in GRANULARITIES:
+            self._conn.execute(
+                f"INSERT INTO rollups (camera, granularity, bucket_start, {columns}) "
+                f"VALUES (?, ?, ?, {placeholders}) "
+                f"ON CONFLICT (camera, granularity, bucket_start) DO UPDATE SET {updates}",
+                [camera, granularity, bucket_start(moment, granularity)] + values)
+        return True
+
+    def record_segment(self, entry, camera=None):
+        """Agrega un segmento a los acumulados (una transacción, costo constante)"""
+        camera = camera or entry.get('camera') or self.camera_id
+        with self._lock, self._conn:
+            return self._add_entry(entry, camera)
+
+    def rebuild_from(self, entries, batch_size=500):
+        """Agrega entradas existentes (p. ej. el historial JSON Lines) en lotes"""
+        added = 0
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                added += self._add_batch(batch)
+                batch = []
+        if batch:
+            added += self._add_batch(batch)
+        return added
+
+    def _add_batch(self, entries):
+        with self._lock, self._conn:
+            return sum(self._add_entry(entry, entry.get('camera') or self.camera_id)
+                       for entry in entries)
+
+    def query(self, granularity="hour", start=None, end=None, camera=None):
+        """
+        Intervalos de una granularidad en [start, end) ordenados por tiempo
+        start/end: datetime o texto ISO (None = sin límite)
+        camera: id de cámara, None = la de este almacén, "*" = todas (sumadas)
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidad inválida: {granularity} (usa {', '.join(GRANULARITIES)})")
+
+        conditions = ["granularity = ?"]
+        params = [granularity]
+        if camera != "*":
+            conditions.append("camera = ?")
+            params.append(camera or self.camera_id)
+        if start is not None:
+            conditions.append("bucket_start >= ?")
+            params.append(bucket_start(start, granularity))
+        if end is not None:
+            conditions.append("bucket_start < ?")
+            params.append(end.isoformat(timespec="seconds") if isinstance(end, datetime) else end)
+
+        sums = ", ".join(f"SUM({name}) AS {name}" for name in METRICS)
+        sql = (f"SELECT bucket_start, {sums} FROM rollups WHERE {' AND '.join(conditions)} "
+               f"GROUP BY bucket_start ORDER BY bucket_start")
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def totals(self, start=None, end=None, camera=None):
+        """Totales del rango (usa la granularidad diaria si el rango es de días completos)"""
+        granularity = "hour"
+        if start is None and end is None:
+            granularity = "day"
+        elif all(value is None or bucket_start(value, "day") == bucket_start(value, "minute")
+                 for value in (start, end)):
+            granularity = "day"
+
+        totals = dict.fromkeys(METRICS, 0)
+        for row in self.query(granularity, start, end, camera):
+            for name in METRICS:
+                totals[name] += row[name]
+        return totals
+
+    def last_hours(self, hours=24, camera=None):
+        """Intervalos horarios de las últimas horas (incluida la actual)"""
+        start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+        return self.query("hour", start=start, camera=camera)
+
+    def cameras(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT camera FROM rollups ORDER BY camera").fetchall()
+        return [row["camera"] for row in rows]
+
+    @staticmethod
+    def _row_to_dict(row):
+        result = {"inicio": row["bucket_start"]}
+        for name in METRICS:
+            value = row[name] or 0
+            result[name] = int(value) if name != "duracion_video_segundos" else round(value, 2)
+        return result
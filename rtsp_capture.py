@@ -55,6 +55,7 @@ class RTSPVideoCapture:
         # Control de reinicio automático
         self.auto_restart_count = 0
         self.last_restart_time = 0
+        self.total_restarts = 0  # auto_restart_count se reinicia cada hora
         
         print("🚀 Sistema con FFmpeg ROBUSTO + Relanzamiento automático CONFIGURABLE")
         print("📝 FFmpeg se reconectará automáticamente según configuración")
@@ -280,6 +281,7 @@ class RTSPVideoCapture:
             return False
         
         self.auto_restart_count += 1
+        self.total_restarts += 1
         self.last_restart_time = time.time()
         
         print(f"🔄 Auto-reinicio #{self.auto_restart_count} por {reason}")
@@ -364,6 +366,28 @@ class RTSPVideoCapture:
             "auto_restart_count": self.auto_restart_count
         }
     
+    def get_metrics(self):
+        """
+        Muestras para el endpoint de métricas (metrics_server)
+        Solo lee atributos: no recorre el directorio de salida
+        """
+        ffmpeg_running = self.ffmpeg_process is not None and self.ffmpeg_process.returncode is None
+        return [
+            ("person_counter_segments_captured_total", "counter",
+             "Segmentos de video completos entregados a la cola", self.video_counter - 1, None),
+            ("person_counter_queue_depth", "gauge",
+             "Segmentos en cola esperando procesamiento", self.video_queue.qsize(), None),
+            ("person_counter_ffmpeg_restarts_total", "counter",
+             "Reinicios automáticos de FFmpeg", self.total_restarts, None),
+            ("person_counter_ffmpeg_running", "gauge",
+             "1 si el proceso FFmpeg está activo", ffmpeg_running, None),
+            ("person_counter_capturing", "gauge",
+             "1 si la captura continua está activa", self.is_capturing, None),
+            ("person_counter_seconds_since_last_segment", "gauge",
+             "Segundos desde el último segmento o actividad de captura",
+             round(time.time() - self.last_activity_time, 1), None),
+        ]
+
     def print_detailed_status(self):
         """Estado detallado del sistema"""
         status = self.get_queue_status()
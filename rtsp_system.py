@@ -1,4 +1,5 @@
 import asyncio
+from metrics_server import MetricsServer
 from rtsp_capture import RTSPVideoCapture
 from video_processor import VideoProcessor
 
@@ -14,6 +15,20 @@ class RTSPSystem:
         self.processor = VideoProcessor()
         self.processing_enabled = True
         self.exit_requested = False
+        
+        # Endpoint de métricas Prometheus (hilo propio, lee contadores existentes)
+        self.metrics_server = None
+        import config
+        if getattr(config, 'ENABLE_METRICS_SERVER', False):
+            self.metrics_server = MetricsServer(
+                host=getattr(config, 'METRICS_HOST', "127.0.0.1"),
+                port=getattr(config, 'METRICS_PORT', 9108),
+                labels={"camera": self.processor.camera_id}
+            )
+            self.metrics_server.register(self.capture_system.get_metrics)
+            self.metrics_server.register(self.processor.get_metrics)
+            if not self.metrics_server.start():
+                self.metrics_server = None
     
     async def run_capture_and_process(self, video_duration=600, max_videos=None, 
                                     process_videos=True, show_live=True):
@@ -53,6 +68,13 @@ class RTSPSystem:
             for task in tasks:
                 task.cancel()
         
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.processor.preview_server is not None:
+            self.processor.preview_server.stop()
+        if self.processor.config_watcher is not None:
+            self.processor.config_watcher.stop()
+        
         # Mostrar resumen final
         self.processor.print_summary()
         print("👋 Sistema finalizado")
@@ -111,6 +133,14 @@ class RTSPSystem:
         """
         Procesa videos existentes en el directorio
         """
+        try:
+            await self._process_existing_videos(videos_dir, show_live)
+        finally:
+            # El vigilante de configuración se inicia con el procesador: detenerlo al terminar
+            if self.processor.config_watcher is not None:
+                self.processor.config_watcher.stop()
+    
+    async def _process_existing_videos(self, videos_dir, show_live):
         from pathlib import Path
         
         videos_dir = Path(videos_dir)
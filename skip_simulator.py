@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Simulador de políticas de frame skipping sobre detecciones grabadas
+Graba una vez las detecciones de todos los frames (frame skipping apagado) y
+luego reproduce cualquier política contra esa grabación, sin YOLO: la
+política decide frame a frame si "procesar"; solo esos frames llegan al
+conteo. Reporta cruces perdidos respecto de procesar todo y frames ahorrados.
+
+Una política es cualquier objeto con:
+    should_process_frame() -> bool
+    update_frame_skip_mode(has_detections)
+    reset_counters() o reset()    (opcional, se llama al inicio de cada segmento)
+FlexiblePersonCounter cumple esa interfaz (es la política actual).
+
+Limitación: los IDs de track son los del tracker a tasa completa; con el
+detector corriendo en menos frames el tracker real puede perder algún ID
+más. El resultado es una cota optimista de los cruces perdidos.
+
+Uso:
+    python skip_simulator.py --video videos/*.mp4 --cache stats/detecciones_completas
+    python skip_simulator.py --cache stats/detecciones_completas --skips 0,1,2 --skips-sin-deteccion 5,10
+    python skip_simulator.py --cache stats/detecciones_completas --politica mis_politicas:SkipPorMovimiento --parametros '{"umbral": 3}'
+"""
+
+import argparse
+import importlib
+import io
+import itertools
+import json
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+import config
+from accuracy_harness import match_events
+from detection_cache import iter_cached_segments
+from flexible_person_counter import FlexiblePersonCounter
+from line_sweep import detection_pass
+
+
+class FixedSkipPolicy:
+    """Política de referencia: procesa 1 de cada skip + 1 frames, sin mirar las detecciones"""
+
+    def __init__(self, skip=0):
+        self.skip = skip
+        self.frame_counter = 0
+
+    def reset(self):
+        self.frame_counter = 0
+
+    def should_process_frame(self):
+        self.frame_counter += 1
+        return self.frame_counter % (self.skip + 1) == 0
+
+    def update_frame_skip_mode(self, has_detections):
+        pass
+
+
+def build_counter(model_path=None):
+    """Contador sin detector con la línea y el modo de config.py"""
+    orientation = config.LINE_ORIENTATION.lower()
+    with redirect_stdout(io.StringIO()):
+        return FlexiblePersonCounter(
+            model_path=model_path,
+            target_width=config.TARGET_WIDTH,
+            rotation_angle=config.ROTATION_ANGLE,
+            line_orientation=orientation,
+            detection_line_position=getattr(config, 'DETECTION_LINE_X' if orientation == "vertical"
+                                            else 'DETECTION_LINE_Y', None),
+            detection_line_ratio=getattr(config, 'DETECTION_LINE_RATIO', None),
+            line_margin=config.LINE_MARGIN,
+            entrance_direction=config.ENTRANCE_DIRECTION,
+            counting_mode=config.COUNTING_MODE,
+            line_start=getattr(config, 'DETECTION_LINE_START', None),
+            line_end=getattr(config, 'DETECTION_LINE_END', None)
+        )
+
+
+def current_policy(skip, no_detection_skip, threshold):
+    """La lógica de FlexiblePersonCounter con otros parámetros (contador sin detector)"""
+    policy = build_counter()
+    with redirect_stdout(io.StringIO()):
+        policy.configure_frame_skipping(enable=True, default_skip=skip, no_detection_skip=no_detection_skip,
+                                        no_detection_threshold=threshold, show_info=False)
+    return policy
+
+
+def load_policy(spec, params):
+    """'modulo:Clase' → instancia con los parámetros dados (dict JSON)"""
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"La política debe tener la forma modulo:Clase ({spec})")
+    policy_class = getattr(importlib.import_module(module_name), class_name)
+    return policy_class(**params)
+
+
+def full_rate_recording(segment):
+    """True si el segmento se grabó con el detector en todos los frames"""
+    return not segment.meta.get("params", {}).get("enable_frame_skipping", True)
+
+
+def simulate_segment(segment, policy, counter):
+    """
+    Reproduce un segmento con la política: misma secuencia que process_frame
+    (decidir, contar si se procesa, actualizar el modo)
+    Returns: (frames procesados, frames del segmento, cruces [(frame, tipo)])
+    """
+    by_frame = {frame: (boxes, ids, confs) for frame, boxes, ids, confs in segment.iter_frames()}
+    no_detections = (np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.int32),
+                     np.empty(0, dtype=np.float32))
+    total_frames = int(segment.processed_frames.max()) + 1 if len(segment.processed_frames) else 0
+
+    with redirect_stdout(io.StringIO()):
+        reset = getattr(policy, "reset_counters", None) or getattr(policy, "reset", None)
+        if reset is not None:
+            reset()
+        counter.reset_counters()
+        counter.set_detection_line(*segment.frame_size)
+
+        processed = 0
+        crossings = []
+        for frame_index in range(total_frames):
+            if not policy.should_process_frame():
+                policy.update_frame_skip_mode(False)
+                continue
+            processed += 1
+            counter.last_crossings = []
+            has_detections = counter.count_detections(*by_frame.get(frame_index, no_detections))
+            for _track_id, direction, kind, _position in counter.last_crossings:
+                crossings.append((frame_index, kind or direction))
+            policy.update_frame_skip_mode(has_detections)
+
+    return processed, total_frames, crossings
+
+
+def evaluate_policy(name, policy, segments, baselines, counter, tolerance_seconds):
+    """Frames ahorrados y cruces perdidos/extra de una política sobre todos los segmentos"""
+    frames = processed = baseline_total = simulated_total = matched = count_error = 0
+    start = time.perf_counter()
+    for segment, baseline in zip(segments, baselines):
+        segment_processed, segment_frames, crossings = simulate_segment(segment, policy, counter)
+        frames += segment_frames
+        processed += segment_processed
+        tolerance = tolerance_seconds * (segment.meta.get("fps") or 25)
+        for kind in {k for _, k in baseline} | {k for _, k in crossings}:
+            expected = [f for f, k in baseline if k == kind]
+            got = [f for f, k in crossings if k == kind]
+            matched += match_events(expected, got, tolerance)
+            count_error += abs(len(got) - len(expected))
+        baseline_total += len(baseline)
+        simulated_total += len(crossings)
+
+    return {
+        "politica": name,
+        "frames": frames,
+        "frames_procesados": processed,
+        "frames_ahorrados_pct": round(100 * (1 - processed / frames), 2) if frames else 0,
+        "cruces_base": baseline_total,
+        "cruces": simulated_total,
+        "cruces_perdidos": baseline_total - matched,
+        "cruces_extra": simulated_total - matched,
+        "error_conteo": count_error,
+        "segundos_simulacion": round(time.perf_counter() - start, 3),
+    }
+
+
+def parse_list(value):
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de políticas de frame skipping (sin YOLO)")
+    parser.add_argument("--cache", default=getattr(config, 'DETECTION_CACHE_DIR', "stats/detections"),
+                        help="Directorio con grabaciones a tasa completa (frame skipping apagado)")
+    parser.add_argument("--video", nargs="*", help="Grabar primero estos videos en --cache (corre YOLO una vez)")
+    parser.add_argument("--skips", default=str(getattr(config, 'DEFAULT_FRAME_SKIP', 1)),
+                        help="DEFAULT_FRAME_SKIP de la política actual a simular (a,b,c)")
+    parser.add_argument("--skips-sin-deteccion", default=str(getattr(config, 'NO_DETECTION_FRAME_SKIP', 5)),
+                        help="NO_DETECTION_FRAME_SKIP a simular")
+    parser.add_argument("--umbrales-sin-deteccion", default=str(getattr(config, 'NO_DETECTION_THRESHOLD', 10)),
+                        help="NO_DETECTION_THRESHOLD a simular")
+    parser.add_argument("--fijos", default="", help="Políticas de skip fijo de referencia (a,b,c)")
+    parser.add_argument("--politica", action="append", default=[], help="Política propia modulo:Clase (repetible)")
+    parser.add_argument("--parametros", default="{}", help="Parámetros JSON para las políticas propias")
+    parser.add_argument("--tolerancia", type=float, default=1.0,
+                        help="Segundos para considerar que un cruce simulado es el mismo de la base")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    args = parser.parse_args()
+
+    if args.video:
+        print(f"🎬 Grabando detecciones a tasa completa de {len(args.video)} videos...")
+        detection_pass(args.video, args.cache, frame_skipping=False)
+
+    segments = [segment for segment in iter_cached_segments(args.cache) if full_rate_recording(segment)]
+    if not segments:
+        print(f"❌ No hay grabaciones a tasa completa en {args.cache} (usar --video o "
+              f"ENABLE_FRAME_SKIPPING = False con ENABLE_DETECTION_CACHE = True)")
+        return 1
+
+    counter = build_counter()
+    # Base: todos los frames procesados
+    baselines = [simulate_segment(segment, FixedSkipPolicy(0), counter)[2] for segment in segments]
+
+    policies = [(f"actual skip {skip}/{no_detection_skip} umbral {threshold}",
+                 current_policy(skip, no_detection_skip, threshold))
+                for skip, no_detection_skip, threshold in itertools.product(
+                    parse_list(args.skips), parse_list(args.skips_sin_deteccion),
+                    parse_list(args.umbrales_sin_deteccion))]
+    policies += [(f"fijo skip {skip}", FixedSkipPolicy(skip)) for skip in parse_list(args.fijos)]
+    params = json.loads(args.parametros)
+    policies += [(spec, load_policy(spec, params)) for spec in args.politica]
+
+    total_frames = sum(len(segment.processed_frames) for segment in segments)
+    print(f"🧪 {len(policies)} políticas sobre {len(segments)} segmentos ({total_frames} frames, "
+          f"{sum(len(b) for b in baselines)} cruces a tasa completa)")
+
+    results = [evaluate_policy(name, policy, segments, baselines, counter, args.tolerancia)
+               for name, policy in policies]
+    results.sort(key=lambda r: (r["cruces_perdidos"], -r["frames_ahorrados_pct"]))
+
+    print(f"\n{'política':40s} {'ahorro':>7} {'perdidos':>8} {'extra':>5} {'error':>5} {'seg':>6}")
+    for r in results:
+        print(f"{r['politica']:40s} {r['frames_ahorrados_pct']:>6.1f}% {r['cruces_perdidos']:>8} "
+              f"{r['cruces_extra']:>5} {r['error_conteo']:>5} {r['segundos_simulacion']:>6.2f}")
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump({"segmentos": len(segments), "frames": total_frames,
+                       "tolerancia_segundos": args.tolerancia, "politicas": results}, f, indent=2)
+        print(f"💾 Resultado guardado en {args.salida}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
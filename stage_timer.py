@@ -0,0 +1,104 @@
+import math
+
+
+# Histograma logarítmico fijo: 10 intervalos por década entre 1 µs y 10 s.
+# Bordes fijos = histogramas de distintos segmentos se pueden sumar
+HISTOGRAM_MIN_SECONDS = 1e-6
+BINS_PER_DECADE = 10
+HISTOGRAM_BINS = 7 * BINS_PER_DECADE
+
+
+def bin_index(seconds):
+    if seconds <= HISTOGRAM_MIN_SECONDS:
+        return 0
+    index = int(math.log10(seconds / HISTOGRAM_MIN_SECONDS) * BINS_PER_DECADE)
+    return min(index, HISTOGRAM_BINS - 1)
+
+
+def bin_center_ms(index):
+    """Centro geométrico del intervalo en milisegundos"""
+    return HISTOGRAM_MIN_SECONDS * 10 ** ((index + 0.5) / BINS_PER_DECADE) * 1000
+
+
+def histogram_percentile(counts, quantile):
+    """Percentil aproximado (ms) de un histograma completo (lista de HISTOGRAM_BINS conteos)"""
+    total = sum(counts)
+    if not total:
+        return 0.0
+    target = quantile * total
+    cumulative = 0
+    for index, count in enumerate(counts):
+        cumulative += count
+        if cumulative >= target:
+            return bin_center_ms(index)
+    return bin_center_ms(len(counts) - 1)
+
+
+def expand_histogram(pairs):
+    """[[índice, conteo], ...] (formato guardado, solo intervalos no vacíos) → lista completa"""
+    counts = [0] * HISTOGRAM_BINS
+    for index, count in pairs:
+        counts[int(index)] += count
+    return counts
+
+
+class StageTimer:
+    """
+    Tiempos por etapa del bucle de frames con acumulación en histograma
+
+    add() es O(1) y sin asignaciones (un log10 y tres sumas): se puede llamar
+    varias veces por frame. summary() da n, media, p50, p95 y máximo por etapa
+    y el histograma disperso para poder combinar segmentos después.
+    """
+
+    def __init__(self):
+        self._stages = {}
+
+    def add(self, stage, seconds):
+        """Registra una duración (segundos, de time.perf_counter) para la etapa"""
+        data = self._stages.get(stage)
+        if data is None:
+            data = self._stages[stage] = [[0] * HISTOGRAM_BINS, 0.0, 0, 0.0]
+        data[0][bin_index(seconds)] += 1
+        data[1] += seconds
+        data[2] += 1
+        if seconds > data[3]:
+            data[3] = seconds
+
+    def reset(self):
+        self._stages = {}
+
+    def merge(self, other):
+        """Suma los histogramas de otro StageTimer (p. ej. el de un segmento al total)"""
+        # list(): el otro temporizador puede estar recibiendo add() desde su hilo
+        for stage, (counts, total, samples, maximum) in list(other._stages.items()):
+            data = self._stages.get(stage)
+            if data is None:
+                data = self._stages[stage] = [[0] * HISTOGRAM_BINS, 0.0, 0, 0.0]
+            merged = data[0]
+            for index, count in enumerate(counts):
+                merged[index] += count
+            data[1] += total
+            data[2] += samples
+            if maximum > data[3]:
+                data[3] = maximum
+
+    def snapshot(self):
+        """Dict por etapa con (histograma completo, total en segundos, n)"""
+        return {stage: (list(counts), total, samples)
+                for stage, (counts, total, samples, _maximum) in list(self._stages.items())}
+
+    def summary(self):
+        """Dict por etapa con n, total_ms, media_ms, p50_ms, p95_ms, max_ms e histograma"""
+        result = {}
+        for stage, (counts, total, samples, maximum) in self._stages.items():
+            result[stage] = {
+                "n": samples,
+                "total_ms": round(total * 1000, 2),
+                "media_ms": round(total * 1000 / samples, 3),
+                "p50_ms": round(histogram_percentile(counts, 0.50), 3),
+                "p95_ms": round(histogram_percentile(counts, 0.95), 3),
+                "max_ms": round(maximum * 1000, 3),
+                "histograma": [[index, count] for index, count in enumerate(counts) if count],
+            }
+        return result
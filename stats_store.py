@@ -0,0 +1,269 @@
+import json
+import os
+from pathlib import Path
+
+from stage_timer import expand_histogram
+
+
+def iter_jsonl(path):
+    """
+    Lee un archivo JSON Lines entrada por entrada (streaming)
+    Las líneas incompletas (p. ej. por un corte de luz a mitad de escritura) se omiten
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+
+    skipped = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                skipped += 1
+
+    if skipped:
+        print(f"⚠️ {skipped} líneas inválidas omitidas en {path.name}")
+
+
+class StatsStore:
+    """
+    Almacén append-only de estadísticas por segmento (JSON Lines)
+
+    Guardar un segmento escribe una sola línea al final del archivo con
+    O_APPEND + fsync: el costo no depende del historial y un corte durante la
+    escritura solo puede dañar esa última línea, nunca las anteriores.
+    """
+
+    def __init__(self, stats_dir="stats", filename="counting_stats.jsonl",
+                 legacy_filename="counting_stats.json"):
+        self.stats_dir = Path(stats_dir)
+        self.stats_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.stats_dir / filename
+        self.legacy_path = self.stats_dir / legacy_filename
+
+        self._migrate_legacy()
+
+    def _migrate_legacy(self):
+        """Migración única desde el JSON antiguo (lista completa reescrita en cada segmento)"""
+        if self.path.exists() or not self.legacy_path.exists():
+            return
+
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"⚠️ No se pudo migrar {self.legacy_path.name}: {e}")
+            return
+
+        # Escribir en temporal y renombrar: la migración es atómica
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(self._serialize(entry))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        migrated_path = self.legacy_path.with_suffix(self.legacy_path.suffix + ".migrated")
+        os.replace(self.legacy_path, migrated_path)
+        print(f"📦 Migradas {len(entries)} estadísticas de {self.legacy_path.name} a {self.path.name}")
+        print(f"   Archivo original conservado como {migrated_path.name}")
+
+    @staticmethod
+    def _serialize(entry):
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def append(self, entry):
+        """Agrega una entrada al final del archivo (atómico por línea, costo constante)"""
+        data = self._serialize(entry).encode("utf-8")
+
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # Si una escritura anterior quedó cortada, empezar en línea nueva
+            size = os.fstat(fd).st_size
+            if size > 0:
+                with open(self.path, 'rb') as f:
+                    f.seek(size - 1)
+                    if f.read(1) != b"\n":
+                        data = b"\n" + data
+
+            while data:
+                written = os.write(fd, data)
+                data = data[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def iter_entries(self):
+        """Recorre las entradas guardadas sin cargarlas todas en memoria"""
+        return iter_jsonl(self.path)
+
+    def tail(self, count=5, block_size=65536):
+        """
+        Últimas entradas leyendo el archivo desde el final por bloques
+        (el costo depende de count, no del tamaño del historial)
+        """
+        if count <= 0 or not self.path.exists():
+            return []
+
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            # count + 1 saltos de línea garantizan count líneas completas
+            while position > 0 and data.count(b"\n") <= count:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                data = f.read(read_size) + data
+
+        entries = []
+        for line in reversed(data.splitlines()):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if len(entries) == count:
+                break
+        entries.reverse()
+        return entries
+
+    def exists(self):
+        return self.path.exists()
+
+
+class SummaryAggregates:
+    """
+    Agregados acumulados del historial (totales, eficiencia de skip, conteos por modo)
+
+    Se actualizan en O(1) por segmento leyendo solo las líneas nuevas del
+    archivo JSON Lines (desde source_offset) y se guardan junto a las
+    estadísticas, así el resumen no necesita recorrer todo el historial.
+    """
+
+    def __init__(self, store, filename="counting_summary.json"):
+        self.store = store
+        self.path = store.stats_dir / filename
+        self.totals = self._empty_totals()
+        self._load()
+
+    @staticmethod
+    def _empty_totals():
+        return {
+            "source_offset": 0,            # Bytes del JSON Lines ya incorporados
+            "videos": 0,
+            "calibrated": 0,
+            "vertical": 0,
+            "horizontal": 0,
+            "entrance_exit": 0,
+            "directional": 0,
+            "skip_enabled": 0,
+            "skip_efficiency_sum": 0.0,
+            "frames_skipped": 0,
+            "frames_processed": 0,
+            "entradas": 0,
+            "salidas": 0,
+            "direccion_positiva": 0,
+            "direccion_negativa": 0,
+            "stage_histograms": {},        # Etapa → histograma completo (stage_timer)
+            "stage_samples": {},
+            "stage_total_ms": {}
+        }
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self.totals.update(saved.get("totals", {}))
+        except Exception as e:
+            print(f"⚠️ Resumen acumulado ilegible ({e}), se reconstruirá")
+            self.totals = self._empty_totals()
+
+    def add(self, entry):
+        """Incorpora una entrada de estadísticas a los totales"""
+        stats = entry.get('stats', {})
+        totals = self.totals
+
+        totals["videos"] += 1
+        if stats.get('line_calibrated', False):
+            totals["calibrated"] += 1
+        if stats.get('line_orientation') == 'vertical':
+            totals["vertical"] += 1
+        elif stats.get('line_orientation') == 'horizontal':
+            totals["horizontal"] += 1
+
+        if stats.get('frame_skipping_enabled', False):
+            totals["skip_enabled"] += 1
+            totals["skip_efficiency_sum"] += stats.get('skip_efficiency_percent', 0)
+            totals["frames_skipped"] += stats.get('frames_skipped', 0)
+            totals["frames_processed"] += stats.get('frames_processed', 0)
+
+        mode = stats.get('counting_mode')
+        if mode == 'entrance_exit':
+            totals["entrance_exit"] += 1
+            totals["entradas"] += stats.get('entradas', 0)
+            totals["salidas"] += stats.get('salidas', 0)
+        elif mode == 'directional':
+            totals["directional"] += 1
+            totals["direccion_positiva"] += stats.get('derecha', 0) + stats.get('abajo', 0)
+            totals["direccion_negativa"] += stats.get('izquierda', 0) + stats.get('arriba', 0)
+
+        # Histogramas de tiempos por etapa: mismos intervalos en todos los segmentos, se suman
+        for stage, timing in stats.get('stage_timings_ms', {}).items():
+            counts = totals["stage_histograms"].get(stage)
+            segment_counts = expand_histogram(timing.get('histograma', []))
+            totals["stage_histograms"][stage] = ([a + b for a, b in zip(counts, segment_counts)]
+                                                 if counts else segment_counts)
+            totals["stage_samples"][stage] = totals["stage_samples"].get(stage, 0) + timing.get('n', 0)
+            totals["stage_total_ms"][stage] = totals["stage_total_ms"].get(stage, 0) + timing.get('total_ms', 0)
+
+    def sync(self):
+        """
+        Incorpora las líneas agregadas desde la última sincronización
+        Si el archivo se reemplazó (más corto que lo ya leído) se reconstruye
+        """
+        path = self.store.path
+        if not path.exists():
+            return 0
+
+        size = path.stat().st_size
+        if size < self.totals["source_offset"]:
+            print("⚠️ Estadísticas reemplazadas, reconstruyendo resumen acumulado...")
+            self.totals = self._empty_totals()
+        if size == self.totals["source_offset"]:
+            return 0
+
+        added = 0
+        with open(path, 'rb') as f:
+            f.seek(self.totals["source_offset"])
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Línea aún incompleta: se leerá en la próxima sincronización
+                self.totals["source_offset"] += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self.add(json.loads(line))
+                    added += 1
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+        return added
+
+    def save(self):
+        """Guarda los totales (tamaño constante) con escritura atómica"""
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"totals": self.totals}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
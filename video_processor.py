@@ -1,9 +1,19 @@
 import cv2
+import threading
 import time
-import json
 from datetime import datetime
 from pathlib import Path
-from flexible_person_counter import FlexiblePersonCounter
+from flexible_person_counter import FlexiblePersonCounter, SkippedResult
+from live_display import LiveDisplay
+from preview_server import PreviewServer
+from rollups import TrafficRollups
+from event_log import CrossingEventLog
+from detection_cache import DetectionCacheWriter, inference_params
+from stats_store import StatsStore, SummaryAggregates
+from config_watcher import ConfigWatcher
+from prefetch_reader import PrefetchReader
+from stage_timer import StageTimer, histogram_percentile
+from metrics_server import stage_histogram_buckets
 
 
 class VideoProcessor:
@@ -34,6 +44,10 @@ class VideoProcessor:
         except AttributeError:
             DETECTION_LINE_RATIO = None
         
+        # Segmento exacto dibujado en el calibrador (opcional)
+        DETECTION_LINE_START = getattr(config, 'DETECTION_LINE_START', None)
+        DETECTION_LINE_END = getattr(config, 'DETECTION_LINE_END', None)
+        
         # Determinar parámetros según orientación de línea
         if LINE_ORIENTATION.lower() == "vertical":
             detection_line_position = DETECTION_LINE_X
@@ -49,26 +63,158 @@ class VideoProcessor:
             detection_line_ratio=DETECTION_LINE_RATIO,
             line_margin=LINE_MARGIN,
             entrance_direction=ENTRANCE_DIRECTION,
-            counting_mode=COUNTING_MODE
+            counting_mode=COUNTING_MODE,
+            line_start=DETECTION_LINE_START,
+            line_end=DETECTION_LINE_END
         )
         
+        # Ventana en vivo (hilo propio, se inicia por video)
+        self.live_display = LiveDisplay()
+        
+        # Vista previa MJPEG por HTTP (se inicia al procesar el primer video)
+        self.preview_server = None
+        if getattr(config, 'ENABLE_PREVIEW_SERVER', False):
+            self.preview_server = PreviewServer(
+                host=getattr(config, 'PREVIEW_HOST', "127.0.0.1"),
+                port=getattr(config, 'PREVIEW_PORT', 8081),
+                max_fps=getattr(config, 'PREVIEW_MAX_FPS', 5),
+                max_width=getattr(config, 'PREVIEW_MAX_WIDTH', 640),
+                jpeg_quality=getattr(config, 'PREVIEW_JPEG_QUALITY', 70)
+            )
+        
         self.stats_dir = Path(stats_dir)
         self.stats_dir.mkdir(exist_ok=True)
-        self.stats_file = self.stats_dir / "counting_stats.json"
-        self.all_stats = []
+        # Almacén append-only (migra counting_stats.json la primera vez)
+        self.stats_store = StatsStore(self.stats_dir)
+        self.stats_file = self.stats_store.path
+        # El historial no se carga en memoria: se lee bajo demanda con iter_stats() / recent_stats()
         
-        # Cargar estadísticas existentes
-        if self.stats_file.exists():
-            try:
-                with open(self.stats_file, 'r') as f:
-                    self.all_stats = json.load(f)
-                print(f"📊 Cargadas {len(self.all_stats)} estadísticas previas")
-            except:
-                print("⚠️ No se pudieron cargar estadísticas previas, empezando limpio")
+        # Agregados del resumen (solo se leen las líneas nuevas desde la última vez)
+        self.summary_aggregates = SummaryAggregates(self.stats_store)
+        try:
+            if self.summary_aggregates.sync():
+                self.summary_aggregates.save()
+        except Exception as e:
+            print(f"⚠️ No se pudo actualizar el resumen acumulado: {e}")
+        if self.summary_aggregates.totals["videos"]:
+            print(f"📊 Estadísticas previas: {self.summary_aggregates.totals['videos']} videos")
+        
+        # Acumulados por minuto/hora/día (SQLite); la primera vez se llenan con el historial
+        self.camera_id = getattr(config, 'CAMERA_ID', "camara_1")
+        self.rollups = TrafficRollups(self.stats_dir / "rollups.sqlite3", camera_id=self.camera_id)
+        if self.rollups.is_empty() and self.stats_store.exists():
+            added = self.rollups.rebuild_from(self.stats_store.iter_entries())
+            print(f"📈 Acumulados por hora/día generados con {added} estadísticas previas")
+        
+        # Caché de detecciones por segmento para recontar sin YOLO (recount.py)
+        self.detection_cache_dir = None
+        if getattr(config, 'ENABLE_DETECTION_CACHE', False):
+            self.detection_cache_dir = Path(getattr(config, 'DETECTION_CACHE_DIR', self.stats_dir / "detections"))
+        
+        # Registro de cada cruce en chunks .npz por día (stats/events/AAAA-MM-DD/)
+        self.event_log = None
+        if getattr(config, 'ENABLE_EVENT_LOG', False):
+            self.event_log = CrossingEventLog(self.stats_dir / "events", camera_id=self.camera_id,
+                                              flush_every=getattr(config, 'EVENT_LOG_FLUSH_EVERY', 1024))
+        
+        # Recarga en caliente de línea y frame skipping (se aplica entre frames)
+        self.config_watcher = None
+        if getattr(config, 'ENABLE_CONFIG_WATCHER', False):
+            self.config_watcher = ConfigWatcher(
+                self.counter,
+                config_path=config.__file__,
+                line_config_dir=getattr(config, 'LINE_CONFIG_WATCH_DIR', None),
+                interval=getattr(config, 'CONFIG_WATCH_INTERVAL_SECONDS', 2)
+            )
+            self.config_watcher.start()
+        
+        # Frames decodificados por adelantado en un hilo lector (0 = decodificar en el bucle)
+        self.prefetch_frames = getattr(config, 'DECODE_PREFETCH_FRAMES', 0)
+        
+        # Totales desde el arranque para el endpoint de métricas: se suman al
+        # terminar cada video; el video en curso se lee del contador en vivo
+        self._metrics_lock = threading.Lock()
+        self._video_active = False
+        self.lifetime_timer = StageTimer()
+        self.lifetime_crossings = {}
+        self.videos_processed_total = 0
+        self.last_segment_fps = None
+        self.last_segment_inference_fps = None
         
         # Mostrar información de configuración
         self._show_configuration_info()
     
+    def _crossing_counts(self):
+        """Cruces del video en curso por sentido"""
+        if self.counter.counting_mode == "entrance_exit":
+            return {"entrance": self.counter.count_entrance, "exit": self.counter.count_exit}
+        return {"positive": self.counter.count_positive, "negative": self.counter.count_negative}
+    
+    def _finish_video_metrics(self, processing_time):
+        """Pasa los números del video terminado a los totales de métricas"""
+        timer = self.counter.stage_timer
+        snapshot = timer.snapshot()
+        frames = snapshot.get("frame", (None, 0, 0))[2]
+        detector_calls = snapshot.get("deteccion_tracking", (None, 0, 0))[2]
+        with self._metrics_lock:
+            self.lifetime_timer.merge(timer)
+            for direction, count in self._crossing_counts().items():
+                self.lifetime_crossings[direction] = self.lifetime_crossings.get(direction, 0) + count
+            self.videos_processed_total += 1
+            if processing_time > 0:
+                self.last_segment_fps = round(frames / processing_time, 2)
+                self.last_segment_inference_fps = round(detector_calls / processing_time, 2)
+            self._video_active = False
+    
+    def get_metrics(self):
+        """
+        Muestras para el endpoint de métricas (metrics_server): totales desde el
+        arranque más el video en curso. Se llama desde el hilo del servidor; el
+        bucle de frames no toma el lock
+        """
+        timer = StageTimer()
+        with self._metrics_lock:
+            timer.merge(self.lifetime_timer)
+            crossings = dict(self.lifetime_crossings)
+            if self._video_active:
+                timer.merge(self.counter.stage_timer)
+                for direction, count in self._crossing_counts().items():
+                    crossings[direction] = crossings.get(direction, 0) + count
+            videos = self.videos_processed_total
+            active = self._video_active
+        
+        snapshot = timer.snapshot()
+        # Una muestra de "frame" por frame leído; una de deteccion_tracking por llamada al detector
+        frames = snapshot.get("frame", (None, 0, 0))[2]
+        detector_calls = snapshot.get("deteccion_tracking", (None, 0, 0))[2]
+        
+        samples = [
+            ("person_counter_videos_processed_total", "counter",
+             "Segmentos procesados por completo", videos, None),
+            ("person_counter_processing_active", "gauge",
+             "1 si hay un segmento en procesamiento", active, None),
+            ("person_counter_frames_total", "counter",
+             "Frames leídos y pasados al contador", frames, None),
+            ("person_counter_detector_calls_total", "counter",
+             "Llamadas al detector (frames no saltados)", detector_calls, None),
+            ("person_counter_skip_ratio", "gauge",
+             "Fracción de frames saltados desde el arranque",
+             round(1 - detector_calls / frames, 4) if frames else 0.0, None),
+            ("person_counter_processing_fps", "gauge",
+             "Frames por segundo del último segmento procesado", self.last_segment_fps, None),
+            ("person_counter_inference_fps", "gauge",
+             "Llamadas al detector por segundo del último segmento procesado",
+             self.last_segment_inference_fps, None),
+        ]
+        for direction, count in sorted(crossings.items()):
+            samples.append(("person_counter_crossings_total", "counter",
+                            "Cruces de la línea contados por sentido", count, {"direction": direction}))
+        for stage, (counts, total, count) in snapshot.items():
+            samples.append(("person_counter_stage_latency_seconds", "histogram",
+                            "Latencia por etapa del bucle de frames",
+                            (stage_histogram_buckets(counts), total, count), {"stage": stage}))
+        return samples
+    
     def _show_configuration_info(self):
         """Muestra información detallada de la configuración"""
         print("\n" + "="*60)
@@ -84,6 +230,8 @@ class VideoProcessor:
         
         # Orientación y detección
         print(f"📏 Orientación de línea: {self.counter.line_orientation.upper()}")
+        if self.counter.has_line_segment():
+            print(f"   📐 Segmento calibrado: {self.counter.line_start} → {self.counter.line_end}")
         if self.counter.line_orientation == "vertical":
             print("   📐 Detecta movimiento HORIZONTAL (←→)")
         else:
@@ -109,27 +257,65 @@ class VideoProcessor:
         
         print("="*60)
     
-    def save_stats(self, video_name, stats):
-        """Guarda estadísticas en archivo JSON"""
+    def iter_stats(self):
+        """Recorre el historial de estadísticas en streaming (una entrada a la vez)"""
+        return self.stats_store.iter_entries()
+    
+    def recent_stats(self, count=5):
+        """Últimas entradas del historial sin leer el archivo completo"""
+        return self.stats_store.tail(count)
+    
+    @property
+    def all_stats(self):
+        """Historial completo como lista (lo carga en memoria; preferir iter_stats)"""
+        return list(self.iter_stats())
+    
+    def save_stats(self, video_name, stats, capture_start=None):
+        """
+        Guarda estadísticas agregando una línea al archivo JSON Lines
+        capture_start: inicio estimado de la grabación (epoch); None = desconocido
+        """
         stats_entry = {
             "video": video_name,
+            "camera": self.camera_id,
             "stats": stats,
             "processed_at": datetime.now().isoformat()
         }
-        
-        self.all_stats.append(stats_entry)
+        if capture_start is not None:
+            stats_entry["capture_start"] = datetime.fromtimestamp(capture_start).isoformat()
         
         try:
-            with open(self.stats_file, 'w') as f:
-                json.dump(self.all_stats, f, indent=2)
+            self.stats_store.append(stats_entry)
             print(f"💾 Estadísticas guardadas en {self.stats_file}")
         except Exception as e:
             print(f"❌ Error guardando estadísticas: {e}")
+            return
+        
+        try:
+            self.summary_aggregates.sync()
+            self.summary_aggregates.save()
+        except Exception as e:
+            print(f"⚠️ Error actualizando resumen acumulado: {e}")
+        
+        try:
+            self.rollups.record_segment(stats_entry)
+        except Exception as e:
+            print(f"⚠️ Error actualizando acumulados por hora/día: {e}")
     
-    def process_video_live(self, video_path, show_live=True):
-        """Procesa un video mostrando frames en vivo CON FRAME SKIPPING DINÁMICO"""
+    def process_video_live(self, video_path, show_live=True, render=None, delete_after=True):
+        """
+        Procesa un video mostrando frames en vivo CON FRAME SKIPPING DINÁMICO
+        
+        render: dibujar anotaciones aunque no se muestren (None = solo si show_live).
+                Con show_live=False y render=False el modo es headless: sin
+                anotaciones, sin ventana y sin pausas de reproducción.
+        delete_after: eliminar el video al terminar
+        """
         video_path = Path(video_path)
-        print(f"\n🎬 Procesando video EN VIVO: {video_path.name}")
+        # Mostrar en vivo siempre requiere anotaciones
+        render = show_live if render is None else (render or show_live)
+        headless = not show_live and not render
+        print(f"\n🎬 Procesando video {'HEADLESS' if headless else 'EN VIVO'}: {video_path.name}")
         
         # Mostrar información de configuración
         config_info = []
@@ -163,31 +349,141 @@ class VideoProcessor:
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         
         print(f"📊 Video info: {width}x{height} @ {fps}fps, {total_frames} frames")
-        print(f"👁️ Mostrando frames en vivo - Presiona 'q' para saltar, 'ESC' para salir")
         
-        # Calcular delay para reproducir a velocidad original
-        base_frame_delay = 1.0 / fps if fps > 0 else 0.033
+        # El segmento termina de escribirse al acabar la grabación: inicio ≈ mtime - duración
+        # (base de tiempo común del registro de eventos y de los acumulados por hora/día)
+        video_start = None
+        if fps > 0:
+            try:
+                video_start = video_path.stat().st_mtime - total_frames / fps
+            except OSError:
+                pass
+        
+        if self.event_log is not None:
+            self.event_log.begin_video(video_path.name, video_start, fps)
+        
+        detection_cache = None
+        if self.detection_cache_dir is not None:
+            try:
+                detection_cache = DetectionCacheWriter(self.detection_cache_dir, video_path,
+                                                       inference_params(self.counter))
+            except OSError as e:
+                print(f"⚠️ Caché de detecciones deshabilitado para este video: {e}")
+        
+        if show_live:
+            print(f"👁️ Mostrando frames en vivo - Presiona 'q' para saltar, 'ESC' para salir")
+        elif headless:
+            print(f"🖥️ Modo headless: sin anotaciones ni visualización")
+        
+        # Visualización en su propio hilo: el procesamiento no espera a la ventana
+        if show_live:
+            self.live_display.start()
+        
+        preview = self.preview_server
+        if preview is not None and not preview.start():
+            preview = None
         
         # Procesar frames
         frame_count = 0
+        frame_size = None
+        completed = False
         start_time = time.time()
         last_progress_time = start_time
         last_skip_info_time = start_time
         
+        timer = self.counter.stage_timer
+        # Último frame procesado y su versión anotada: los frames saltados no se
+        # convierten a BGR ni se transforman, y la visualización repite el último
+        results = resized_frame = annotated_frame = None
+        
+        # Decodificación adelantada en otro hilo (se solapa con YOLO). El lector
+        # decide el skip y solo hace grab() de los frames saltados; con 0 se
+        # decodifica aquí con la misma regla
+        reader = None
+        if self.prefetch_frames > 0:
+            reader = PrefetchReader(cap, depth=self.prefetch_frames,
+                                    should_retrieve=self.counter.should_process_frame)
+            reader.start()
+        
+        with self._metrics_lock:
+            self._video_active = True
         try:
             while True:
-                ret, frame = cap.read()
+                frame_start = time.perf_counter()
+                if reader is not None:
+                    ret, frame = reader.read()
+                else:
+                    # grab() solo avanza el stream (demux + decodificación interna);
+                    # la conversión a BGR y la copia quedan para retrieve()
+                    ret, frame = cap.grab(), None
                 if not ret:
+                    timer.add("decodificacion", time.perf_counter() - frame_start)
+                    completed = True
                     break
                 
                 frame_count += 1
                 
-                # Procesar frame (con frame skipping interno)
-                results, resized_frame = self.counter.process_frame(frame)
-                annotated_frame = self.counter.draw_annotations(resized_frame, results)
+                # Configuración recargada en caliente: se aplica completa entre dos frames
+                if self.config_watcher is not None:
+                    changes = self.config_watcher.apply_pending()
+                    if "skip" in changes and detection_cache is not None:
+                        # El caché quedaría etiquetado con parámetros de skip que ya no aplican
+                        detection_cache = None
+                        print("⚠️ Frame skipping cambiado: no se cachean las detecciones de este video")
+                
+                # Decidir el skip ANTES de recuperar el frame (con lector ya lo decidió
+                # él: frame None = saltado)
+                if reader is not None:
+                    process = frame is not None
+                else:
+                    process = self.counter.should_process_frame()
+                if process:
+                    if frame is None:
+                        ret, frame = cap.retrieve()
+                    timer.add("decodificacion", time.perf_counter() - frame_start)
+                    if not ret:
+                        completed = True
+                        break
+                    results, resized_frame = self.counter.process_frame(frame, skip_checked=True)
+                    annotated_frame = None
+                else:
+                    timer.add("decodificacion", time.perf_counter() - frame_start)
+                    self.counter.skip_frame()
+                    if resized_frame is None and (render or preview is not None):
+                        # Aún no hay frame que repetir (el primero se saltó): recuperar
+                        # este (con lector no se puede: se espera al primer procesado)
+                        if reader is None:
+                            ret, frame = cap.retrieve()
+                        if ret and frame is not None:
+                            resized_frame = self.counter.prepare_frame(frame)
+                            results = SkippedResult(resized_frame)
+                
+                stage_start = time.perf_counter()
+                if self.event_log is not None:
+                    for track_id, direction, kind, position in self.counter.last_crossings:
+                        self.event_log.record(frame_count - 1, track_id, direction, kind, position)
+                
+                if detection_cache is not None and self.counter.last_detections is not None:
+                    detection_cache.add(frame_count - 1, *self.counter.last_detections)
+                    frame_size = resized_frame.shape[1::-1]
+                timer.add("registro", time.perf_counter() - stage_start)
+                
+                # Anotar solo si alguien mira: ventana o clientes de la vista previa.
+                # Un frame saltado reutiliza la última anotación
+                preview_frame = preview is not None and preview.wants_frame()
+                new_annotation = False
+                if (render or preview_frame) and resized_frame is not None:
+                    if annotated_frame is None:
+                        annotated_frame = self.counter.draw_annotations(resized_frame, results)
+                        new_annotation = True
+                    if preview_frame:
+                        stage_start = time.perf_counter()
+                        preview.publish(annotated_frame)
+                        timer.add("vista_previa", time.perf_counter() - stage_start)
                 
                 # Mostrar frame procesado en vivo
                 if show_live:
+                    stage_start = time.perf_counter()
                     window_title = f'🎯 Person Counter - {video_path.name}'
                     if self.counter.line_calibrated:
                         window_title += ' (CALIBRADA)'
@@ -196,26 +492,22 @@ class VideoProcessor:
                     if self.counter.enable_frame_skipping:
                         window_title += f' [SKIP: {self.counter.skip_mode.upper()}]'
                     
-                    cv2.imshow(window_title, annotated_frame)
-                    
-                    # Ajustar delay según frame skipping
-                    # Si se saltaron frames, mostrar más rápido para compensar
-                    current_delay = base_frame_delay
-                    if self.counter.enable_frame_skipping and self.counter.current_frame_skip > 0:
-                        # Reducir delay proporcionalmente al skip
-                        current_delay = base_frame_delay / (self.counter.current_frame_skip + 1)
+                    # Solo anotaciones nuevas: en un frame saltado la ventana ya muestra la última
+                    if new_annotation:
+                        self.live_display.submit(annotated_frame, window_title)
                     
-                    # Control de teclado
-                    key = cv2.waitKey(int(current_delay * 1000)) & 0xFF
-                    if key == ord('q'):
+                    # Control de teclado (leído por el hilo de visualización)
+                    action = self.live_display.poll_key()
+                    timer.add("visualizacion", time.perf_counter() - stage_start)
+                    if action == "skip":
                         print(f"⏭️ Saltando video {video_path.name}")
                         break
-                    elif key == 27:  # ESC
+                    elif action == "exit":
                         print(f"🚪 Saliendo del procesamiento")
-                        cap.release()
-                        cv2.destroyAllWindows()
                         return "exit"
                 
+                timer.add("frame", time.perf_counter() - frame_start)
+                
                 # Mostrar progreso cada 5 segundos
                 current_time = time.time()
                 if current_time - last_progress_time >= 5.0:
@@ -250,10 +542,29 @@ class VideoProcessor:
             print(f"\n🛑 Procesamiento detenido por usuario")
         
         finally:
-            # Cleanup
+            # Cleanup (el lector usa el VideoCapture hasta detenerse)
+            if reader is not None:
+                reader.stop()
             cap.release()
+            self._finish_video_metrics(time.time() - start_time)
+            if self.event_log is not None:
+                try:
+                    self.event_log.flush()
+                except Exception as e:
+                    print(f"⚠️ Error guardando eventos de cruce: {e}")
             if show_live:
-                cv2.destroyAllWindows()
+                self.live_display.stop()
+                print(f"🖼️ Visualización: {self.live_display.frames_submitted} frames anotados, "
+                      f"{self.live_display.frames_shown} mostrados, "
+                      f"{self.live_display.frames_dropped} descartados")
+        
+        # Guardar detecciones solo si el video se leyó completo
+        if detection_cache is not None and completed and frame_size is not None:
+            try:
+                cache_path = detection_cache.save(frame_size, fps, total_frames)
+                print(f"💾 Detecciones cacheadas en {cache_path}")
+            except Exception as e:
+                print(f"⚠️ Error guardando caché de detecciones: {e}")
         
         # Estadísticas finales
         processing_time = time.time() - start_time
@@ -280,121 +591,71 @@ class VideoProcessor:
                 print(f"   ⬇️ ABAJO: {stats['abajo']} | ⬆️ ARRIBA: {stats['arriba']}")
             print(f"   📊 TOTAL: {stats['total']}")
         
-        if self.counter.detection_line:
+        if self.counter.has_line_segment() and self.counter.line_segment:
+            print(f"   📍 Segmento: {self.counter.line_segment[0]} → {self.counter.line_segment[1]} (±{self.counter.line_margin}px)")
+        elif self.counter.detection_line:
             if self.counter.line_orientation == "vertical":
                 print(f"   📍 Línea X: {self.counter.detection_line} (±{self.counter.line_margin}px)")
             else:
                 print(f"   📍 Línea Y: {self.counter.detection_line} (±{self.counter.line_margin}px)")
         
+        # Tiempos por etapa del segmento
+        if stats.get("stage_timings_ms"):
+            print(f"   ⏱️ Tiempos por etapa (p50 / p95 ms):")
+            for stage, timing in stats["stage_timings_ms"].items():
+                print(f"      {stage:20s} {timing['p50_ms']:8.2f} / {timing['p95_ms']:8.2f}  (n={timing['n']})")
+        
         # Mostrar resumen de frame skipping
         if self.counter.enable_frame_skipping:
             self.counter.print_frame_skip_summary()
         
         # Guardar estadísticas
-        self.save_stats(video_path.name, stats)
+        self.save_stats(video_path.name, stats, capture_start=video_start)
         
         # Borrar video procesado
-        try:
-            video_path.unlink()  # Elimina el archivo
-            print(f"🗑️ Video eliminado: {video_path.name}")
-        except Exception as e:
-            print(f"⚠️ Error eliminando video {video_path.name}: {e}")
+        if delete_after:
+            try:
+                video_path.unlink()  # Elimina el archivo
+                print(f"🗑️ Video eliminado: {video_path.name}")
+            except Exception as e:
+                print(f"⚠️ Error eliminando video {video_path.name}: {e}")
         
         return stats
     
     def get_summary_stats(self):
-        """Obtiene estadísticas resumidas de todos los videos procesados"""
-        if not self.all_stats:
+        """Obtiene estadísticas resumidas de todos los videos procesados (desde los agregados)"""
+        totals = self.summary_aggregates.totals
+        total_videos = totals["videos"]
+        if not total_videos:
             return None
         
-        total_videos = len(self.all_stats)
-        
-        # Separar por modo de conteo
-        entrance_exit_videos = [e for e in self.all_stats if e['stats'].get('counting_mode') == 'entrance_exit']
-        directional_videos = [e for e in self.all_stats if e['stats'].get('counting_mode') == 'directional']
-        
-        # Contar líneas calibradas
-        calibrated_videos = sum(1 for e in self.all_stats if e['stats'].get('line_calibrated', False))
-        
-        # Orientaciones
-        vertical_videos = sum(1 for e in self.all_stats if e['stats'].get('line_orientation') == 'vertical')
-        horizontal_videos = sum(1 for e in self.all_stats if e['stats'].get('line_orientation') == 'horizontal')
-        
-        # Estadísticas de frame skipping
-        if summary['videos_con_frame_skipping'] > 0:
-            print(f"\n⚡ ESTADÍSTICAS DE FRAME SKIPPING:")
-            print(f"   📊 Videos con frame skipping: {summary['videos_con_frame_skipping']}")
-            if 'promedio_eficiencia_skip' in summary:
-                print(f"   📈 Eficiencia promedio: {summary['promedio_eficiencia_skip']:.2f}% frames saltados")
-                print(f"   🚀 Mejora de rendimiento: {summary['mejora_rendimiento_promedio']}x más rápido")
-                print(f"   ⚡ Total frames saltados: {summary.get('total_frames_saltados', 0):,}")
-                print(f"   ✅ Total frames procesados: {summary.get('total_frames_procesados', 0):,}")
-        
-        # Estadísticas de entrada/salida
-        if summary.get('total_entradas') is not None:
-            print(f"\n🚪 ESTADÍSTICAS ENTRADA/SALIDA:")
-            print(f"   ➡️ Total ENTRADAS: {summary['total_entradas']}")
-            print(f"   ⬅️ Total SALIDAS: {summary['total_salidas']}")
-            print(f"   👥 PERSONAS DENTRO: {summary['personas_dentro_actual']}")
-            print(f"   📈 Total movimientos: {summary['total_movimientos']}")
-        
-        # Estadísticas direccionales
-        if summary.get('total_direccion_positiva') is not None:
-            print(f"\n📐 ESTADÍSTICAS DIRECCIONALES:")
-            print(f"   ➡️⬇️ Dirección positiva: {summary['total_direccion_positiva']}")
-            print(f"   ⬅️⬆️ Dirección negativa: {summary['total_direccion_negativa']}")
-            print(f"   📊 Total direccional: {summary['total_direccional']}")
-        
-        # Recomendaciones
-        print(f"\n💡 RECOMENDACIONES:")
-        if summary['videos_con_linea_defecto'] > 0:
-            print(f"   • {summary['videos_con_linea_defecto']} videos usaron línea por defecto")
-            print(f"   • Ejecuta 'python line_calibrator.py' para calibrar línea")
-            print(f"   • Esto mejorará la precisión del conteo")
-        
-        if summary['videos_con_frame_skipping'] == 0:
-            print(f"   • Frame skipping deshabilitado en todos los videos")
-            print(f"   • Habilita ENABLE_FRAME_SKIPPING = True en config.py para mejor rendimiento")
-        elif summary.get('promedio_eficiencia_skip', 0) < 20:
-            print(f"   • Eficiencia de frame skipping baja ({summary.get('promedio_eficiencia_skip', 0):.1f}%)")
-            print(f"   • Considera ajustar NO_DETECTION_FRAME_SKIP en config.py")
-        
-        if summary['videos_modo_direccional'] > 0 and summary['videos_modo_entrada_salida'] == 0:
-            print(f"   • Considera usar COUNTING_MODE = 'entrance_exit' para mejor semántica")
-        
-        print("="*70) 
-        skip_enabled_videos = sum(1 for e in self.all_stats if e['stats'].get('frame_skipping_enabled', False))
-        
         summary = {
             "total_videos_procesados": total_videos,
-            "videos_con_linea_calibrada": calibrated_videos,
-            "videos_con_linea_defecto": total_videos - calibrated_videos,
-            "videos_linea_vertical": vertical_videos,
-            "videos_linea_horizontal": horizontal_videos,
-            "videos_modo_entrada_salida": len(entrance_exit_videos),
-            "videos_modo_direccional": len(directional_videos),
-            "videos_con_frame_skipping": skip_enabled_videos,
+            "videos_con_linea_calibrada": totals["calibrated"],
+            "videos_con_linea_defecto": total_videos - totals["calibrated"],
+            "videos_linea_vertical": totals["vertical"],
+            "videos_linea_horizontal": totals["horizontal"],
+            "videos_modo_entrada_salida": totals["entrance_exit"],
+            "videos_modo_direccional": totals["directional"],
+            "videos_con_frame_skipping": totals["skip_enabled"],
             "ultima_actualizacion": datetime.now().isoformat()
         }
         
         # Estadísticas de frame skipping
-        if skip_enabled_videos > 0:
-            skip_videos = [e for e in self.all_stats if e['stats'].get('frame_skipping_enabled', False)]
-            avg_skip_efficiency = sum(e['stats'].get('skip_efficiency_percent', 0) for e in skip_videos) / len(skip_videos)
-            total_frames_skipped = sum(e['stats'].get('frames_skipped', 0) for e in skip_videos)
-            total_frames_processed = sum(e['stats'].get('frames_processed', 0) for e in skip_videos)
+        if totals["skip_enabled"] > 0:
+            avg_skip_efficiency = totals["skip_efficiency_sum"] / totals["skip_enabled"]
             
             summary.update({
                 "promedio_eficiencia_skip": round(avg_skip_efficiency, 2),
-                "total_frames_saltados": total_frames_skipped,
-                "total_frames_procesados": total_frames_processed,
+                "total_frames_saltados": totals["frames_skipped"],
+                "total_frames_procesados": totals["frames_processed"],
                 "mejora_rendimiento_promedio": round(100 / (100 - avg_skip_efficiency), 2) if avg_skip_efficiency < 100 else "∞"
             })
         
         # Estadísticas para modo entrada/salida
-        if entrance_exit_videos:
-            total_entradas = sum(e['stats'].get('entradas', 0) for e in entrance_exit_videos)
-            total_salidas = sum(e['stats'].get('salidas', 0) for e in entrance_exit_videos)
+        if totals["entrance_exit"]:
+            total_entradas = totals["entradas"]
+            total_salidas = totals["salidas"]
             
             summary.update({
                 "total_entradas": total_entradas,
@@ -404,10 +665,9 @@ class VideoProcessor:
             })
         
         # Estadísticas para modo direccional
-        if directional_videos:
-            # Sumar según orientación
-            total_positive = sum(e['stats'].get('derecha', 0) + e['stats'].get('abajo', 0) for e in directional_videos)
-            total_negative = sum(e['stats'].get('izquierda', 0) + e['stats'].get('arriba', 0) for e in directional_videos)
+        if totals["directional"]:
+            total_positive = totals["direccion_positiva"]
+            total_negative = totals["direccion_negativa"]
             
             summary.update({
                 "total_direccion_positiva": total_positive,  # derecha/abajo
@@ -415,6 +675,19 @@ class VideoProcessor:
                 "total_direccional": total_positive + total_negative
             })
         
+        # Tiempos por etapa de todos los segmentos (histogramas combinados)
+        if totals["stage_histograms"]:
+            summary["tiempos_etapas_ms"] = {
+                stage: {
+                    "n": totals["stage_samples"].get(stage, 0),
+                    "media_ms": round(totals["stage_total_ms"].get(stage, 0) / totals["stage_samples"][stage], 3)
+                                if totals["stage_samples"].get(stage) else 0,
+                    "p50_ms": round(histogram_percentile(counts, 0.50), 3),
+                    "p95_ms": round(histogram_percentile(counts, 0.95), 3)
+                }
+                for stage, counts in totals["stage_histograms"].items()
+            }
+        
         return summary
     
     def print_summary(self):
@@ -435,4 +708,52 @@ class VideoProcessor:
         print(f"📐 Línea vertical: {summary['videos_linea_vertical']} | Horizontal: {summary['videos_linea_horizontal']}")
         print(f"📊 Modo entrada/salida: {summary['videos_modo_entrada_salida']} | Direccional: {summary['videos_modo_direccional']}")
         
-        # Estadísticas de
\ No newline at end of file
+        # Estadísticas de frame skipping
+        if summary['videos_con_frame_skipping'] > 0:
+            print(f"\n⚡ ESTADÍSTICAS DE FRAME SKIPPING:")
+            print(f"   📊 Videos con frame skipping: {summary['videos_con_frame_skipping']}")
+            if 'promedio_eficiencia_skip' in summary:
+                print(f"   📈 Eficiencia promedio: {summary['promedio_eficiencia_skip']:.2f}% frames saltados")
+                print(f"   🚀 Mejora de rendimiento: {summary['mejora_rendimiento_promedio']}x más rápido")
+                print(f"   ⚡ Total frames saltados: {summary.get('total_frames_saltados', 0):,}")
+                print(f"   ✅ Total frames procesados: {summary.get('total_frames_procesados', 0):,}")
+        
+        # Estadísticas de entrada/salida
+        if summary.get('total_entradas') is not None:
+            print(f"\n🚪 ESTADÍSTICAS ENTRADA/SALIDA:")
+            print(f"   ➡️ Total ENTRADAS: {summary['total_entradas']}")
+            print(f"   ⬅️ Total SALIDAS: {summary['total_salidas']}")
+            print(f"   👥 PERSONAS DENTRO: {summary['personas_dentro_actual']}")
+            print(f"   📈 Total movimientos: {summary['total_movimientos']}")
+        
+        # Estadísticas direccionales
+        if summary.get('total_direccion_positiva') is not None:
+            print(f"\n📐 ESTADÍSTICAS DIRECCIONALES:")
+            print(f"   ➡️⬇️ Dirección positiva: {summary['total_direccion_positiva']}")
+            print(f"   ⬅️⬆️ Dirección negativa: {summary['total_direccion_negativa']}")
+            print(f"   📊 Total direccional: {summary['total_direccional']}")
+        
+        # Tiempos por etapa
+        if summary.get('tiempos_etapas_ms'):
+            print(f"\n⏱️ TIEMPOS POR ETAPA (p50 / p95 ms):")
+            for stage, timing in summary['tiempos_etapas_ms'].items():
+                print(f"   {stage:20s} {timing['p50_ms']:8.2f} / {timing['p95_ms']:8.2f}  (n={timing['n']:,})")
+        
+        # Recomendaciones
+        print(f"\n💡 RECOMENDACIONES:")
+        if summary['videos_con_linea_defecto'] > 0:
+            print(f"   • {summary['videos_con_linea_defecto']} videos usaron línea por defecto")
+            print(f"   • Ejecuta 'python line_calibrator.py' para calibrar línea")
+            print(f"   • Esto mejorará la precisión del conteo")
+        
+        if summary['videos_con_frame_skipping'] == 0:
+            print(f"   • Frame skipping deshabilitado en todos los videos")
+            print(f"   • Habilita ENABLE_FRAME_SKIPPING = True en config.py para mejor rendimiento")
+        elif summary.get('promedio_eficiencia_skip', 0) < 20:
+            print(f"   • Eficiencia de frame skipping baja ({summary.get('promedio_eficiencia_skip', 0):.1f}%)")
+            print(f"   • Considera ajustar NO_DETECTION_FRAME_SKIP en config.py")
+        
+        if summary['videos_modo_direccional'] > 0 and summary['videos_modo_entrada_salida'] == 0:
+            print(f"   • Considera usar COUNTING_MODE = 'entrance_exit' para mejor semántica")
+        
+        print("="*70)